@@ -0,0 +1,121 @@
+# activity_tracker.py - who has spoken up in each matchup channel, and when to nag
+#
+# Each tracked channel has its members, the ones who already posted, its start time
+# and the time of the last inactivity reminder. The state lives in memory and is
+# written through to the state store, so a restart picks it up without rescanning
+# channel history. A channel's next reminder is due remind_after seconds after the
+# later of its start and its last reminder, and only while someone has not posted;
+# subscribers are told about each changed channel so its deadline can be rescheduled.
+import time
+import logging
+
+logger = logging.getLogger("discord_bot")
+
+INACTIVITY_REMIND_SEC = 4 * 3600
+
+
+class ActivityTracker:
+    """
+    channel_id -> {"created_at", "member_ids", "responses": set, "last_reminder"}
+    (times in epoch seconds). The dicts returned by get() are read-only; changes
+    go through track() / record_response() / mark_reminded() / forget().
+
+    Subscribers are plain callables fn(tracker, channel_id), run after the change
+    is stored; a failing subscriber is only logged.
+    """
+
+    def __init__(self, store, remind_after: float = INACTIVITY_REMIND_SEC):
+        self._store = store
+        self.remind_after = remind_after
+        self._channels = store.activity_channels()
+        self._subscribers = []
+
+    # ---------- reads ----------
+
+    def get(self, channel_id: int) -> dict | None:
+        return self._channels.get(channel_id)
+
+    def __contains__(self, channel_id) -> bool:
+        return channel_id in self._channels
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def channel_ids(self) -> list[int]:
+        return list(self._channels)
+
+    def non_responders(self, channel_id: int) -> list[int]:
+        data = self._channels.get(channel_id)
+        if not data:
+            return []
+        return [mid for mid in data["member_ids"] if mid not in data["responses"]]
+
+    def deadline(self, channel_id: int) -> float | None:
+        """Epoch seconds the next reminder is due, or None if nobody needs one."""
+        data = self._channels.get(channel_id)
+        if not data or not self.non_responders(channel_id):
+            return None
+        return (data["last_reminder"] or data["created_at"]) + self.remind_after
+
+    # ---------- changes ----------
+
+    def track(self, channel_id: int, member_ids, created_at: float | None = None, responses=()) -> None:
+        """Start (or restart) tracking a channel."""
+        member_ids = list(member_ids)
+        created_at = time.time() if created_at is None else created_at
+        responses = {uid for uid in responses if uid in member_ids}
+        self._store.set_activity_channel(channel_id, created_at, member_ids, responses)
+        self._channels[channel_id] = {
+            "created_at": created_at,
+            "member_ids": member_ids,
+            "responses": responses,
+            "last_reminder": None,
+        }
+        self._notify(channel_id)
+
+    def record_response(self, channel_id: int, user_id: int) -> bool:
+        """Note that a member posted; True if that was their first post in the channel."""
+        data = self._channels.get(channel_id)
+        if not data or user_id not in data["member_ids"] or user_id in data["responses"]:
+            return False
+        self._store.add_activity_response(channel_id, user_id)
+        data["responses"].add(user_id)
+        self._notify(channel_id)
+        return True
+
+    def mark_reminded(self, channel_id: int, when: float | None = None) -> None:
+        data = self._channels.get(channel_id)
+        if not data:
+            return
+        when = time.time() if when is None else when
+        self._store.set_activity_reminded(channel_id, when)
+        data["last_reminder"] = when
+        self._notify(channel_id)
+
+    def forget(self, channel_ids) -> None:
+        channel_ids = [cid for cid in channel_ids if cid in self._channels]
+        if not channel_ids:
+            return
+        self._store.delete_activity_channels(channel_ids)
+        for cid in channel_ids:
+            del self._channels[cid]
+        for cid in channel_ids:
+            self._notify(cid)
+
+    def clear(self) -> None:
+        """Stop tracking every channel (the matchup channels were deleted)."""
+        self.forget(self.channel_ids())
+
+    # ---------- subscribers ----------
+
+    def subscribe(self, fn):
+        """Register fn(tracker, channel_id); usable as a decorator."""
+        self._subscribers.append(fn)
+        return fn
+
+    def _notify(self, channel_id: int) -> None:
+        for fn in self._subscribers:
+            try:
+                fn(self, channel_id)
+            except Exception as e:
+                logger.warning(f"Activity tracker subscriber {getattr(fn, '__name__', fn)} failed: {e}")
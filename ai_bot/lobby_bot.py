@@ -1,5 +1,5 @@
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import json
 
@@ -36,50 +36,52 @@ def load_ai_advance_info(logger, ADVANCE_INFO_FILE):
 
 
 # =============================
-# PERSONALITY LOOP
+# PERSONALITY POSTS
 # =============================
-async def lobby_personality_loop(bot, logger, ADVANCE_INFO_FILE, get_lobby_talk_channel):
-    await bot.wait_until_ready()
+PERSONALITY_CHECK_SECONDS = 300  # how often to look for a quiet moment inside the window
 
-    while not bot.is_closed():
-        try:
-            # logger.info(f"[AI BOT] ActiveHours={is_active_hours()} | CanSend={can_send_personality_message()}")
 
-            if is_active_hours():
-                # logger.info("[AI BOT] Within active hours")
+def next_personality_check():
+    """When to look again: 5 minutes from now inside the window, else the next 1PM AZ."""
+    az = pytz.timezone("US/Arizona")
+    now = datetime.now(az)
+    if is_active_hours():
+        return now + timedelta(seconds=PERSONALITY_CHECK_SECONDS)
+    start = now.replace(hour=13, minute=0, second=0, microsecond=0)
+    if now.hour >= 19:
+        start += timedelta(days=1)  # Arizona has no DST, so this is still 1PM
+    return start
 
-                if can_send_personality_message() and PERSONALITY_ENABLED:
-                    logger.info("[AI BOT] Sending personality message")
 
-                    for guild in bot.guilds:
-                        channel = get_lobby_talk_channel(guild)
+async def send_personality_messages(bot, logger, ADVANCE_INFO_FILE, get_lobby_talk_channel):
+    """One personality check (run by the bot's scheduler at next_personality_check())."""
+    try:
+        # logger.info(f"[AI BOT] ActiveHours={is_active_hours()} | CanSend={can_send_personality_message()}")
 
-                        if not channel:
-                            logger.info(f"[AI BOT] lobby-talk not found in {guild.name}")
-                            continue
+        if not is_active_hours():
+            return
 
-                        context = load_ai_advance_info(logger, ADVANCE_INFO_FILE)
-                        msg = generate_personality_message(context)
+        if can_send_personality_message() and PERSONALITY_ENABLED:
+            logger.info("[AI BOT] Sending personality message")
 
-                        if msg and msg.strip():
-                            await channel.send(msg)
-                            logger.info(f"[AI BOT] Sent message in #{channel.name}")
+            for guild in bot.guilds:
+                channel = get_lobby_talk_channel(guild)
 
-                            await asyncio.sleep(1.5)
+                if not channel:
+                    logger.info(f"[AI BOT] lobby-talk not found in {guild.name}")
+                    continue
 
-                else:
-                    if not PERSONALITY_ENABLED:
-                        pass
-                        # logger.info("[AI BOT] Personality disabled")
-                    elif not can_send_personality_message():
-                        logger.info("[AI BOT] Skipped (cooldown not met)")
+                context = load_ai_advance_info(logger, ADVANCE_INFO_FILE)
+                msg = generate_personality_message(context)
 
-            else:
-                pass
-                # logger.info("[AI BOT] Outside active hours")
+                if msg and msg.strip():
+                    await channel.send(msg)
+                    logger.info(f"[AI BOT] Sent message in #{channel.name}")
 
-            await asyncio.sleep(300)  # 5 minutes
+                    await asyncio.sleep(1.5)
 
-        except Exception as e:
-            logger.warning(f"lobby_personality_loop error: {e}")
-            await asyncio.sleep(60)
+        elif PERSONALITY_ENABLED:
+            logger.info("[AI BOT] Skipped (cooldown not met)")
+
+    except Exception as e:
+        logger.warning(f"send_personality_messages error: {e}")
@@ -0,0 +1,189 @@
+# ap_index.py - who is on Auto-Pilot today, compiled once per file change / local day
+#
+# ap_users.json is read and filtered only when its mtime changes or the local date
+# (AP_ALERT_TZ) rolls over. The compiled result is an ActiveAP list (the same
+# entries load_ap_users() always returned) carrying a dict keyed by normalized user
+# id, so is_on_ap() is one lookup, and the sorted upcoming start/return dates, so
+# the reminder loop can sleep until the next one instead of polling.
+import os
+import json
+import logging
+from datetime import datetime, time as dt_time, timedelta
+
+logger = logging.getLogger("discord_bot")
+
+# transition kinds
+START = "start"     # an entry becomes active at local midnight of its start date
+RETURN = "return"   # ...and stops being active at local midnight of its until date
+
+
+def normalize_id(value) -> str | None:
+    """
+    Coerce a Discord ID (int or string) to a normalized numeric-string.
+    Returns None if it cannot be parsed as an integer.
+    """
+    if value is None:
+        return None
+
+    # Keep ONLY ASCII digits — no int() conversion!
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return digits if digits else None
+
+
+def date_from_str(dstr: str):
+    """Return a date object from 'YYYY-MM-DD' (no timezone math)."""
+    return datetime.strptime(dstr, "%Y-%m-%d").date()
+
+
+class ActiveAP(list):
+    """
+    The AP entries active on `day` (dicts with a normalized "user_id"), plus:
+        by_id        {user id: entry}
+        transitions  sorted [(date, START | RETURN, user id), ...] after `day`
+    Treat it as read-only; it is shared until the next compile.
+    """
+
+    def __init__(self, entries=(), day=None, transitions=()):
+        super().__init__(entries)
+        self.day = day
+        self.by_id = {}
+        for u in self:
+            # first entry wins, same as the old linear scan
+            self.by_id.setdefault(u["user_id"], u)
+        self.transitions = list(transitions)
+
+    def get(self, user_id):
+        """The AP entry for user_id if they are on AP today, else None."""
+        uid = user_id if isinstance(user_id, str) and user_id.isdigit() else normalize_id(user_id)
+        return self.by_id.get(uid) if uid is not None else None
+
+    def returning_on(self, d) -> list:
+        """Active entries whose until date is d."""
+        out = []
+        for u in self:
+            try:
+                if date_from_str(u["until"]) == d:
+                    out.append(u)
+            except Exception:
+                continue
+        return out
+
+    def next_transition(self, kind: str | None = None, lead_days: int = 0):
+        """
+        First date after `day` on which a transition (of `kind`, if given), moved
+        `lead_days` earlier, falls; None if there is none.
+        """
+        lead = timedelta(days=lead_days)
+        for d, k, _uid in self.transitions:
+            if kind is not None and k != kind:
+                continue
+            if d - lead > self.day:
+                return d - lead
+        return None
+
+
+class APIndex:
+    """
+    Compiles ap_users.json into an ActiveAP for the current local day.
+
+    current() checks the file mtime and the local date (a stat and a clock read)
+    and recompiles only when either changed. Subscribers fn(index) run after a
+    recompile caused by a file change, not by a day rollover.
+    """
+
+    def __init__(self, path: str, tz):
+        self.path = path
+        self.tz = tz
+        self._mtime = None
+        self._raw = []
+        self._view = None
+        self._subscribers = []
+
+    # ---------- time helpers ----------
+
+    def today(self):
+        return datetime.now(self.tz).date()
+
+    def local_midnight(self, d) -> datetime:
+        """Aware datetime for 00:00 of date d in the index timezone."""
+        naive = datetime.combine(d, dt_time())
+        localize = getattr(self.tz, "localize", None)   # pytz zones need localize()
+        return localize(naive) if localize else naive.replace(tzinfo=self.tz)
+
+    # ---------- compiling ----------
+
+    def _read(self, mtime, force: bool = False) -> bool:
+        """Reload the raw list if the file changed; returns True if it did."""
+        if not force and mtime == self._mtime and self._view is not None:
+            return False
+        raw = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                raw = [u for u in data if isinstance(u, dict)] if isinstance(data, list) else []
+            except Exception as e:
+                logger.warning(f"Could not read {self.path}: {e}")
+                if self._view is not None:
+                    return False    # keep the last good list
+        changed = self._view is not None
+        self._raw = raw
+        self._mtime = mtime
+        return changed
+
+    def _compile(self, today) -> ActiveAP:
+        active, transitions = [], []
+        for u in self._raw:
+            try:
+                until_date = date_from_str(u["until"])
+                s = (u.get("start") or "").strip()
+                try:
+                    start_date = date_from_str(s) if s else today
+                except Exception:
+                    start_date = today  # missing/invalid start counts as "today"
+
+                # skip invalid ranges
+                if start_date > until_date:
+                    continue
+
+                uid = normalize_id(u.get("user_id"))
+                if start_date <= today < until_date:
+                    entry = dict(u)
+                    entry["user_id"] = uid
+                    active.append(entry)
+                if start_date > today:
+                    transitions.append((start_date, START, uid))
+                if until_date > today:
+                    transitions.append((until_date, RETURN, uid))
+            except Exception:
+                continue
+        transitions.sort(key=lambda t: (t[0], t[1], t[2] or ""))
+        return ActiveAP(active, today, transitions)
+
+    def current(self, force: bool = False) -> ActiveAP:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        file_changed = self._read(mtime, force)
+        today = self.today()
+        if file_changed or self._view is None or self._view.day != today:
+            self._view = self._compile(today)
+        if file_changed:
+            self._notify()
+        return self._view
+
+    # ---------- subscribers ----------
+
+    def subscribe(self, fn):
+        """Register fn(index); usable as a decorator."""
+        self._subscribers.append(fn)
+        return fn
+
+    def _notify(self) -> None:
+        for fn in self._subscribers:
+            try:
+                fn(self)
+            except Exception as e:
+                logger.warning(f"AP index subscriber {getattr(fn, '__name__', fn)} failed: {e}")
+
@@ -0,0 +1,99 @@
+# channel_reconcile.py - plan the week's matchup channels as a diff, not delete-all/create-all
+#
+# The advance knows the channels it wants (name + players); the category already
+# holds last week's (name + players read from the member overwrites). plan() pairs
+# them up and returns the smallest set of operations: keep a channel that already
+# fits, rename one that has the right players, archive what is left over and create
+# what is still missing. A channel is only reused when its players are exactly the
+# same, so nobody is let into someone else's old conversation; a channel with the
+# right name but other players is archived and created again. The plan is plain
+# data, so it can be shown as a dry run before anything is applied.
+
+# operation kinds, in the order they are applied
+KEEP = "keep"
+RENAME = "rename"             # same players, different name
+ARCHIVE = "archive"
+CREATE = "create"
+
+_ICONS = {KEEP: "✅", RENAME: "✏️", ARCHIVE: "📦", CREATE: "➕"}
+
+
+class Op:
+    __slots__ = ("kind", "name", "member_ids", "welcome", "channel_id", "old_name", "old_member_ids")
+
+    def __init__(self, kind, name, member_ids=(), welcome=None, channel_id=None, old_name=None, old_member_ids=()):
+        self.kind = kind
+        self.name = name                 # desired name (the current name for ARCHIVE)
+        self.member_ids = list(member_ids)
+        self.welcome = welcome
+        self.channel_id = channel_id     # existing channel, None for CREATE
+        self.old_name = old_name
+        self.old_member_ids = list(old_member_ids)
+
+    def __repr__(self):
+        return f"Op({self.kind}, {self.name!r}, channel={self.channel_id})"
+
+
+def plan(desired, existing) -> list[Op]:
+    """
+    desired:  [(name, member_ids, welcome), ...] in category order
+    existing: [(channel_id, name, member_ids), ...] as the category holds them now
+    Returns the operations, KEEP / RENAME first, then ARCHIVE, then CREATE.
+    """
+    free = list(existing)
+    matched, pending = [], []
+
+    # 1) same name, same players: the same pair meets again
+    for name, member_ids, welcome in desired:
+        hit = next((e for e in free if e[1] == name and set(e[2]) == set(member_ids)), None)
+        if hit is None:
+            pending.append((name, member_ids, welcome))
+            continue
+        free.remove(hit)
+        matched.append(Op(KEEP, name, member_ids, welcome, hit[0], hit[1], hit[2]))
+
+    # 2) same players under another name (a team was renamed or re-keyed)
+    missing = []
+    for name, member_ids, welcome in pending:
+        players = set(member_ids)
+        hit = next((e for e in free if players and set(e[2]) == players), None)
+        if hit is None:
+            missing.append((name, member_ids, welcome))
+            continue
+        free.remove(hit)
+        matched.append(Op(RENAME, name, member_ids, welcome, hit[0], hit[1], hit[2]))
+
+    archived = [Op(ARCHIVE, e[1], channel_id=e[0], old_name=e[1], old_member_ids=e[2]) for e in free]
+    created = [Op(CREATE, name, member_ids, welcome) for name, member_ids, welcome in missing]
+    return matched + archived + created
+
+
+def counts(ops) -> dict:
+    out = {kind: 0 for kind in _ICONS}
+    for op in ops:
+        out[op.kind] += 1
+    return out
+
+
+def format_plan(ops, member_name=str) -> str:
+    """Human-readable plan (the dry-run report); member_name(id) renders a player."""
+    def players(ids):
+        return ", ".join(member_name(mid) for mid in ids) or "no players"
+
+    c = counts(ops)
+    lines = [
+        "**Matchup channel plan:** "
+        + " · ".join(f"{_ICONS[kind]} {kind} {n}" for kind, n in c.items() if n)
+        + f" — {len(ops) - c[KEEP]} change(s)"
+    ]
+    for op in ops:
+        icon = _ICONS[op.kind]
+        if op.kind == KEEP:
+            lines.append(f"{icon} #{op.name} ({players(op.member_ids)})")
+        elif op.kind == RENAME:
+            lines.append(f"{icon} #{op.old_name} → #{op.name} ({players(op.member_ids)})")
+        elif op.kind == ARCHIVE:
+            lines.append(f"{icon} #{op.name} ({players(op.old_member_ids)})")
+        else:
+            lines.append(f"{icon} #{op.name} ({players(op.member_ids)})")
+    return "\n".join(lines)
@@ -1,6 +1,7 @@
 # pipeline.py
 async def handle_game_stream_post(bot, msg):
     import sys
+    import asyncio
     state = sys.modules["__main__"]
     from datetime import datetime
     import logging
@@ -24,7 +25,7 @@ async def handle_game_stream_post(bot, msg):
             return
 
         # ✅ Must have advance loaded (use LIVE state)
-        if not state._current_week or not state._current_matchups:
+        if not state.WEEK.week or not state.WEEK.matchups:
             logger.warning("No advance loaded yet.")
             return
 
@@ -44,8 +45,9 @@ async def handle_game_stream_post(bot, msg):
         home_id = state.TEAM_NAME_TO_ID.get(t1)
         away_id = state.TEAM_NAME_TO_ID.get(t2)
 
+        # HTTP fetch and image rendering block, so they run in a worker thread
         flyer_data = (
-            state.fetch_flyer_data(home_id, away_id)
+            await asyncio.to_thread(state.fetch_flyer_data, home_id, away_id)
             if home_id and away_id
             else None
         )
@@ -67,7 +69,8 @@ async def handle_game_stream_post(bot, msg):
 
         flyer_prompt = state.build_flyer_image_prompt(flyer_data) if (flyer_data and use_ai) else None
 
-        flyer_path, flyer_source = state.generate_flyer_with_fallback(
+        flyer_path, flyer_source = await asyncio.to_thread(
+            state.generate_flyer_with_fallback,
             week=week or 0,
             t1=t1,
             t2=t2,
@@ -1,10 +1,17 @@
 import os
 import json
+import time
 import logging
+import threading
 
 logger = logging.getLogger("discord_bot")
 
+# Snapshot (same key -> record JSON object as before) plus an append-only journal of
+# puts made since the snapshot. The journal is folded into the snapshot every
+# FLYER_REGISTRY_COMPACT_EVERY entries and on first load.
 FLYER_REGISTRY = os.getenv("FLYER_REGISTRY", "data/flyers.json")
+FLYER_REGISTRY_JOURNAL = os.getenv("FLYER_REGISTRY_JOURNAL", FLYER_REGISTRY + ".journal")
+FLYER_REGISTRY_COMPACT_EVERY = int(os.getenv("FLYER_REGISTRY_COMPACT_EVERY", "200") or 200)
 
 
 def sorted_pair(a: str, b: str) -> tuple[str, str]:
@@ -16,36 +23,162 @@ def flyer_key(season: int | str, week: int, team_a: str, team_b: str) -> str:
     return f"season:{season}:week:{week}:{a}:{b}"
 
 
-def _load_registry() -> dict:
+def _fsync_dir(path: str) -> None:
     try:
-        with open(FLYER_REGISTRY, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except Exception as e:
-        logger.warning(f"Failed to load flyer registry: {e}")
-        return {}
-
-
-def _save_registry(data: dict) -> None:
-    registry_dir = os.path.dirname(FLYER_REGISTRY)
-
-    if registry_dir:
-        os.makedirs(registry_dir, exist_ok=True)
-
-    tmp = FLYER_REGISTRY + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-    os.replace(tmp, FLYER_REGISTRY)
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FlyerRegistry:
+    """
+    Which (season, week, pair) flyers were already posted.
+
+    Loaded once (snapshot + journal replay) into memory, so has() is a dict lookup.
+    put() appends one JSON line to the journal and fsyncs it; compact() rewrites the
+    snapshot atomically and empties the journal. Replaying a journal entry that is
+    already in the snapshot is harmless, so a crash between the two steps loses nothing.
+    """
+
+    def __init__(self, path: str = FLYER_REGISTRY, journal_path: str = FLYER_REGISTRY_JOURNAL,
+                 compact_every: int = FLYER_REGISTRY_COMPACT_EVERY):
+        self.path = path
+        self.journal_path = journal_path
+        self.compact_every = max(1, compact_every)
+        self._lock = threading.Lock()
+        self._records = None     # key -> record, loaded on first use
+        self._journal = None     # open append handle
+        self._pending = 0        # journal entries since the last compaction
+
+    # ---------- loading ----------
+
+    def _load_snapshot(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Failed to load flyer registry: {e}")
+            return {}
+
+    def _replay_journal(self, records: dict) -> int:
+        """
+        Apply journal lines to `records`; returns the number of lines read.
+
+        Only an unreadable final line (a crash mid-append) is skipped. Any earlier
+        bad line stops the replay and the journal is moved aside to
+        journal_path + ".failed-<time>", so compacting afterwards never truncates it.
+        """
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+        for n, line in enumerate(lines, start=1):
+            try:
+                entry = json.loads(line)
+                key, record = entry["key"], entry.get("record", {})
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                if n == len(lines):
+                    # torn last line from a crash mid-append; everything before it counts
+                    logger.warning(f"Skipping torn last line of {self.journal_path}: {e}")
+                    break
+                aside = f"{self.journal_path}.failed-{int(time.time())}"
+                os.replace(self.journal_path, aside)
+                logger.error(
+                    f"Flyer registry journal line {n} is unreadable ({type(e).__name__}: {e}); "
+                    f"replay stopped, journal kept as {aside}"
+                )
+                break
+            records[key] = record
+        return len(lines)
+
+    def _ensure_loaded(self) -> None:
+        if self._records is not None:
+            return
+        records = self._load_snapshot()
+        replayed = self._replay_journal(records)
+        self._records = records
+        if replayed:
+            # fold it in now so new appends never follow a torn line
+            logger.info(f"Flyer registry: replayed {replayed} journal line(s) over {self.path}")
+            self._compact_locked()
+
+    # ---------- writes ----------
+
+    def _write_snapshot(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._records, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        _fsync_dir(self.path)
+
+    def _compact_locked(self) -> None:
+        self._write_snapshot()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        # the snapshot now holds every journaled put
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._pending = 0
+
+    def compact(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._compact_locked()
+
+    def put(self, key: str, record: dict) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            if self._records.get(key) == record:
+                return
+            if self._journal is None:
+                folder = os.path.dirname(self.journal_path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(json.dumps({"key": key, "record": record}, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._records[key] = record
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact_locked()
+
+    # ---------- reads ----------
+
+    def has(self, key: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return key in self._records
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._records)
+
+
+# Shared instance for the bot
+REGISTRY = FlyerRegistry()
 
 
 def registry_has(season: int | str, week: int, t1: str, t2: str) -> bool:
-    reg = _load_registry()
-    return flyer_key(season, week, t1, t2) in reg
+    return REGISTRY.has(flyer_key(season, week, t1, t2))
 
 
 def registry_put(season: int | str, week: int, t1: str, t2: str, record: dict) -> None:
-    reg = _load_registry()
-    reg[flyer_key(season, week, t1, t2)] = record
-    _save_registry(reg)
+    REGISTRY.put(flyer_key(season, week, t1, t2), record)
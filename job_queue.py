@@ -0,0 +1,114 @@
+# job_queue.py - delayed work that survives a restart
+#
+# A job is a row in the state store (type, JSON payload, due time, attempts) and is
+# run by the shared scheduler at its due time. replay() (on_ready) puts every
+# pending row back on the scheduler, so a restart or crash on the Pi only delays a
+# job. The idempotency key is unique forever (until pruned): enqueueing the same
+# key twice does nothing. A handler that raises is retried with exponential
+# backoff until its max_attempts are used up.
+import os
+import time
+import logging
+
+logger = logging.getLogger("discord_bot")
+
+JOB_RETRY_BASE_SEC = float(os.getenv("JOB_RETRY_BASE_SEC", "60") or 60)
+JOB_RETRY_MAX_SEC = float(os.getenv("JOB_RETRY_MAX_SEC", "1800") or 1800)
+JOB_KEEP_DAYS = float(os.getenv("JOB_KEEP_DAYS", "30") or 30)   # finished keys kept for idempotency
+
+
+class RetryJob(Exception):
+    """Raise from a handler to run the job again after the backoff (counts as an attempt)."""
+
+
+class _Handler:
+    __slots__ = ("fn", "max_attempts", "base", "cap")
+
+    def __init__(self, fn, max_attempts, base, cap):
+        self.fn = fn
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+
+
+class JobQueue:
+    """
+    Durable jobs on top of the StateStore `jobs` table and a Scheduler.
+
+    Handlers are `async def fn(payload: dict, attempt: int)` (attempt is 1-based);
+    they are registered per job type with @queue.handler("type", max_attempts=..., retry_base=..., retry_max=...).
+    Attempt n (1-based) that fails is retried after min(retry_base * 2**(n-1), retry_max).
+    """
+
+    def __init__(self, store, scheduler):
+        self._store = store
+        self._scheduler = scheduler
+        self._handlers = {}
+
+    def handler(self, job_type: str, max_attempts: int = 3,
+                retry_base: float = JOB_RETRY_BASE_SEC, retry_max: float = JOB_RETRY_MAX_SEC):
+        def register(fn):
+            self._handlers[job_type] = _Handler(fn, max(1, max_attempts), retry_base, retry_max)
+            return fn
+        return register
+
+    # ---------- enqueueing ----------
+
+    def enqueue(self, job_type: str, key: str, payload: dict | None = None, delay: float = 0) -> bool:
+        """Store and schedule a job; False if `key` was already used (the duplicate is dropped)."""
+        h = self._handlers[job_type]
+        due = time.time() + max(0.0, delay)
+        if not self._store.add_job(key, job_type, payload or {}, due, h.max_attempts):
+            logger.info(f"[JOBS] {key} already queued or done; not adding it again")
+            return False
+        self._schedule(key, job_type, due)
+        logger.info(f"[JOBS] queued {key} in {int(max(0.0, delay))}s")
+        return True
+
+    def pending(self, job_type: str | None = None) -> list[dict]:
+        return self._store.pending_jobs(job_type)
+
+    def _schedule(self, key: str, job_type: str, due: float) -> None:
+        self._scheduler.schedule(f"job:{key}", due, self._run, key, note=job_type)
+
+    def replay(self) -> int:
+        """Schedule every stored pending job (startup); returns how many."""
+        pruned = self._store.prune_jobs(JOB_KEEP_DAYS * 86400)
+        jobs = self._store.pending_jobs()
+        for job in jobs:
+            self._schedule(job["key"], job["type"], job["due"])
+        if jobs or pruned:
+            logger.info(f"[JOBS] replayed {len(jobs)} pending job(s), pruned {pruned} finished")
+        return len(jobs)
+
+    # ---------- running ----------
+
+    async def _run(self, key: str) -> None:
+        job = self._store.job(key)
+        if job is None or job["status"] != "pending":
+            return
+        h = self._handlers.get(job["type"])
+        if h is None:
+            logger.warning(f"[JOBS] no handler for {job['type']} ({key}); leaving it pending")
+            return
+
+        attempt = job["attempts"] + 1
+        # count the attempt before running, so a crash mid-run still uses it up
+        self._store.update_job(key, "pending", attempt)
+        try:
+            await h.fn(job["payload"], attempt)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}" if not isinstance(e, RetryJob) else (str(e) or "retry")
+            if attempt >= min(h.max_attempts, job["max_attempts"]):
+                self._store.update_job(key, "failed", attempt, last_error=error)
+                logger.warning(f"[JOBS] {key} gave up after {attempt} attempt(s): {error}")
+                return
+            delay = min(h.base * 2 ** (attempt - 1), h.cap)
+            due = time.time() + delay
+            self._store.update_job(key, "pending", attempt, due=due, last_error=error)
+            self._schedule(key, job["type"], due)
+            logger.info(f"[JOBS] {key} attempt {attempt} not done ({error}); retrying in {int(delay)}s")
+            return
+
+        self._store.update_job(key, "done", attempt)
+        logger.info(f"[JOBS] {key} done (attempt {attempt})")
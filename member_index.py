@@ -0,0 +1,113 @@
+# member_index.py - who plays which team, kept current from gateway events
+#
+# Built once from guild.members (on_ready) and then updated one member at a time from
+# on_member_join / on_member_update / on_user_update / on_member_remove, so lookups in
+# either direction never rescan the guild.
+import logging
+
+from team_names import TEAMS
+
+logger = logging.getLogger("discord_bot")
+
+
+class MemberTeamIndex:
+    """
+    member id -> TEAM (ALL CAPS) and TEAM -> members, from display names.
+
+    A team claimed by more than one member is a conflict: every claimant is kept
+    (in the order they were indexed) and conflicts() reports them.
+    Bots are never indexed.
+    """
+
+    def __init__(self, resolver=TEAMS):
+        self.resolver = resolver
+        self.ready = False
+        self._members = {}   # member id -> member object (latest seen)
+        self._team_of = {}   # member id -> TEAM
+        self._by_team = {}   # TEAM -> {member id: None} (insertion ordered)
+
+    # ---------- updates ----------
+
+    def rebuild(self, members) -> None:
+        self._members.clear()
+        self._team_of.clear()
+        self._by_team.clear()
+        for m in members:
+            self.upsert(m)
+        self.ready = True
+        logger.info(
+            f"Member index built: {len(self._team_of)} member(s) on {len(self._by_team)} team(s), "
+            f"{len(self.conflicts())} conflict(s)"
+        )
+
+    def upsert(self, member) -> str | None:
+        """Index (or re-index) one member; returns their team, if any."""
+        if member is None or getattr(member, "bot", False):
+            return None
+        mid = member.id
+        team = self.resolver.team_from_nick(member.display_name or member.name or "")
+        old = self._team_of.get(mid)
+
+        self._members[mid] = member
+        if old == team:
+            return team
+
+        if old is not None:
+            claimants = self._by_team.get(old, {})
+            claimants.pop(mid, None)
+            if not claimants:
+                self._by_team.pop(old, None)
+        if team is None:
+            self._team_of.pop(mid, None)
+        else:
+            self._team_of[mid] = team
+            self._by_team.setdefault(team, {})[mid] = None
+            if len(self._by_team[team]) > 1:
+                logger.warning(f"Team conflict: {team} claimed by {len(self._by_team[team])} members")
+        return team
+
+    def remove(self, member_or_id) -> None:
+        mid = getattr(member_or_id, "id", member_or_id)
+        self._members.pop(mid, None)
+        team = self._team_of.pop(mid, None)
+        if team is not None:
+            claimants = self._by_team.get(team, {})
+            claimants.pop(mid, None)
+            if not claimants:
+                self._by_team.pop(team, None)
+
+    # ---------- lookups ----------
+
+    def team_of(self, member_or_id) -> str | None:
+        return self._team_of.get(getattr(member_or_id, "id", member_or_id))
+
+    def members_for(self, team: str) -> list:
+        """Every member claiming TEAM (case-insensitive), earliest indexed first."""
+        ids = self._by_team.get((team or "").upper(), {})
+        return [self._members[mid] for mid in ids]
+
+    def member_for(self, team: str):
+        """The member playing TEAM (the earliest claimant if there is a conflict), or None."""
+        ids = self._by_team.get((team or "").upper())
+        return self._members[next(iter(ids))] if ids else None
+
+    def team_to_member(self) -> dict:
+        return {team: self._members[next(iter(ids))] for team, ids in self._by_team.items()}
+
+    def teams(self) -> set:
+        return set(self._by_team)
+
+    def claims(self) -> dict:
+        """TEAM -> [members]."""
+        return {team: [self._members[mid] for mid in ids] for team, ids in self._by_team.items()}
+
+    def conflicts(self) -> dict:
+        return {team: members for team, members in self.claims().items() if len(members) > 1}
+
+    def unmatched_members(self) -> list:
+        """Indexed (non-bot) members whose name does not start with a team."""
+        return [m for mid, m in self._members.items() if mid not in self._team_of]
+
+
+# Shared instance for the bot
+MEMBER_INDEX = MemberTeamIndex()
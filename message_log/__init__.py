@@ -0,0 +1 @@
+# Empty file (just makes it a package)
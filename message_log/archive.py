@@ -0,0 +1,333 @@
+# archive.py - persistent, indexed copy of every message the bot sees
+import os
+import re
+import math
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger("discord_bot")
+
+MESSAGE_ARCHIVE_DB = os.getenv("MESSAGE_ARCHIVE_DB", "data/messages.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id          INTEGER PRIMARY KEY,
+    discord_id  INTEGER UNIQUE,
+    ts          REAL NOT NULL,
+    forum       TEXT NOT NULL,
+    channel_id  INTEGER,
+    user_id     TEXT NOT NULL,
+    username    TEXT NOT NULL,
+    content     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(ts);
+CREATE INDEX IF NOT EXISTS idx_messages_forum_ts ON messages(forum, ts);
+CREATE INDEX IF NOT EXISTS idx_messages_user_ts ON messages(user_id, ts);
+
+-- Small lookup tables so name matching never scans the message table.
+CREATE TABLE IF NOT EXISTS forums (
+    name     TEXT PRIMARY KEY,
+    last_ts  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id   TEXT NOT NULL,
+    username  TEXT NOT NULL,
+    last_ts   REAL NOT NULL,
+    PRIMARY KEY (user_id, username)
+);
+
+-- Inverted index for !logs search: one posting per (term, message)
+CREATE TABLE IF NOT EXISTS terms (
+    term    TEXT NOT NULL,
+    msg_id  INTEGER NOT NULL,
+    tf      INTEGER NOT NULL,
+    PRIMARY KEY (term, msg_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Casefolded word tokens; single characters are not indexed."""
+    return [t for t in _TOKEN_RE.findall((text or "").casefold()) if len(t) > 1]
+
+
+_COLUMNS = "ts, forum, channel_id, user_id, username, content"
+
+
+class MessageArchive:
+    """
+    SQLite archive behind !logs.
+
+    Rows are keyed by epoch seconds (UTC) and indexed by time, forum and user,
+    so a query only touches the rows it returns. Entries come back in the same
+    dict shape the bot.log parser produces: dt, forum, username, user_id, message.
+    """
+
+    def __init__(self, path: str = MESSAGE_ARCHIVE_DB, tz=None):
+        if path != ":memory:":
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+        self.path = path
+        self.tz = tz
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._index_backlog()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---------- writes ----------
+
+    def _insert(self, ts, forum, user_id, username, content, channel_id=None, discord_id=None) -> None:
+        forum = forum or "Unknown"
+        user_id = str(user_id or "")
+        username = username or ""
+        cur = self._conn.execute(
+            f"INSERT OR IGNORE INTO messages (discord_id, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (discord_id, ts, forum, channel_id, user_id, username, content or ""),
+        )
+        if cur.rowcount:
+            self._index_terms(cur.lastrowid, content)
+            self._set_meta("indexed_through", cur.lastrowid)
+        self._conn.execute(
+            "INSERT INTO forums (name, last_ts) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET last_ts = MAX(last_ts, excluded.last_ts)",
+            (forum, ts),
+        )
+        self._conn.execute(
+            "INSERT INTO users (user_id, username, last_ts) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id, username) DO UPDATE SET last_ts = MAX(last_ts, excluded.last_ts)",
+            (user_id, username, ts),
+        )
+
+    def _index_terms(self, msg_id: int, content: str) -> None:
+        counts = {}
+        for term in tokenize(content):
+            counts[term] = counts.get(term, 0) + 1
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO terms (term, msg_id, tf) VALUES (?, ?, ?)",
+            [(term, msg_id, tf) for term, tf in counts.items()],
+        )
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _index_backlog(self) -> None:
+        """Index rows written before the search index existed (one-time catch-up)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'indexed_through'").fetchone()
+            done = int(row["value"]) if row else 0
+            rows = self._conn.execute(
+                "SELECT id, content FROM messages WHERE id > ? ORDER BY id", (done,)
+            ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                self._index_terms(r["id"], r["content"])
+            self._set_meta("indexed_through", rows[-1]["id"])
+            self._conn.commit()
+        logger.info(f"Message archive: indexed {len(rows)} message(s) for search")
+
+    def add(self, ts: float, forum: str, user_id, username: str, content: str,
+            channel_id: int | None = None, discord_id: int | None = None) -> None:
+        with self._lock:
+            self._insert(ts, forum, user_id, username, content, channel_id, discord_id)
+            self._conn.commit()
+
+    def add_entries(self, entries) -> int:
+        """Bulk import parsed bot.log entries (dicts with dt/forum/username/user_id/message)."""
+        count = 0
+        with self._lock:
+            for e in entries:
+                dt = e.get("dt")
+                if not dt:
+                    continue
+                self._insert(
+                    dt.timestamp(),
+                    e.get("forum"),
+                    e.get("user_id"),
+                    e.get("username"),
+                    e.get("message"),
+                    e.get("channel_id"),
+                    e.get("discord_id"),
+                )
+                count += 1
+            self._conn.commit()
+        return count
+
+    # ---------- reads ----------
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM messages LIMIT 1").fetchone() is None
+
+    def _entry(self, row) -> dict:
+        return {
+            "dt": datetime.fromtimestamp(row["ts"], self.tz),
+            "forum": row["forum"],
+            "channel_id": row["channel_id"],
+            "username": row["username"],
+            "user_id": row["user_id"],
+            "message": row["content"],
+        }
+
+    def _select(self, where: str, params: tuple, limit: int | None) -> list[dict]:
+        # Newest-first with LIMIT so the index walk stops after `limit` rows,
+        # then flip back to chronological order for rendering.
+        sql = f"SELECT {_COLUMNS} FROM messages WHERE {where} ORDER BY ts DESC"
+        if limit and limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._entry(r) for r in reversed(rows)]
+
+    def forum_names(self, since: float) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM forums WHERE last_ts >= ?", (since,)
+            ).fetchall()
+        return [r["name"] for r in rows]
+
+    def forum_messages(self, forum: str, since: float, until: float | None = None,
+                       limit: int | None = None) -> list[dict]:
+        until = float("inf") if until is None else until
+        return self._select("forum = ? AND ts >= ? AND ts < ?", (forum, since, until), limit)
+
+    def match_user_ids(self, query: str, since: float) -> list[str]:
+        """User ids whose username contains `query` (case-insensitive) or whose id equals it."""
+        q = (query or "").strip().lower()
+        if not q:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT user_id FROM users "
+                "WHERE last_ts >= ? AND (instr(lower(username), ?) > 0 OR lower(user_id) = ?)",
+                (since, q, q),
+            ).fetchall()
+        return [r["user_id"] for r in rows]
+
+    def user_messages(self, user_ids: list[str], since: float, until: float | None = None,
+                      limit: int | None = None) -> list[dict]:
+        if not user_ids:
+            return []
+        until = float("inf") if until is None else until
+        marks = ",".join("?" for _ in user_ids)
+        return self._select(
+            f"user_id IN ({marks}) AND ts >= ? AND ts < ?",
+            (*user_ids, since, until),
+            limit,
+        )
+
+    def messages_between(self, since: float, until: float) -> list[dict]:
+        return self._select("ts >= ? AND ts < ?", (since, until), None)
+
+    def search(self, terms: list[str], phrases: list[list[str]], since: float,
+               until: float | None = None, limit: int | None = None) -> list[dict]:
+        """
+        Ranked full-text search.
+
+        terms:   single words; a message with any of them matches.
+        phrases: token lists; a message with any of them, in order, matches too,
+                 and ranks above loose-word hits.
+        Scores are tf-idf over the postings table, so the work done is
+        proportional to how many messages contain the query words.
+        """
+        until = float("inf") if until is None else until
+        words = set(terms)
+        for ph in phrases:
+            words.update(ph)
+        if not words:
+            return []
+
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) AS n FROM messages").fetchone()
+            total = max(1, row["n"] or 0)
+
+            postings = {}   # term -> {msg_id: tf}
+            for w in words:
+                rows = self._conn.execute(
+                    "SELECT t.msg_id, t.tf FROM terms t JOIN messages m ON m.id = t.msg_id "
+                    "WHERE t.term = ? AND m.ts >= ? AND m.ts < ?",
+                    (w, since, until),
+                ).fetchall()
+                postings[w] = {r["msg_id"]: r["tf"] for r in rows}
+            df = {
+                w: self._conn.execute("SELECT COUNT(*) AS c FROM terms WHERE term = ?", (w,)).fetchone()["c"]
+                for w in words
+            }
+
+        # Candidates: any loose term, or every word of some phrase (checked in order below)
+        term_hits = set()
+        for w in terms:
+            term_hits |= set(postings[w])
+        candidates = set(term_hits)
+        for ph in phrases:
+            ids = set(postings[ph[0]])
+            for w in ph[1:]:
+                ids &= set(postings[w])
+            candidates |= ids
+        if not candidates:
+            return []
+
+        def weight(w, msg_id):
+            tf = postings[w].get(msg_id)
+            if not tf:
+                return 0.0
+            return (1 + math.log(tf)) * math.log(1 + total / max(1, df[w]))
+
+        scored = {msg_id: sum(weight(w, msg_id) for w in words) for msg_id in candidates}
+
+        # Phrase check needs the text itself: load candidates, best first
+        ranked_ids = sorted(scored, key=lambda i: scored[i], reverse=True)
+        results = []
+        with self._lock:
+            for start in range(0, len(ranked_ids), 500):
+                batch = ranked_ids[start:start + 500]
+                marks = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT id, {_COLUMNS} FROM messages WHERE id IN ({marks})", batch
+                ).fetchall()
+                by_id = {r["id"]: r for r in rows}
+                for msg_id in batch:
+                    r = by_id.get(msg_id)
+                    if r is None:
+                        continue
+                    score = scored[msg_id]
+                    if phrases:
+                        text = " " + " ".join(tokenize(r["content"])) + " "
+                        if any(f" {' '.join(ph)} " in text for ph in phrases):
+                            score *= 2  # phrase as written
+                        elif msg_id not in term_hits:
+                            continue
+                    entry = self._entry(r)
+                    entry["score"] = score
+                    results.append(entry)
+                    if limit and limit > 0 and len(results) >= limit:
+                        break
+                if limit and limit > 0 and len(results) >= limit:
+                    break
+
+        results.sort(key=lambda e: (-e["score"], -e["dt"].timestamp()))
+        return results
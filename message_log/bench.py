@@ -0,0 +1,355 @@
+# bench.py - synthetic-load benchmark for the !logs reader pipeline
+#
+# Generates a rotated messages.jsonl set of a given size, runs every stage
+# !logs goes through (read -> decode -> group -> archive import -> render),
+# and writes a JSON report with timings and peak memory per stage.
+#
+#   python -m message_log.bench                       # 1 MB and 10 MB
+#   python -m message_log.bench --sizes 1,10,100 --out bench_report.json
+#   python -m message_log.bench --compare old_report.json --tolerance 0.25
+#
+# With --compare the exit code is 1 if any stage got slower than the
+# baseline by more than the tolerance, so it can gate a deploy to the Pi.
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+from datetime import datetime
+
+import pytz
+
+from message_log.archive import MessageArchive
+from message_log.sink import MESSAGE_LOG_MAX_BYTES
+from message_log import reader
+
+MB = 1024 * 1024
+
+TEAMS = [
+    "bills", "dolphins", "patriots", "jets", "ravens", "bengals", "browns", "steelers",
+    "texans", "colts", "jaguars", "titans", "broncos", "chiefs", "raiders", "chargers",
+    "cowboys", "giants", "eagles", "commanders", "bears", "lions", "packers", "vikings",
+    "falcons", "panthers", "saints", "buccaneers", "cardinals", "rams", "49ers", "seahawks",
+]
+EXTRA_CHANNELS = ["lobby-talk", "general", "rules-disputes", "stream-links", "Direct Message"]
+WORDS = (
+    "gg rematch disconnect quit lag stream ready advance sim schedule play tonight "
+    "wk week game score won lost close overtime fourth down punt blitz zone cover "
+    "trade draft rookie contract cap injury boss commish rule dispute fair cheese "
+    "lol nah yeah bet ok cool good luck have fun next time"
+).split()
+NOISE_LINES = [
+    "Traceback (most recent call last):",
+    '  File "time_madden_old.py", line 1234, in on_message',
+    "nextcord.errors.HTTPException: 503 Service Unavailable",
+    "",
+]
+
+
+# ---------- synthetic log set ----------
+
+def _random_content(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.choice((1, 1, 1, 1, 2, 2, 3, 4))):
+        words = rng.choices(WORDS, k=rng.randint(2, 18))
+        if rng.random() < 0.05:
+            words.append("https://twitch.tv/" + "".join(rng.choices(string.ascii_lowercase, k=8)))
+        if rng.random() < 0.03:
+            words.append("🏈🔥")
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def generate_log_set(folder: str, size_mb: float, days: int, forums: int, users: int,
+                     rotate_mb: float, seed: int) -> dict:
+    """
+    Write messages.jsonl, messages.jsonl.1, ... into `folder` (newest file has no suffix,
+    like RotatingFileHandler). Records are spread evenly over the last `days` days and
+    file mtimes match their last record, so the reader's cutoff logic behaves as in production.
+    About 0.2% of lines are non-JSON noise or truncated records.
+    """
+    rng = random.Random(seed)
+    matchups = [f"{a}-{b}" for i, a in enumerate(TEAMS) for b in TEAMS[i + 1:]]
+    channels = rng.sample(matchups, min(len(matchups), max(1, forums - len(EXTRA_CHANNELS)))) + EXTRA_CHANNELS
+    people = [(str(10**17 + i), f"{rng.choice(TEAMS).title()} {rng.choice(WORDS).title()}{i}") for i in range(users)]
+
+    def record(ts: float, n: int) -> str:
+        user_id, username = rng.choice(people)
+        ch = rng.randrange(len(channels))
+        return json.dumps({
+            "ts": round(ts, 3),
+            "channel_id": 900000 + ch,
+            "channel": channels[ch],
+            "user_id": user_id,
+            "username": username,
+            "content": _random_content(rng),
+            "message_id": 10**18 + n,
+        }, ensure_ascii=False)
+
+    target = int(size_mb * MB)
+    rotate = max(1, int(rotate_mb * MB))
+    # Space timestamps so the set covers the whole window
+    avg_line = statistics.mean(len(record(0.0, 0).encode("utf-8")) + 1 for _ in range(200))
+    expected = max(1, int(target / avg_line))
+    now = time.time()
+    start = now - days * 86400
+    step = (now - start) / expected
+
+    chunks = []   # (path, last_ts), oldest first
+    written = 0
+    records = 0
+    ts = start
+    f = None
+    file_bytes = 0
+    last_ts = ts
+    while written < target:
+        if f is None or file_bytes >= rotate:
+            if f is not None:
+                f.close()
+                chunks[-1] = (chunks[-1][0], last_ts)
+            path = os.path.join(folder, f"part{len(chunks):04d}.jsonl")
+            f = open(path, "w", encoding="utf-8")
+            chunks.append((path, ts))
+            file_bytes = 0
+
+        ts = min(now - 1, ts + step * rng.uniform(0.2, 1.8))
+        if rng.random() < 0.002:
+            line = rng.choice(NOISE_LINES)
+            if rng.random() < 0.5:
+                line = f'{{"ts": {ts:.3f}, "channel_id": 1, "chan'   # torn write
+        else:
+            line = record(ts, records)
+            records += 1
+        data = line + "\n"
+        f.write(data)
+        n = len(data.encode("utf-8"))
+        file_bytes += n
+        written += n
+        last_ts = ts
+    f.close()
+    chunks[-1] = (chunks[-1][0], last_ts)
+
+    # Rename to rotation order: newest -> messages.jsonl, then .1, .2, ...
+    base = os.path.join(folder, "messages.jsonl")
+    for age, (path, mtime) in enumerate(reversed(chunks)):
+        final = base if age == 0 else f"{base}.{age}"
+        os.replace(path, final)
+        os.utime(final, (mtime, mtime))
+
+    return {
+        "bytes": written,
+        "files": len(chunks),
+        "records": records,
+        "forums": len(channels),
+        "users": len(people),
+        "pattern": base + "*",
+        "channels": channels,
+        "people": people,
+    }
+
+
+# ---------- pipeline stages ----------
+
+def _stages(log_set: dict, days: int, db_path: str):
+    """Ordered (name, fn(ctx) -> rows or rendered chars) pairs mirroring what !logs does."""
+    tz_az = pytz.timezone("US/Arizona")
+    busiest_forum = log_set["channels"][0]
+    some_user = log_set["people"][0][1].split()[0]
+    yesterday = datetime.fromtimestamp(time.time() - 86400, tz_az).strftime("%Y-%m-%d")
+
+    def read_lines(ctx):
+        ctx["lines"] = reader.read_recent_log_lines(days, pattern=log_set["pattern"])
+        return len(ctx["lines"])
+
+    def decode(ctx):
+        ctx["entries"] = list(reader.iter_log_entries(ctx["lines"]))
+        return len(ctx["entries"])
+
+    def group(ctx):
+        grouped = reader.group_entries(ctx["entries"])
+        return sum(len(v) for forums in grouped.values() for v in forums.values())
+
+    def archive_import(ctx):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        ctx["archive"] = MessageArchive(db_path, tz=tz_az)
+        return ctx["archive"].add_entries(ctx["entries"])
+
+    def render_day(ctx):
+        return len(reader.render_day_all_forums(ctx["archive"], yesterday))
+
+    def render_forum_100(ctx):
+        return len(reader.render_forum(ctx["archive"], busiest_forum, limit=100))
+
+    def render_forum_1000(ctx):
+        entries = []
+        ctx["body"] = reader.render_forum(ctx["archive"], busiest_forum, limit=1000, entries_out=entries)
+        ctx["forum_entries"] = entries
+        return len(ctx["body"])
+
+    def render_user(ctx):
+        return len(reader.render_user(ctx["archive"], some_user, limit=100))
+
+    def render_search(ctx):
+        return len(reader.render_search(ctx["archive"], "disconnect rematch 'good luck'", limit=100))
+
+    def file_payload(ctx):
+        return len(reader.render_file_payload("bench", ctx["body"], ctx["forum_entries"], "jsonl.gz"))
+
+    return [
+        ("read_lines", read_lines),
+        ("decode", decode),
+        ("group", group),
+        ("archive_import", archive_import),
+        ("render_day", render_day),
+        ("render_forum_100", render_forum_100),
+        ("render_forum_1000", render_forum_1000),
+        ("render_user", render_user),
+        ("render_search", render_search),
+        ("file_payload_jsonl_gz", file_payload),
+    ]
+
+
+def _close(ctx):
+    archive = ctx.get("archive")
+    if archive is not None:
+        archive.close()
+
+
+def run_size(size_mb: float, args, folder: str) -> dict:
+    log_set = generate_log_set(folder, size_mb, args.days, args.forums, args.users, args.rotate_mb, args.seed)
+    stages = _stages(log_set, args.days, os.path.join(folder, "bench.db"))
+    times = {name: [] for name, _ in stages}
+    items = {}
+
+    # Timing passes (no tracing overhead)
+    for _ in range(args.repeat):
+        ctx = {}
+        for name, fn in stages:
+            t0 = time.perf_counter()
+            items[name] = fn(ctx)
+            times[name].append(time.perf_counter() - t0)
+        _close(ctx)
+
+    # One traced pass for peak memory per stage
+    peaks = {}
+    ctx = {}
+    tracemalloc.start()
+    try:
+        for name, fn in stages:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[name] = max(0, peak - base)
+    finally:
+        tracemalloc.stop()
+        _close(ctx)
+
+    report = {
+        "size_mb": size_mb,
+        "bytes": log_set["bytes"],
+        "files": log_set["files"],
+        "records": log_set["records"],
+        "forums": log_set["forums"],
+        "users": log_set["users"],
+        "stages": {},
+    }
+    for name, _ in stages:
+        report["stages"][name] = {
+            "seconds_median": round(statistics.median(times[name]), 6),
+            "seconds_best": round(min(times[name]), 6),
+            "peak_mb": round(peaks[name] / MB, 3),
+            "items": items[name],
+        }
+    return report
+
+
+# ---------- report / compare ----------
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions: stages whose median time grew past the tolerance."""
+    base_runs = {r["size_mb"]: r for r in baseline.get("runs", [])}
+    problems = []
+    for run in report["runs"]:
+        old = base_runs.get(run["size_mb"])
+        if not old:
+            continue
+        for name, cur in run["stages"].items():
+            prev = old["stages"].get(name)
+            if not prev or prev["seconds_median"] <= 0:
+                continue
+            ratio = cur["seconds_median"] / prev["seconds_median"]
+            if ratio > 1 + tolerance:
+                problems.append(
+                    f"{run['size_mb']} MB {name}: {prev['seconds_median']:.4f}s -> "
+                    f"{cur['seconds_median']:.4f}s (x{ratio:.2f})"
+                )
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the !logs reader pipeline on synthetic message logs.")
+    parser.add_argument("--sizes", default="1,10", help="comma-separated log set sizes in MB (default: 1,10)")
+    parser.add_argument("--days", type=int, default=reader.DEFAULT_LOG_LOOKBACK_DAYS, help="days the log set spans")
+    parser.add_argument("--forums", type=int, default=40, help="number of channels")
+    parser.add_argument("--users", type=int, default=120, help="number of distinct users")
+    parser.add_argument("--rotate-mb", type=float, default=MESSAGE_LOG_MAX_BYTES / MB, help="size of each rotated file")
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes per size (median is reported)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", default="bench_report.json", help="where to write the JSON report")
+    parser.add_argument("--keep", help="generate into this folder and leave it there")
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "generated_at": datetime.now(pytz.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "keep")},
+        "runs": [],
+    }
+
+    for size in sizes:
+        if args.keep:
+            folder = os.path.join(args.keep, f"{size:g}mb")
+            os.makedirs(folder, exist_ok=True)
+            run = run_size(size, args, folder)
+        else:
+            with tempfile.TemporaryDirectory(prefix="logs-bench-") as folder:
+                run = run_size(size, args, folder)
+        report["runs"].append(run)
+
+        print(f"\n{size:g} MB — {run['records']} records in {run['files']} file(s)")
+        for name, st in run["stages"].items():
+            print(f"  {name:<22} {st['seconds_median'] * 1000:9.1f} ms   peak {st['peak_mb']:8.2f} MB   items {st['items']}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for p in problems:
+                print("  " + p)
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} vs {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# log_queue.py - move a logger's handlers behind a queue so logging never blocks the event loop
+#
+# The logger keeps a single QueueHandler; a QueueListener thread owns the real
+# handlers (stdout, bot.log, messages.jsonl) and does the slow writes.
+import os
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000") or 10000)
+# drop_oldest: keep the newest records (default) | drop_new: keep the backlog | block: wait up to LOG_QUEUE_BLOCK_SEC
+# (a block_timeout of None waits as long as it takes, i.e. never drops)
+LOG_QUEUE_OVERFLOW = os.getenv("LOG_QUEUE_OVERFLOW", "drop_oldest").strip().lower()
+LOG_QUEUE_BLOCK_SEC = float(os.getenv("LOG_QUEUE_BLOCK_SEC", "1.0") or 1.0)
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue with an overflow policy.
+    Dropped records are counted, and a warning with the count is queued as soon
+    as there is room again, so gaps in bot.log are visible.
+    """
+
+    def __init__(self, q: queue.Queue, overflow: str = LOG_QUEUE_OVERFLOW,
+                 block_timeout: float | None = LOG_QUEUE_BLOCK_SEC):
+        super().__init__(q)
+        self.overflow = overflow if overflow in OVERFLOW_POLICIES else "drop_oldest"
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._unreported = 0
+
+    def _put(self, record) -> bool:
+        if self.overflow == "block":
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                return False
+        if self.overflow == "drop_oldest":
+            while True:
+                try:
+                    self.queue.put_nowait(record)
+                    return True
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self._count_drop()
+                    except queue.Empty:
+                        pass
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            return False
+
+    def _count_drop(self) -> None:
+        self.dropped += 1
+        self._unreported += 1
+
+    def enqueue(self, record) -> None:
+        if not self._put(record):
+            self._count_drop()
+            return
+        if self._unreported:
+            n, self._unreported = self._unreported, 0
+            note = logging.LogRecord(
+                record.name, logging.WARNING, __file__, 0,
+                f"Log queue overflow ({self.overflow}): {n} record(s) dropped", None, None,
+            )
+            try:
+                self.queue.put_nowait(note)
+            except queue.Full:
+                self._unreported += n
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # the stock put_nowait raises queue.Full on a full bounded queue; wait for room
+        # instead (the thread is draining it) unless the thread is already gone
+        while self._thread is not None and self._thread.is_alive():
+            try:
+                self.queue.put(self._sentinel, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+
+def install_queue_logging(logger: logging.Logger, maxsize: int = LOG_QUEUE_SIZE,
+                          overflow: str = LOG_QUEUE_OVERFLOW,
+                          block_timeout: float | None = LOG_QUEUE_BLOCK_SEC) -> QueueListener | None:
+    """
+    Swap the logger's handlers for a BoundedQueueHandler and start a listener
+    thread that feeds them. Safe to call twice (second call is a no-op).
+    """
+    if any(isinstance(h, BoundedQueueHandler) for h in logger.handlers):
+        return None
+    handlers = list(logger.handlers)
+    if not handlers:
+        return None
+
+    q = queue.Queue(maxsize=max(1, maxsize))
+    listener = _Listener(q, *handlers, respect_handler_level=True)
+    queue_handler = BoundedQueueHandler(q, overflow, block_timeout)
+    for h in handlers:
+        logger.removeHandler(h)
+    logger.addHandler(queue_handler)
+    listener.start()
+
+    with _listeners_lock:
+        _listeners.append((logger, queue_handler, listener))
+    return listener
+
+
+def stop_queue_logging() -> None:
+    """
+    Hand each logger its real handlers back and drain its queue. Runs at exit; safe to call again.
+
+    The QueueHandler is detached first, so anything logged during shutdown is written
+    directly instead of into a queue nobody reads. The listener then writes out the
+    backlog and its thread is joined before the handlers are flushed; they stay
+    attached and logging.shutdown() closes them last.
+    """
+    with _listeners_lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for logger, queue_handler, listener in listeners:
+        logger.removeHandler(queue_handler)
+        for h in listener.handlers:
+            logger.addHandler(h)
+        try:
+            listener.stop()  # waits for room for the sentinel, processes the backlog, joins the thread
+        except Exception:
+            pass
+        for h in listener.handlers:
+            try:
+                h.flush()
+            except Exception:
+                pass
+
+
+atexit.register(stop_queue_logging)
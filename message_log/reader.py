@@ -0,0 +1,553 @@
+# reader.py - read, query and render the message log for !logs
+#
+# Kept free of Discord/bot imports so the pipeline can be exercised on its own
+# (see message_log/bench.py).
+import os
+import re
+import json
+import time
+import glob
+import gzip
+import io
+from collections import defaultdict, OrderedDict
+from datetime import datetime, timedelta
+
+import pytz
+
+from message_log.archive import MessageArchive, tokenize as archive_tokenize
+from message_log.sink import MESSAGE_LOG_GLOB
+
+LOG_BACKUP_GLOB = MESSAGE_LOG_GLOB  # we'll read messages.jsonl, messages.jsonl.1, ... (in modified-time order)
+LEGACY_LOG_GLOB = os.getenv("LEGACY_LOG_GLOB", "bot.log*")  # pre-JSONL history, only read to seed the archive
+LOG_READ_BLOCK_SIZE = 64 * 1024    # bytes per backwards read
+
+DEFAULT_LOG_LOOKBACK_DAYS = int(os.getenv("LOG_LOOKBACK_DAYS", "14"))
+DEFAULT_FORUM_LIMIT = int(os.getenv("LOGS_FORUM_DEFAULT_LIMIT", "100"))
+
+# The structured sink (message_log/sink.py) writes one JSON object per line:
+# {"ts": 1727142720.0, "channel_id": 123, "channel": "lobby-talk", "user_id": "456",
+#  "username": "Foo", "content": "text...", "message_id": 789}
+# "ts" always leads, so the reader can check a line's age without decoding it.
+_LINE_TS_RE = re.compile(r'^\{"ts":\s*(-?[0-9.]+)')
+
+def iter_log_entries(lines: list[str]):
+    """Yield dicts with datetime, forum, username, user_id, message. Corrupt lines are skipped."""
+    tz_az = pytz.timezone('US/Arizona')
+
+    for line in lines:
+        try:
+            rec = json.loads(line)
+            dt = datetime.fromtimestamp(float(rec["ts"]), tz_az)
+        except (ValueError, KeyError, TypeError):
+            continue
+        yield {
+            "dt": dt,
+            "forum": rec.get("channel") or "Unknown",
+            "channel_id": rec.get("channel_id"),
+            "username": rec.get("username") or "",
+            "user_id": str(rec.get("user_id") or ""),
+            "message": rec.get("content") or "",
+            "discord_id": rec.get("message_id"),
+        }
+
+def _json_line_ts(line: str) -> float | None:
+    m = _LINE_TS_RE.match(line)
+    return float(m.group(1)) if m else None
+
+# Legacy bot.log entries (everything logged before messages.jsonl existed):
+# Phoenix Time: 09-23-25 06:52 PM
+# Channel: lobby-talk (or "Direct Message")
+# Username: Foo | ID: 123
+# User Message: text...
+#
+# We detect entries by the "Phoenix Time:" line and collect the following 3 lines.
+PT_LINE = "Phoenix Time:"
+CH_LINE = "Channel:"
+UN_LINE = "Username:"
+UM_LINE = "User Message:"
+
+def _parse_phoenix_stamp(line: str, tz_az) -> datetime | None:
+    """'Phoenix Time: 09-23-25 06:52 PM' -> aware AZ datetime (None if unparseable)."""
+    try:
+        stamp = line.split(":", 1)[1].strip()
+        return tz_az.localize(datetime.strptime(stamp, "%m-%d-%y %I:%M %p"))
+    except Exception:
+        return None
+
+def _legacy_line_ts(line: str) -> float | None:
+    if not line.startswith(PT_LINE):
+        return None
+    dt = _parse_phoenix_stamp(line, pytz.timezone('US/Arizona'))
+    return dt.timestamp() if dt else None
+
+def iter_legacy_log_entries(lines: list[str]):
+    """Yield the same dicts as iter_log_entries from legacy bot.log lines. Tolerant to missing parts."""
+    entry = {}
+    expect_block = False
+    tz_az = pytz.timezone('US/Arizona')
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if line.startswith(PT_LINE):
+            # Start new entry
+            entry = {"dt": _parse_phoenix_stamp(line, tz_az), "forum": "Unknown", "username": "", "user_id": ""}
+            expect_block = True
+
+        elif expect_block and line.startswith(CH_LINE):
+            entry["forum"] = line.split(":", 1)[1].strip()
+
+        elif expect_block and line.startswith(UN_LINE):
+            # "Username: Name | ID: 123"
+            payload = line.split(":", 1)[1].strip()
+            if " | ID:" in payload:
+                uname, uid = payload.split(" | ID:", 1)
+                entry["username"] = uname.strip()
+                entry["user_id"] = uid.strip()
+            else:
+                entry["username"] = payload
+
+        elif expect_block and line.startswith(UM_LINE):
+            entry["message"] = line.split(":", 1)[1].strip()
+            # the block ends on the message line
+            yield entry
+            entry = {}
+            expect_block = False
+
+def iter_lines_backwards(path: str, block_size: int = LOG_READ_BLOCK_SIZE):
+    """Yield a file's lines last -> first, reading fixed-size blocks from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        at_eof = True
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            parts = (f.read(step) + tail).split(b"\n")
+            # parts[0] may be the back half of a line that started in an earlier block
+            tail = parts[0]
+            for part in reversed(parts[1:]):
+                if at_eof:
+                    at_eof = False
+                    if not part:
+                        continue  # the file's trailing newline, not an empty line
+                yield part.decode("utf-8", errors="replace") + "\n"
+        if tail:
+            yield tail.decode("utf-8", errors="replace") + "\n"
+
+def read_recent_log_lines(days_back: int, since: datetime | None = None, pattern: str | None = None,
+                          line_ts=_json_line_ts) -> list[str]:
+    """
+    Return message-log lines inside the lookback window (or newer than `since`), oldest -> newest.
+    `pattern` overrides LOG_BACKUP_GLOB (e.g. to read a copied log set); `line_ts(line)` gives
+    a record's epoch time, or None for lines that do not start a record.
+
+    Files are walked newest -> oldest and each one is read backwards in blocks, so we
+    stop as soon as we pass the first record older than the window instead of loading
+    every rotated backup.
+    """
+    tz_az = pytz.timezone('US/Arizona')
+    cutoff = (since or (datetime.now(tz_az) - timedelta(days=days_back))).timestamp()
+
+    files = sorted(
+        glob.glob(pattern or LOG_BACKUP_GLOB),
+        key=lambda p: os.path.getmtime(p),
+        reverse=True
+    )
+
+    per_file = []  # newest file first; each list is oldest -> newest
+    for path in files:
+        try:
+            # Last write is older than the window: this backup and every older one are out
+            if os.path.getmtime(path) < cutoff:
+                break
+
+            kept = []
+            passed_cutoff = False
+            for line in iter_lines_backwards(path):
+                ts = line_ts(line)
+                if ts is not None and ts < cutoff:
+                    passed_cutoff = True
+                    break
+                kept.append(line)
+        except Exception:
+            continue
+
+        kept.reverse()
+        per_file.append(kept)
+        if passed_cutoff:
+            break
+
+    return [line for kept in reversed(per_file) for line in kept]
+
+def read_seed_entries(days_back: int, since: datetime | None = None) -> list[dict]:
+    """
+    Entries to fill an empty archive: the JSON-lines log, preceded by legacy bot.log
+    entries older than its first record (bot.log also holds every message logged
+    since, so the overlap is left out).
+    """
+    entries = list(iter_log_entries(read_recent_log_lines(days_back, since=since)))
+    first_ts = entries[0]["dt"].timestamp() if entries else None
+
+    legacy_lines = read_recent_log_lines(days_back, since=since, pattern=LEGACY_LOG_GLOB, line_ts=_legacy_line_ts)
+    legacy = [
+        e for e in iter_legacy_log_entries(legacy_lines)
+        if e.get("dt") and (first_ts is None or e["dt"].timestamp() < first_ts)
+    ]
+    return legacy + entries
+
+def group_entries(entries):
+    """Group into OrderedDict[date_str][forum] -> list[entry]. date_str in AZ local."""
+    tz_az = pytz.timezone('US/Arizona')
+    by_date = defaultdict(lambda: defaultdict(list))
+    for e in entries:
+        dt = e.get("dt")
+        if not dt:
+            continue
+        d = dt.astimezone(tz_az).date()
+        date_key = d.strftime("%Y-%m-%d (%a)")
+        forum = e.get("forum") or "Unknown"
+        by_date[date_key][forum].append(e)
+    # Sorted by date ascending
+    ordered = OrderedDict(sorted(by_date.items(), key=lambda kv: kv[0]))
+    # Sort each forum’s entries by time
+    for date_key in ordered:
+        for forum in ordered[date_key]:
+            ordered[date_key][forum].sort(key=lambda e: e["dt"])
+    return ordered
+
+def sanitize_message(msg: str) -> str:
+    """
+    Remove Discord embeds by breaking URLs.
+    Example: 'https://twitch.tv/foo' -> '<https://twitch.tv/foo>'
+    (wrapped in angle brackets disables embedding)
+    """
+    if not msg:
+        return msg
+    # Wrap all http/https URLs in < >
+    return re.sub(r'(https?://\S+)', r'<\1>', msg)
+
+def az_day_bounds(the_date: str) -> tuple[float, float]:
+    """Epoch [start, end) of a YYYY-MM-DD day in AZ time."""
+    tz_az = pytz.timezone('US/Arizona')
+    day = datetime.strptime(the_date.strip(), "%Y-%m-%d")
+    start = tz_az.localize(day)
+    end = tz_az.localize(day + timedelta(days=1))
+    return start.timestamp(), end.timestamp()
+
+def lookback_start(days_back: int | None = None) -> float:
+    days = DEFAULT_LOG_LOOKBACK_DAYS if days_back is None else days_back
+    return time.time() - days * 86400
+
+def render_day_all_forums(archive: MessageArchive, the_date: str, entries_out: list | None = None):
+    """
+    Render ALL forums for a specific date (YYYY-MM-DD), excluding 'Direct Message'.
+    Sections:
+      # Date header
+      ## Forum name — N messages
+         - HH:MM AM/PM — user: message
+    entries_out: optional list that receives the rendered entries (for file exports).
+    """
+    tz_az = pytz.timezone('US/Arizona')
+
+    # Indexed range query for just that AZ day
+    day_start, day_end = az_day_bounds(the_date)
+    grouped = group_entries(archive.messages_between(day_start, day_end))
+    day_forums = next(iter(grouped.values()), None)
+
+    if day_forums is None:
+        return f"No messages found on {the_date}."
+
+    # Build output: sort forums by message count desc, then name asc
+    forums = []
+    for forum, items in day_forums.items():
+        if forum.lower() == "direct message":
+            continue
+        forums.append((forum, items))
+    if not forums:
+        return f"No server-channel messages on {the_date}."
+
+    forums.sort(key=lambda x: (-len(x[1]), x[0]))
+    if entries_out is not None:
+        for _, items in forums:
+            entries_out.extend(items)
+
+    lines = [f"__**{the_date}**__"]
+    for forum, items in forums:
+        # items should already be time-sorted by group_entries
+        lines.append(f"**{forum}** — {len(items)} message(s)")
+        for e in items:
+            t = e["dt"].astimezone(tz_az).strftime("%I:%M %p").lstrip("0")
+            user = e.get("username", "")
+            msg = sanitize_message((e.get("message") or "").strip()) or "(no content)"
+            lines.append(f"- **{t}** — {user}: {msg}")
+        lines.append("")  # blank line between forums
+
+    return "\n".join(lines).rstrip()
+
+# ---- Forum filtering / rendering helpers ----
+
+def normalize_forum_name(s: str) -> str:
+    if not s:
+        return ""
+    s = s.strip().lower()
+    s = s.replace("_", "-").replace(" ", "-")
+    # collapse duplicate hyphens
+    s = re.sub(r"-{2,}", "-", s)
+    return s
+
+def match_forum_name(forum_names, forum_query: str) -> str | None:
+    """
+    Return the forum name that best matches forum_query, or None.
+    Matches exact normalized name first; otherwise prefix, then substring match on normalized names.
+    """
+    qn = normalize_forum_name(forum_query)
+    if not qn:
+        return None
+
+    # Score forums for best match
+    scored = []  # (score, forum_name)
+    for forum_name in forum_names:
+        fn = normalize_forum_name(forum_name)
+        score = 0
+        if fn == qn:
+            score = 3
+        elif fn.startswith(qn):
+            score = 2
+        elif qn in fn:
+            score = 1
+        if score:
+            scored.append((score, forum_name))
+
+    if not scored:
+        return None
+
+    # Pick best score, tie-break by shorter name
+    best_score = max(s for s, _ in scored)
+    candidates = [name for s, name in scored if s == best_score]
+    candidates.sort(key=len)
+    return candidates[0]
+
+def render_forum(archive: MessageArchive, forum_query: str, limit: int = DEFAULT_FORUM_LIMIT, only_date: str | None = None,
+                  entries_out: list | None = None) -> str:
+    """
+    archive: MessageArchive to query (forum + time index)
+    forum_query: name or partial (e.g., 'bills-panthers')
+    limit: last N messages across the lookback window
+    only_date: optional 'YYYY-MM-DD' to restrict to that day (AZ time)
+    entries_out: optional list that receives the rendered entries (for file exports)
+    """
+    tz_az = pytz.timezone('US/Arizona')
+
+    since = lookback_start()
+    until = None
+    names_since = since
+    if only_date:
+        day_start, until = az_day_bounds(only_date)
+        names_since = min(since, day_start)
+
+    # Resolve the forum from the small forums table, then pull only its rows
+    canonical = match_forum_name(archive.forum_names(names_since), forum_query)
+    if not canonical:
+        return f"No messages found for forum '{forum_query}' in the last {DEFAULT_LOG_LOOKBACK_DAYS} day(s)."
+
+    if only_date:
+        f_entries = archive.forum_messages(canonical, day_start, until, limit=limit)
+        if not f_entries:
+            return f"No messages found for **{canonical}** on {only_date}."
+    else:
+        f_entries = archive.forum_messages(canonical, since, limit=limit)
+    if entries_out is not None:
+        entries_out.extend(f_entries)
+
+    # Group by date for nice headings
+    by_date = defaultdict(list)
+    for e in f_entries:
+        dkey = e["dt"].astimezone(tz_az).date().strftime("%Y-%m-%d (%a)") if e.get("dt") else "Unknown Date"
+        by_date[dkey].append(e)
+
+    # Build output
+    lines = [f"__**Forum:**__ **{canonical}** — {len(f_entries)} message(s)"]
+    if only_date:
+        lines[0] += f" on {only_date}"
+    lines.append("")  # blank
+
+    for dkey in sorted(by_date.keys()):
+        lines.append(f"**{dkey}**")
+        for e in by_date[dkey]:
+            t = e["dt"].astimezone(tz_az).strftime("%I:%M %p").lstrip("0") if e.get("dt") else "??:??"
+            user = e.get("username", "")
+            msg = sanitize_message((e.get("message") or "").strip()) or "(no content)"
+            lines.append(f"- **{t}** — {user}: {msg}")
+        lines.append("")
+
+    return "\n".join(lines).rstrip()
+
+def render_user(
+    archive: MessageArchive,
+    user_query: str,
+    limit: int = DEFAULT_FORUM_LIMIT,
+    only_date: str | None = None,
+    entries_out: list | None = None
+) -> str:
+    """
+    Render log lines filtered by username / ID fragment across ALL forums.
+
+    - user_query can be part of the username (e.g., 'panthers') or a full ID.
+    - Looks only within DEFAULT_LOG_LOOKBACK_DAYS (or the requested day).
+    """
+    tz_az = pytz.timezone('US/Arizona')
+    q = (user_query or "").strip().lower()
+    if not q:
+        return "No user query provided."
+
+    since = lookback_start()
+    until = None
+    if only_date:
+        since, until = az_day_bounds(only_date)
+
+    # Match against the users table, then walk the (user_id, ts) index
+    user_ids = archive.match_user_ids(q, since)
+    filtered = archive.user_messages(user_ids, since, until, limit=limit)
+
+    if not filtered:
+        msg = f"No messages found for user '{user_query}'"
+        if only_date:
+            msg += f" on {only_date}"
+        msg += f" in the last {DEFAULT_LOG_LOOKBACK_DAYS} day(s)."
+        return msg
+    if entries_out is not None:
+        entries_out.extend(filtered)
+
+    # Group by date for neat output
+    by_date = defaultdict(list)
+    for e in filtered:
+        if e.get("dt"):
+            dkey = e["dt"].astimezone(tz_az).date().strftime("%Y-%m-%d (%a)")
+        else:
+            dkey = "Unknown Date"
+        by_date[dkey].append(e)
+
+    lines = [f"__**User filter:**__ `{user_query}` — {len(filtered)} message(s)"]
+    if only_date:
+        lines[0] += f" on {only_date}"
+    lines.append("")
+
+    for dkey in sorted(by_date.keys()):
+        lines.append(f"**{dkey}**")
+        for e in by_date[dkey]:
+            dt = e.get("dt")
+            t = dt.astimezone(tz_az).strftime("%I:%M %p").lstrip("0") if dt else "??:??"
+            forum = e.get("forum") or "Unknown"
+            uname = (e.get("username") or "").strip()
+            msg = sanitize_message((e.get("message") or "").strip()) or "(no content)"
+            lines.append(f"- **{t}** — #{forum} — {uname}: {msg}")
+        lines.append("")
+
+    return "\n".join(lines).rstrip()
+
+_SEARCH_PART_RE = re.compile(r'"([^"]+)"|(?<!\w)\'([^\']+)\'(?!\w)|(\S+)')
+
+def parse_search_query(query: str) -> tuple[list[str], list[list[str]]]:
+    """
+    Split a search string into loose terms and quoted phrases.
+      disconnect quit 'rage quit'  ->  terms [disconnect, quit], phrases [[rage, quit]]
+    A fully double-quoted value (search="a b") just delimits the query.
+    """
+    q = (query or "").strip()
+    if len(q) >= 2 and q[0] == q[-1] == '"' and '"' not in q[1:-1]:
+        q = q[1:-1]
+
+    terms, phrases = [], []
+    for m in _SEARCH_PART_RE.finditer(q):
+        phrase = m.group(1) or m.group(2)
+        if phrase:
+            tokens = archive_tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        else:
+            terms.extend(archive_tokenize(m.group(3)))
+    return list(dict.fromkeys(terms)), phrases
+
+def render_search(
+    archive: MessageArchive,
+    search_query: str,
+    limit: int = DEFAULT_FORUM_LIMIT,
+    only_date: str | None = None,
+    entries_out: list | None = None
+) -> str:
+    """
+    Ranked full-text search across ALL forums (inverted index in the archive).
+
+    - Matches any loose word or any quoted phrase (in that order); phrase hits rank higher.
+    - Best matches first, newest first on ties; capped at `limit`.
+    """
+    tz_az = pytz.timezone('US/Arizona')
+    terms, phrases = parse_search_query(search_query)
+    if not terms and not phrases:
+        return "No search terms provided (words need at least 2 letters or digits)."
+
+    since = lookback_start()
+    until = None
+    if only_date:
+        since, until = az_day_bounds(only_date)
+
+    hits = archive.search(terms, phrases, since, until, limit=limit)
+    if not hits:
+        msg = f"No messages matching `{search_query}`"
+        if only_date:
+            msg += f" on {only_date}"
+        msg += f" in the last {DEFAULT_LOG_LOOKBACK_DAYS} day(s)."
+        return msg
+    if entries_out is not None:
+        entries_out.extend(hits)
+
+    lines = [f"__**Search:**__ `{search_query}` — {len(hits)} message(s), best match first"]
+    if only_date:
+        lines[0] += f" on {only_date}"
+    lines.append("")
+
+    for e in hits:
+        dt = e.get("dt")
+        when = dt.astimezone(tz_az).strftime("%Y-%m-%d %I:%M %p") if dt else "??"
+        forum = e.get("forum") or "Unknown"
+        uname = (e.get("username") or "").strip()
+        msg = sanitize_message((e.get("message") or "").strip()) or "(no content)"
+        lines.append(f"- **{when}** — #{forum} — {uname}: {msg}")
+
+    return "\n".join(lines).rstrip()
+
+
+def render_file_payload(header: str, body: str, entries: list[dict], fmt: str) -> bytes:
+    """
+    Build the attachment in memory.
+      md       — the same Markdown the DMs would show, in one file
+      txt      — that text with the bold/underline markers stripped
+      jsonl.gz — one JSON object per entry, gzip-compressed while it is written
+    """
+    if fmt == "jsonl.gz":
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+            for e in entries:
+                dt = e.get("dt")
+                record = {
+                    "ts": round(dt.timestamp(), 3) if dt else None,
+                    "time": dt.isoformat() if dt else None,
+                    "forum": e.get("forum"),
+                    "channel_id": e.get("channel_id"),
+                    "user_id": e.get("user_id"),
+                    "username": e.get("username"),
+                    "message": e.get("message"),
+                }
+                if "score" in e:
+                    record["score"] = round(e["score"], 4)
+                gz.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        return buf.getvalue()
+
+    text = f"{header}\n\n{body}\n"
+    if fmt == "txt":
+        text = re.sub(r"\*\*|__", "", text)
+    return text.encode("utf-8")
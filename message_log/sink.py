@@ -0,0 +1,75 @@
+# sink.py - one JSON object per message, next to the human-readable bot.log
+import os
+import json
+import time
+import logging
+from logging.handlers import RotatingFileHandler
+
+MESSAGE_LOG_FILE = os.getenv("MESSAGE_LOG_FILE", "messages.jsonl")
+MESSAGE_LOG_GLOB = MESSAGE_LOG_FILE + "*"   # messages.jsonl, messages.jsonl.1, ...
+MESSAGE_LOG_MAX_BYTES = int(os.getenv("MESSAGE_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+MESSAGE_LOG_BACKUPS = int(os.getenv("MESSAGE_LOG_BACKUPS", "10"))
+
+# Separate logger so records never mix with the discord_bot text lines
+message_logger = logging.getLogger("discord_bot.messages")
+message_logger.setLevel(logging.INFO)
+message_logger.propagate = False
+
+
+class DailyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that also rolls over when the local date changes."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding="utf-8"):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        try:
+            self._day = time.strftime("%Y-%m-%d", time.localtime(os.path.getmtime(self.baseFilename)))
+        except OSError:
+            self._day = time.strftime("%Y-%m-%d")
+
+    def shouldRollover(self, record) -> bool:
+        today = time.strftime("%Y-%m-%d")
+        if today != self._day:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            if self.stream.tell() > 0:
+                return True
+            self._day = today  # nothing written yet; just start the new day here
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self._day = time.strftime("%Y-%m-%d")
+
+
+def setup_message_log(path: str = MESSAGE_LOG_FILE) -> logging.Handler:
+    """Attach the rotating JSON-lines handler (once) and return it."""
+    for h in message_logger.handlers:
+        if isinstance(h, DailyRotatingFileHandler):
+            return h
+    handler = DailyRotatingFileHandler(
+        path,
+        maxBytes=MESSAGE_LOG_MAX_BYTES,
+        backupCount=MESSAGE_LOG_BACKUPS,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    message_logger.addHandler(handler)
+    return handler
+
+
+def log_message(ts: float, channel_id: int | None, channel: str, user_id: int | str,
+                username: str, content: str, message_id: int | None = None) -> None:
+    """
+    Write one message record. "ts" is always the first key so readers can
+    pull the timestamp off the front of a line without decoding it.
+    """
+    message_logger.info(json.dumps({
+        "ts": round(ts, 3),
+        "channel_id": channel_id,
+        "channel": channel,
+        "user_id": str(user_id),
+        "username": username,
+        "content": content,
+        "message_id": message_id,
+    }, ensure_ascii=False))
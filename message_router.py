@@ -0,0 +1,257 @@
+# message_router.py - route each incoming message to only the handlers that care about it
+#
+# Handlers register against a channel id, a channel name, a category id, DM context,
+# every guild message, or a content predicate. dispatch() gathers candidates with a
+# few dict lookups (no per-handler scanning), then runs them in registration priority.
+#
+# Slow handlers register with background=True: they are queued per channel (so one
+# channel's messages are still handled in order) and run by ChannelWorkQueues with a
+# global concurrency cap and a per-handler timeout, while on_message returns at once.
+# A handler that must not stop halfway (the week post builds every game channel)
+# registers with cancel_on_timeout=False: past its timeout it is only logged as slow.
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger("discord_bot")
+
+ROUTE_MAX_CONCURRENCY = int(os.getenv("ROUTE_MAX_CONCURRENCY", "4") or 4)
+ROUTE_MAX_PENDING = int(os.getenv("ROUTE_MAX_PENDING", "100") or 100)        # per channel
+ROUTE_DEFAULT_TIMEOUT = float(os.getenv("ROUTE_DEFAULT_TIMEOUT", "60") or 60)  # seconds
+
+# Return this from a handler to skip the remaining handlers for that message
+STOP = object()
+
+
+class Route:
+    def __init__(self, handler, priority: int, name: str, predicate=None,
+                 background: bool = False, timeout: float | None = None, cancel_on_timeout: bool = True):
+        self.handler = handler
+        self.priority = priority
+        self.name = name
+        self.predicate = predicate
+        self.background = background
+        self.timeout = timeout
+        self.cancel_on_timeout = cancel_on_timeout
+
+    def __repr__(self) -> str:
+        return f"<Route {self.name} p={self.priority}>"
+
+
+def channel_category_id(channel):
+    """Category id of a text/forum channel, or of a thread's parent channel."""
+    cat_id = getattr(channel, "category_id", None)
+    if cat_id is None:
+        parent = getattr(channel, "parent", None)
+        cat_id = getattr(parent, "category_id", None) if parent is not None else None
+    return cat_id
+
+
+class ChannelWorkQueues:
+    """
+    One FIFO per channel, drained by a worker task that exists only while the
+    channel has work. Jobs from the same channel run strictly in submit order;
+    jobs from different channels run in parallel up to `max_concurrency`.
+    """
+
+    def __init__(self, max_concurrency: int = ROUTE_MAX_CONCURRENCY, max_pending: int = ROUTE_MAX_PENDING,
+                 default_timeout: float = ROUTE_DEFAULT_TIMEOUT):
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._queues = {}    # channel key -> asyncio.Queue of (name, coro_fn, args, timeout, cancel)
+        self._workers = {}   # channel key -> asyncio.Task
+
+    def submit(self, key, name: str, coro_fn, *args, timeout: float | None = None,
+               cancel_on_timeout: bool = True) -> bool:
+        """
+        Queue coro_fn(*args) behind earlier work for `key`. Never blocks; False if the channel is backed up.
+        With cancel_on_timeout=False the job is never cancelled, only logged once it passes `timeout`.
+        """
+        q = self._queues.get(key)
+        if q is None:
+            q = self._queues[key] = asyncio.Queue()
+        if q.qsize() >= self.max_pending:
+            logger.warning(f"Route queue for {key} is full ({self.max_pending}); dropped {name}")
+            return False
+        q.put_nowait((name, coro_fn, args, timeout or self.default_timeout, cancel_on_timeout))
+
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.create_task(self._drain(key, q))
+        return True
+
+    async def _drain(self, key, q: asyncio.Queue) -> None:
+        try:
+            while not q.empty():
+                name, coro_fn, args, timeout, cancel = q.get_nowait()
+                async with self._slots:
+                    started = time.monotonic()
+                    try:
+                        if cancel:
+                            await asyncio.wait_for(coro_fn(*args), timeout)
+                        else:
+                            task = asyncio.ensure_future(coro_fn(*args))
+                            done, _ = await asyncio.wait({task}, timeout=timeout)
+                            if not done:
+                                logger.warning(f"{name} still running after {timeout:g}s (channel {key}); "
+                                               f"letting it finish")
+                            await task
+                    except asyncio.TimeoutError:
+                        logger.warning(f"{name} timed out after {timeout:g}s (channel {key})")
+                    except Exception as e:
+                        logger.warning(f"{name} failed: {e}")
+                    else:
+                        elapsed = time.monotonic() - started
+                        if elapsed > 5:
+                            logger.info(f"{name} took {elapsed:.1f}s (channel {key})")
+        finally:
+            # Worker goes away with the backlog; the next submit starts a new one
+            if self._workers.get(key) is asyncio.current_task():
+                del self._workers[key]
+            if q.empty() and self._queues.get(key) is q:
+                del self._queues[key]
+
+    def pending(self) -> dict:
+        return {key: q.qsize() for key, q in self._queues.items()}
+
+
+class MessageRouter:
+    """
+    Usage:
+        router = MessageRouter()
+
+        @router.channel(ADVANCE_CHANNEL_ID, priority=20)
+        async def watch_advance(msg): ...
+
+        @router.dm(priority=90)
+        async def dm_commands(msg): ...
+
+        await router.dispatch(msg)
+
+    Lower priority runs first. A channel id of 0/None (feature not configured)
+    is ignored at registration time, so unconfigured features cost nothing.
+
+    Every register method takes background=True / timeout=SECONDS (and
+    cancel_on_timeout=False to only log a slow handler) to run the handler on
+    the channel's work queue instead of inline; a background handler
+    cannot STOP later handlers. Inline handlers can hand off their slow tail
+    with spawn(msg, name, coro_fn, ...).
+    """
+
+    def __init__(self, workers: ChannelWorkQueues | None = None):
+        self.workers = workers or ChannelWorkQueues()
+        self._by_channel_id = defaultdict(list)
+        self._by_channel_name = defaultdict(list)
+        self._by_category_id = defaultdict(list)
+        self._dm = []
+        self._guild = []
+        self._predicates = []   # run on every message; keep the predicate cheap
+        self._count = 0
+
+    # ---------- registration ----------
+
+    def _route(self, handler, priority, predicate=None, **opts) -> Route:
+        self._count += 1
+        return Route(handler, priority if priority is not None else self._count * 10,
+                     getattr(handler, "__name__", repr(handler)), predicate, **opts)
+
+    def add_channel(self, channel_id, handler, priority: int | None = None, **opts):
+        if channel_id:
+            self._by_channel_id[int(channel_id)].append(self._route(handler, priority, **opts))
+        return handler
+
+    def add_channel_name(self, name: str, handler, priority: int | None = None, **opts):
+        if name:
+            self._by_channel_name[name].append(self._route(handler, priority, **opts))
+        return handler
+
+    def add_category(self, category_id, handler, priority: int | None = None, **opts):
+        if category_id:
+            self._by_category_id[int(category_id)].append(self._route(handler, priority, **opts))
+        return handler
+
+    def add_dm(self, handler, priority: int | None = None, **opts):
+        self._dm.append(self._route(handler, priority, **opts))
+        return handler
+
+    def add_guild(self, handler, priority: int | None = None, **opts):
+        self._guild.append(self._route(handler, priority, **opts))
+        return handler
+
+    def add_predicate(self, predicate, handler, priority: int | None = None, **opts):
+        self._predicates.append(self._route(handler, priority, predicate, **opts))
+        return handler
+
+    # Decorator forms
+    def channel(self, channel_id, priority: int | None = None, **opts):
+        return lambda fn: self.add_channel(channel_id, fn, priority, **opts)
+
+    def channel_name(self, name: str, priority: int | None = None, **opts):
+        return lambda fn: self.add_channel_name(name, fn, priority, **opts)
+
+    def category(self, category_id, priority: int | None = None, **opts):
+        return lambda fn: self.add_category(category_id, fn, priority, **opts)
+
+    def dm(self, priority: int | None = None, **opts):
+        return lambda fn: self.add_dm(fn, priority, **opts)
+
+    def guild(self, priority: int | None = None, **opts):
+        return lambda fn: self.add_guild(fn, priority, **opts)
+
+    def when(self, predicate, priority: int | None = None, **opts):
+        return lambda fn: self.add_predicate(predicate, fn, priority, **opts)
+
+    # ---------- dispatch ----------
+
+    def routes_for(self, msg) -> list[Route]:
+        """Handlers that apply to this message, in priority order."""
+        routes = []
+        ch = msg.channel
+        if msg.guild is None:
+            routes.extend(self._dm)
+        else:
+            routes.extend(self._guild)
+            ch_id = getattr(ch, "id", None)
+            if ch_id in self._by_channel_id:
+                routes.extend(self._by_channel_id[ch_id])
+            ch_name = getattr(ch, "name", None)
+            if ch_name in self._by_channel_name:
+                routes.extend(self._by_channel_name[ch_name])
+            if self._by_category_id:
+                cat_id = channel_category_id(ch)
+                if cat_id in self._by_category_id:
+                    routes.extend(self._by_category_id[cat_id])
+
+        for route in self._predicates:
+            try:
+                if route.predicate(msg):
+                    routes.append(route)
+            except Exception as e:
+                logger.warning(f"Router predicate {route.name} failed: {e}")
+
+        if len(routes) > 1:
+            routes.sort(key=lambda r: r.priority)
+        return routes
+
+    def spawn(self, msg, name: str, coro_fn, *args, timeout: float | None = None,
+              cancel_on_timeout: bool = True) -> bool:
+        """Run coro_fn(*args) on msg's channel queue (after that channel's earlier work)."""
+        key = getattr(msg.channel, "id", None)
+        return self.workers.submit(key, name, coro_fn, *args, timeout=timeout, cancel_on_timeout=cancel_on_timeout)
+
+    async def dispatch(self, msg) -> None:
+        for route in self.routes_for(msg):
+            if route.background:
+                self.spawn(msg, route.name, route.handler, msg, timeout=route.timeout,
+                           cancel_on_timeout=route.cancel_on_timeout)
+                continue
+            try:
+                result = await route.handler(msg)
+            except Exception as e:
+                logger.warning(f"{route.name} failed: {e}")
+                continue
+            if result is STOP:
+                break
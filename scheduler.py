@@ -0,0 +1,125 @@
+# scheduler.py - one heap of deadlines for every timed job in the bot
+#
+# Components register named jobs with a due time; a single task sleeps until the
+# earliest deadline and runs whatever is due. Scheduling a name that is already
+# pending replaces it (that is how a state change reschedules a job), and a job
+# that should run again schedules itself. With nothing due, nothing runs.
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from datetime import datetime
+
+logger = logging.getLogger("discord_bot")
+
+# Upper bound on one sleep, so a wall-clock correction (the Pi has no RTC and syncs
+# over NTP after boot) cannot leave a deadline hours late.
+SCHEDULER_MAX_SLEEP_SEC = float(os.getenv("SCHEDULER_MAX_SLEEP_SEC", "900") or 900)
+
+
+class Job:
+    __slots__ = ("name", "due", "fn", "args", "note", "seq")
+
+    def __init__(self, name, due, fn, args, note, seq):
+        self.name = name
+        self.due = due          # epoch seconds
+        self.fn = fn            # async callable
+        self.args = args
+        self.note = note
+        self.seq = seq
+
+
+def _epoch(when) -> float:
+    if isinstance(when, datetime):
+        return when.timestamp()   # aware datetimes only; naive ones are read as local time
+    return float(when)
+
+
+class Scheduler:
+    """
+    Named one-shot jobs ordered by due time.
+
+    The heap holds (due, seq, name); an entry is stale (skipped when it surfaces)
+    once its name was rescheduled or cancelled. Each due job runs as its own task,
+    so a slow one (posting to every game channel) does not hold the others back.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._jobs = {}                 # name -> pending Job
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    # ---------- registering ----------
+
+    def schedule(self, name: str, when, fn, *args, note: str = "") -> Job:
+        """Run `await fn(*args)` at `when` (aware datetime or epoch seconds), replacing any pending `name`."""
+        job = Job(name, _epoch(when), fn, args, note, next(self._seq))
+        self._jobs[name] = job
+        heapq.heappush(self._heap, (job.due, job.seq, name))
+        if self._heap[0][1] == job.seq:
+            self._wake.set()   # new earliest deadline
+        return job
+
+    def schedule_in(self, name: str, seconds: float, fn, *args, note: str = "") -> Job:
+        return self.schedule(name, time.time() + max(0.0, seconds), fn, *args, note=note)
+
+    def cancel(self, name: str) -> bool:
+        # the heap entry goes stale and is dropped when it reaches the top
+        return self._jobs.pop(name, None) is not None
+
+    # ---------- reads ----------
+
+    def get(self, name: str) -> Job | None:
+        return self._jobs.get(name)
+
+    def pending(self) -> list[Job]:
+        return sorted(self._jobs.values(), key=lambda j: (j.due, j.seq))
+
+    # ---------- running ----------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _peek(self) -> Job | None:
+        while self._heap:
+            due, seq, name = self._heap[0]
+            job = self._jobs.get(name)
+            if job is not None and job.seq == seq:
+                return job
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            job = self._peek()
+            delay = None if job is None else job.due - time.time()
+            if delay is None or delay > 0:
+                timeout = SCHEDULER_MAX_SLEEP_SEC if delay is None else min(delay, SCHEDULER_MAX_SLEEP_SEC)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            del self._jobs[job.name]
+            asyncio.get_running_loop().create_task(self._execute(job))
+
+    async def _execute(self, job: Job) -> None:
+        late = time.time() - job.due
+        if late > 60:
+            logger.info(f"[SCHED] {job.name} running {int(late)}s late")
+        try:
+            await job.fn(*job.args)
+        except Exception as e:
+            logger.warning(f"[SCHED] job {job.name} failed: {e}")
+
+
+# Shared instance for the bot
+SCHEDULER = Scheduler()
@@ -0,0 +1,489 @@
+# state_store.py - the bot's small persistent state in one SQLite database (WAL)
+#
+# Replaces the per-feature JSON files (week state, playtime, GOTW, AP state,
+# AP notifications, commissioner reminder, week cache) plus the durable job
+# queue and the matchup-channel activity tracker. Each feature gets a typed
+# table; reads are point lookups and writes are small transactions instead of
+# whole-file rewrites. migrate_json_files() imports the old files once.
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("discord_bot")
+
+STATE_DB = os.getenv("STATE_DB", "data/state.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS week_state (
+    id                 INTEGER PRIMARY KEY CHECK (id = 1),
+    week               INTEGER NOT NULL,
+    pre_reminder_sent  INTEGER NOT NULL DEFAULT 0,
+    advance_time       TEXT
+);
+CREATE TABLE IF NOT EXISTS week_matchups (
+    pos         INTEGER PRIMARY KEY,   -- order as written in the advance post
+    left_team   TEXT NOT NULL,
+    right_team  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS playtime (
+    user_id     TEXT PRIMARY KEY,
+    text        TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS gotw_weeks (
+    week       INTEGER PRIMARY KEY,
+    posted_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gotw_pairs (
+    week    INTEGER NOT NULL,
+    team_a  TEXT NOT NULL,
+    team_b  TEXT NOT NULL,
+    PRIMARY KEY (week, team_a, team_b)
+);
+
+-- last AP snapshot the bulletin was posted for
+CREATE TABLE IF NOT EXISTS ap_state (
+    user_id  TEXT,
+    until    TEXT
+);
+-- (user, return date) pairs the admin was already reminded about
+CREATE TABLE IF NOT EXISTS ap_notified (
+    user_id  TEXT NOT NULL,
+    until    TEXT NOT NULL,
+    PRIMARY KEY (user_id, until)
+);
+
+CREATE TABLE IF NOT EXISTS commissioner_advance (
+    id                   INTEGER PRIMARY KEY CHECK (id = 1),
+    advance_key          TEXT,
+    week                 INTEGER,
+    current_week         INTEGER,
+    advance_to_week      INTEGER,
+    advance_time_iso     TEXT,
+    channel_id           INTEGER,
+    reminder_message_id  INTEGER,
+    claimed_by           INTEGER,
+    claimed_at           TEXT,
+    followup_sent        INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS week_cache (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    season  INTEGER,
+    week    INTEGER
+);
+CREATE TABLE IF NOT EXISTS week_cache_games (
+    team        TEXT PRIMARY KEY,
+    discord_id  TEXT NOT NULL,
+    display     TEXT,
+    opponent    TEXT NOT NULL,
+    game_id     TEXT NOT NULL
+);
+
+-- durable delayed jobs (job_queue.py); key is the idempotency key
+CREATE TABLE IF NOT EXISTS jobs (
+    key           TEXT PRIMARY KEY,
+    type          TEXT NOT NULL,
+    payload       TEXT NOT NULL,          -- JSON
+    due           REAL NOT NULL,          -- epoch seconds
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',   -- pending | done | failed
+    last_error    TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, due);
+
+-- matchup channels the inactivity reminders watch (activity_tracker.py)
+CREATE TABLE IF NOT EXISTS activity_channels (
+    channel_id     INTEGER PRIMARY KEY,
+    created_at     REAL NOT NULL,          -- epoch seconds
+    member_ids     TEXT NOT NULL,          -- JSON list
+    last_reminder  REAL
+);
+CREATE TABLE IF NOT EXISTS activity_responses (
+    channel_id  INTEGER NOT NULL,
+    user_id     INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+
+_COMMISSIONER_FIELDS = (
+    "advance_key", "week", "current_week", "advance_to_week", "advance_time_iso", "channel_id",
+    "reminder_message_id", "claimed_by", "claimed_at", "followup_sent",
+)
+_GAME_FIELDS = ("team", "discord_id", "display", "opponent", "game_id")
+
+_KEEP = "__KEEP__"
+
+
+class StateStore:
+    """
+    Typed tables for the bot's state. All methods are thread-safe and return the
+    same shapes the old JSON loaders did, so callers only swap the storage call.
+    """
+
+    def __init__(self, path: str = STATE_DB):
+        if path != ":memory:":
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _one(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _all(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---------- week state ----------
+
+    def week_state(self) -> dict:
+        """{"week", "matchups": [[L, R], ...], "pre_reminder_sent", "advance_time"}"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM week_state WHERE id = 1").fetchone()
+            pairs = self._conn.execute("SELECT left_team, right_team FROM week_matchups ORDER BY pos").fetchall()
+        return {
+            "week": row["week"] if row else 0,
+            "matchups": [[p["left_team"], p["right_team"]] for p in pairs],
+            "pre_reminder_sent": bool(row["pre_reminder_sent"]) if row else False,
+            "advance_time": row["advance_time"] if row else None,
+        }
+
+    def set_week_state(self, week, matchups, pre_reminder_sent=None, advance_time=_KEEP) -> None:
+        """Replace week + matchups; pre_reminder_sent=None / advance_time=_KEEP keep the stored value."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT pre_reminder_sent, advance_time FROM week_state WHERE id = 1").fetchone()
+            if pre_reminder_sent is None:
+                pre_reminder_sent = bool(row["pre_reminder_sent"]) if row else False
+            if advance_time == _KEEP:
+                advance_time = row["advance_time"] if row else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO week_state (id, week, pre_reminder_sent, advance_time) VALUES (1, ?, ?, ?)",
+                (int(week or 0), int(bool(pre_reminder_sent)), advance_time),
+            )
+            self._conn.execute("DELETE FROM week_matchups")
+            self._conn.executemany(
+                "INSERT INTO week_matchups (pos, left_team, right_team) VALUES (?, ?, ?)",
+                [(i, a, b) for i, (a, b) in enumerate(matchups or [])],
+            )
+
+    # ---------- playtime ----------
+
+    def playtime(self, user_id) -> str | None:
+        row = self._one("SELECT text FROM playtime WHERE user_id = ?", (str(user_id),))
+        return row["text"] if row else None
+
+    def set_playtime(self, user_id, text: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO playtime (user_id, text, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET text = excluded.text, updated_at = excluded.updated_at",
+                (str(user_id), str(text), time.time()),
+            )
+
+    # ---------- games of the week ----------
+
+    def gotw_state(self) -> dict:
+        """{"last_week_posted", "pairs"} for the most recently posted week, or {}."""
+        with self._lock:
+            row = self._conn.execute("SELECT week FROM gotw_weeks ORDER BY posted_at DESC LIMIT 1").fetchone()
+            if row is None:
+                return {}
+            pairs = self._conn.execute(
+                "SELECT team_a, team_b FROM gotw_pairs WHERE week = ?", (row["week"],)
+            ).fetchall()
+        return {"last_week_posted": row["week"], "pairs": [[p["team_a"], p["team_b"]] for p in pairs]}
+
+    def set_gotw_state(self, week, pairs) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO gotw_weeks (week, posted_at) VALUES (?, ?)", (int(week), time.time())
+            )
+            self._conn.execute("DELETE FROM gotw_pairs WHERE week = ?", (int(week),))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO gotw_pairs (week, team_a, team_b) VALUES (?, ?, ?)",
+                [(int(week), *sorted(p)) for p in pairs],
+            )
+
+    # ---------- AP ----------
+
+    def ap_state(self) -> list[dict]:
+        rows = self._all("SELECT user_id, until FROM ap_state")
+        return sorted(({"user_id": r["user_id"], "until": r["until"]} for r in rows),
+                      key=lambda x: x["user_id"] or "")
+
+    def replace_ap_state_if_changed(self, current: list[dict]) -> bool:
+        """Store `current` as the AP snapshot; False (no write) if it already matches."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT user_id, until FROM ap_state").fetchall()
+            previous = sorted(((r["user_id"] or "", r["until"] or "") for r in rows))
+            if previous == sorted(((u.get("user_id") or "", u.get("until") or "") for u in current)):
+                return False
+            self._conn.execute("DELETE FROM ap_state")
+            self._conn.executemany(
+                "INSERT INTO ap_state (user_id, until) VALUES (?, ?)",
+                [(u.get("user_id"), u.get("until")) for u in current],
+            )
+            return True
+
+    def ap_notified(self) -> set[tuple]:
+        return {(r["user_id"], r["until"]) for r in self._all("SELECT user_id, until FROM ap_notified")}
+
+    def add_ap_notified(self, keys) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO ap_notified (user_id, until) VALUES (?, ?)",
+                [(str(uid or ""), str(until or "")) for uid, until in keys],
+            )
+
+    # ---------- commissioner advance reminder ----------
+
+    def commissioner_advance(self) -> dict:
+        row = self._one("SELECT * FROM commissioner_advance WHERE id = 1")
+        if row is None:
+            return {}
+        state = {k: row[k] for k in _COMMISSIONER_FIELDS}
+        state["followup_sent"] = bool(state["followup_sent"])
+        return state
+
+    def set_commissioner_advance(self, state: dict) -> None:
+        values = [state.get(k) for k in _COMMISSIONER_FIELDS]
+        values[-1] = int(bool(state.get("followup_sent")))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO commissioner_advance (id, {', '.join(_COMMISSIONER_FIELDS)}) "
+                f"VALUES (1, {', '.join('?' * len(_COMMISSIONER_FIELDS))})",
+                values,
+            )
+
+    # ---------- week cache ----------
+
+    def week_cache(self) -> dict | None:
+        """{"season", "week", "games": {TEAM: {...}}} as last stored, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT season, week FROM week_cache WHERE id = 1").fetchone()
+            games = self._conn.execute(f"SELECT {', '.join(_GAME_FIELDS)} FROM week_cache_games").fetchall()
+        if row is None:
+            return None
+        return {
+            "season": row["season"],
+            "week": row["week"],
+            "games": {g["team"]: {k: g[k] for k in _GAME_FIELDS} for g in games},
+        }
+
+    def replace_week_cache_if_changed(self, cache: dict) -> bool:
+        """Store `cache`; False (no write) if it is identical to the stored one."""
+        if self.week_cache() == cache:
+            return False
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO week_cache (id, season, week) VALUES (1, ?, ?)",
+                (cache.get("season"), cache.get("week")),
+            )
+            self._conn.execute("DELETE FROM week_cache_games")
+            self._conn.executemany(
+                f"INSERT INTO week_cache_games ({', '.join(_GAME_FIELDS)}) VALUES (?, ?, ?, ?, ?)",
+                [tuple(g.get(k) for k in _GAME_FIELDS) for g in (cache.get("games") or {}).values()],
+            )
+        return True
+
+    # ---------- durable jobs ----------
+
+    @staticmethod
+    def _job(row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        return job
+
+    def add_job(self, key: str, job_type: str, payload: dict, due: float, max_attempts: int) -> bool:
+        """Insert a pending job; False (nothing written) if `key` was ever used before."""
+        now = time.time()
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (key, type, payload, due, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, job_type, json.dumps(payload or {}), due, max_attempts, now, now),
+            )
+            return cur.rowcount == 1
+
+    def job(self, key: str) -> dict | None:
+        row = self._one("SELECT * FROM jobs WHERE key = ?", (key,))
+        return self._job(row) if row else None
+
+    def pending_jobs(self, job_type: str | None = None) -> list[dict]:
+        if job_type is None:
+            rows = self._all("SELECT * FROM jobs WHERE status = 'pending' ORDER BY due")
+        else:
+            rows = self._all("SELECT * FROM jobs WHERE status = 'pending' AND type = ? ORDER BY due", (job_type,))
+        return [self._job(r) for r in rows]
+
+    def update_job(self, key: str, status: str, attempts: int, due: float | None = None,
+                   payload: dict | None = None, last_error: str | None = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, due = COALESCE(?, due), "
+                "payload = COALESCE(?, payload), last_error = ?, updated_at = ? WHERE key = ?",
+                (status, attempts, due, None if payload is None else json.dumps(payload),
+                 last_error, time.time(), key),
+            )
+
+    def prune_jobs(self, older_than_sec: float) -> int:
+        """Drop finished jobs (done / failed) last touched more than `older_than_sec` ago."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status != 'pending' AND updated_at < ?",
+                (time.time() - older_than_sec,),
+            )
+            return cur.rowcount
+
+    # ---------- matchup channel activity ----------
+
+    def activity_channels(self) -> dict[int, dict]:
+        """{channel_id: {"created_at", "member_ids", "responses": set, "last_reminder"}} (epoch seconds)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM activity_channels").fetchall()
+            responses = self._conn.execute("SELECT channel_id, user_id FROM activity_responses").fetchall()
+        channels = {
+            r["channel_id"]: {
+                "created_at": r["created_at"],
+                "member_ids": json.loads(r["member_ids"] or "[]"),
+                "responses": set(),
+                "last_reminder": r["last_reminder"],
+            }
+            for r in rows
+        }
+        for r in responses:
+            if r["channel_id"] in channels:
+                channels[r["channel_id"]]["responses"].add(r["user_id"])
+        return channels
+
+    def set_activity_channel(self, channel_id: int, created_at: float, member_ids, responses=()) -> None:
+        """Start (or restart) tracking a channel; replaces its responses and reminder time."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO activity_channels (channel_id, created_at, member_ids, last_reminder) "
+                "VALUES (?, ?, ?, NULL)",
+                (channel_id, created_at, json.dumps(list(member_ids))),
+            )
+            self._conn.execute("DELETE FROM activity_responses WHERE channel_id = ?", (channel_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO activity_responses (channel_id, user_id) VALUES (?, ?)",
+                [(channel_id, uid) for uid in responses],
+            )
+
+    def add_activity_response(self, channel_id: int, user_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO activity_responses (channel_id, user_id) VALUES (?, ?)",
+                (channel_id, user_id),
+            )
+
+    def set_activity_reminded(self, channel_id: int, when: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE activity_channels SET last_reminder = ? WHERE channel_id = ?", (when, channel_id)
+            )
+
+    def delete_activity_channels(self, channel_ids=None) -> None:
+        """Stop tracking the given channels (all of them if None)."""
+        with self._lock, self._conn:
+            if channel_ids is None:
+                self._conn.execute("DELETE FROM activity_channels")
+                self._conn.execute("DELETE FROM activity_responses")
+                return
+            ids = [(cid,) for cid in channel_ids]
+            self._conn.executemany("DELETE FROM activity_channels WHERE channel_id = ?", ids)
+            self._conn.executemany("DELETE FROM activity_responses WHERE channel_id = ?", ids)
+
+    # ---------- one-shot import of the old JSON files ----------
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _import(self, kind: str, data) -> None:
+        if kind == "week_state":
+            self.set_week_state(data.get("week", 0), data.get("matchups", []),
+                                data.get("pre_reminder_sent", False), data.get("advance_time"))
+        elif kind == "playtime":
+            for user_id, text in data.items():
+                self.set_playtime(user_id, text)
+        elif kind == "gotw":
+            if data.get("last_week_posted") is not None:
+                self.set_gotw_state(data["last_week_posted"], data.get("pairs", []))
+        elif kind == "ap_state":
+            self.replace_ap_state_if_changed(data)
+        elif kind == "ap_notified":
+            self.add_ap_notified(tuple(x) for x in data)
+        elif kind == "commissioner_advance":
+            if data:
+                self.set_commissioner_advance(data)
+        elif kind == "week_cache":
+            self.replace_week_cache_if_changed(data)
+        else:
+            raise ValueError(f"unknown state kind {kind!r}")
+
+    def migrate_json_files(self, files: dict) -> list[str]:
+        """
+        Import each legacy JSON file once. `files` maps a kind (week_state, playtime, gotw,
+        ap_state, ap_notified, commissioner_advance, week_cache) to its path. A kind is
+        marked done even if its file is missing, so a later stray file is never re-imported.
+        The source files are renamed to *.migrated; week_cache.json is left in place since
+        it is still exported for other readers. Returns the kinds imported.
+        """
+        imported = []
+        for kind, path in files.items():
+            with self._lock:
+                done = self._meta(f"migrated:{kind}")
+            if done:
+                continue
+            if path and os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    self._import(kind, data)
+                except Exception as e:
+                    # leave it unmarked so the next start retries after the file is fixed
+                    logger.error(f"State migration of {path} failed: {e}")
+                    continue
+                if kind != "week_cache":
+                    try:
+                        os.replace(path, path + ".migrated")
+                    except OSError as e:
+                        logger.warning(f"Could not rename migrated {path}: {e}")
+                imported.append(kind)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"migrated:{kind}", str(time.time()))
+                )
+        if imported:
+            logger.info(f"State store: imported {', '.join(imported)} into {self.path}")
+        return imported
@@ -0,0 +1,224 @@
+# streamers_registry.py - who streams for which team, indexed in memory
+#
+# streamers.json (read by the website) is loaded once and kept as a list plus three
+# indexes, so an upsert from a game-streams post is a few dict lookups. Changed
+# records are flushed to the file after a short debounce; unchanged ones never
+# touch the disk. An optional localhost HTTP endpoint serves the same list as JSON.
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("discord_bot")
+
+STREAMERS_FLUSH_DELAY_SEC = float(os.getenv("STREAMERS_FLUSH_DELAY_SEC", "5") or 5)
+STREAMERS_HTTP_HOST = os.getenv("STREAMERS_HTTP_HOST", "127.0.0.1")
+STREAMERS_HTTP_PORT = int(os.getenv("STREAMERS_HTTP_PORT", "0") or 0)   # 0 = no HTTP view
+
+
+def normalize_url(url: str) -> str:
+    return (url or "").strip().rstrip("/").lower()
+
+
+class StreamersRegistry:
+    """
+    Streamer records: {"discord_id", "name", "team", "platform", "url"}.
+
+    An upsert matches an existing record (earliest in the list wins) by
+    discord id, by normalized URL or by (platform, name), the same three rules
+    the file scan used, and updates it in place; otherwise it appends.
+    """
+
+    def __init__(self, path: str, flush_delay: float = STREAMERS_FLUSH_DELAY_SEC):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._records = None        # list, loaded on first use
+        self._by_discord_id = {}
+        self._by_url = {}
+        self._by_platform_name = {}
+        self._mtime = None          # file mtime we last loaded or wrote
+        self._dirty = False
+        self._timer = None
+        self._version = 0           # bumped on every change (HTTP ETag)
+        self._epoch = int(time.time())  # keeps ETags from repeating across restarts
+
+    # ---------- loading / indexing ----------
+
+    @staticmethod
+    def _keys(rec: dict):
+        discord_id = str(rec.get("discord_id") or "")
+        url = normalize_url(rec.get("url", ""))
+        platform_name = ((rec.get("platform") or "").lower(), (rec.get("name") or "").lower())
+        return discord_id, url, platform_name
+
+    def _reindex(self) -> None:
+        self._by_discord_id, self._by_url, self._by_platform_name = {}, {}, {}
+        for pos, rec in enumerate(self._records):
+            self._index(pos, rec)
+
+    def _index(self, pos: int, rec: dict) -> None:
+        discord_id, url, platform_name = self._keys(rec)
+        if discord_id:
+            self._by_discord_id.setdefault(discord_id, pos)
+        if url:
+            self._by_url.setdefault(url, pos)
+        if all(platform_name):
+            self._by_platform_name.setdefault(platform_name, pos)
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _ensure_loaded(self) -> None:
+        # (re)load on first use, or if someone else rewrote the file while we had nothing pending
+        mtime = self._file_mtime()
+        if self._records is not None and (self._dirty or mtime == self._mtime):
+            return
+        records = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                records = [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+            except Exception as e:
+                logger.warning(f"[STREAMERS] Failed to load streamers.json: {e}")
+                if self._records is not None:
+                    return
+        self._records = records
+        self._mtime = mtime
+        self._version += 1
+        self._reindex()
+
+    # ---------- writes ----------
+
+    def upsert(self, entry: dict) -> str:
+        """Add or update one streamer; returns "added", "updated" or "unchanged"."""
+        with self._lock:
+            self._ensure_loaded()
+            discord_id, url, platform_name = self._keys(entry)
+            matches = [
+                pos for pos in (
+                    self._by_discord_id.get(discord_id) if discord_id else None,
+                    self._by_url.get(url) if url else None,
+                    self._by_platform_name.get(platform_name) if all(platform_name) else None,
+                )
+                if pos is not None
+            ]
+            if matches:
+                rec = self._records[min(matches)]
+                if all(rec.get(k) == v for k, v in entry.items()):
+                    return "unchanged"
+                rec.update(entry)
+                self._reindex()   # keys may have moved; the list is small
+                result = "updated"
+            else:
+                self._records.append(dict(entry))
+                self._index(len(self._records) - 1, self._records[-1])
+                result = "added"
+            self._version += 1
+            self._mark_dirty()
+            return result
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._timer is None:
+            # debounce: everything changed in the next flush_delay seconds goes out in one write
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            try:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._records, f, indent=2)
+                os.replace(tmp, self.path)
+                self._mtime = self._file_mtime()
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"[STREAMERS] Failed to save streamers.json: {e}")
+
+    # ---------- reads ----------
+
+    def records(self) -> list[dict]:
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(r) for r in self._records]
+
+    def snapshot(self) -> tuple[int, bytes]:
+        """(version, JSON bytes) of the current list, for the HTTP view."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._version, json.dumps(self._records).encode("utf-8")
+
+    # ---------- HTTP view ----------
+
+    def serve(self, host: str = STREAMERS_HTTP_HOST, port: int = STREAMERS_HTTP_PORT):
+        """
+        Serve GET /streamers.json from a daemon thread (localhost by default).
+        Honors If-None-Match, so a poller only downloads the list after a change.
+        Returns the server, or None if port is 0 or the bind fails.
+        """
+        if not port:
+            return None
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/streamers.json"):
+                    self.send_error(404)
+                    return
+                version, body = registry.snapshot()
+                etag = f'"{registry._epoch}-{version}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            logger.warning(f"[STREAMERS] HTTP view not started on {host}:{port}: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="streamers-http", daemon=True).start()
+        logger.info(f"[STREAMERS] HTTP view on http://{host}:{port}/streamers.json")
+        return server
+
+
+_registries = []
+
+
+def open_streamers_registry(path: str) -> StreamersRegistry:
+    registry = StreamersRegistry(path)
+    _registries.append(registry)
+    return registry
+
+
+@atexit.register
+def _flush_all() -> None:
+    for registry in _registries:
+        registry.flush()
@@ -0,0 +1,346 @@
+# team_names.py - shared team-name resolution (NFL_Teams.csv loaded once, prefix trie lookups)
+#
+# Also home of TeamMatcher: the one place both bots turn free text (codes, cities,
+# nicknames, nicknames with typos) into a team. It is built from the same CSV, so
+# the two cannot disagree about which teams exist.
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger("discord_bot")
+
+NFL_TEAMS_CSV = os.getenv(
+    "NFL_TEAMS_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "NFL_Teams.csv"),
+)
+# How often (seconds) to stat the CSV for changes; lookups in between never touch the disk
+TEAMS_RECHECK_SEC = float(os.getenv("TEAMS_RECHECK_SEC", "5") or 5)
+
+_END = "$"   # trie key holding the Title Case team that ends at this node
+
+
+def leading_alnum_casefold(s: str) -> str:
+    """Casefolded text starting at the first letter/digit (skips emoji, symbols, spaces)."""
+    s = s or ""
+    i = 0
+    while i < len(s) and not s[i].isalnum():
+        i += 1
+    return s[i:].casefold()
+
+
+class TeamResolver:
+    """
+    Official team names from NFL_Teams.csv (one Title Case name per line), kept in
+    memory as a casefolded prefix trie. The file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, csv_path: str = NFL_TEAMS_CSV, recheck_sec: float = TEAMS_RECHECK_SEC):
+        self.csv_path = csv_path
+        self.recheck_sec = recheck_sec
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._titles = []
+        self._upper_map = {}
+        self._trie = {}
+        self._generation = 0
+
+    # ---------- loading ----------
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < self.recheck_sec:
+            return
+        with self._lock:
+            if self._mtime is not None and now - self._checked_at < self.recheck_sec:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.csv_path)
+            except OSError as e:
+                if self._mtime is None:
+                    logger.error(f"{self.csv_path} not readable: {e}")
+                    self._mtime = -1.0   # don't retry on every lookup
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.csv_path, "r", encoding="utf-8") as f:
+                    titles = [ln.strip() for ln in f if ln.strip()]
+            except OSError as e:
+                logger.error(f"Failed reading {self.csv_path}: {e}")
+                return
+            self._build(titles)
+            self._mtime = mtime
+            logger.info(f"Team names loaded: {len(titles)} from {self.csv_path}")
+
+    def _build(self, titles: list[str]) -> None:
+        trie = {}
+        for title in titles:
+            node = trie
+            for ch in title.casefold():
+                node = node.setdefault(ch, {})
+            node[_END] = title
+        # swap in complete structures so readers never see a half-built trie
+        self._trie = trie
+        self._titles = titles
+        self._upper_map = {t.upper(): t for t in titles}
+        self._generation += 1
+
+    # ---------- lookups ----------
+
+    def generation(self) -> int:
+        """Bumped each time the CSV is (re)loaded, so derived indexes know to rebuild."""
+        self._refresh()
+        return self._generation
+
+    def titles(self) -> list[str]:
+        """Official names, Title Case, in CSV order."""
+        self._refresh()
+        return list(self._titles)
+
+    def upper_map(self) -> dict:
+        """UPPER -> Title Case."""
+        self._refresh()
+        return dict(self._upper_map)
+
+    def is_team(self, name: str) -> bool:
+        self._refresh()
+        return (name or "").strip().upper() in self._upper_map
+
+    def match_prefix(self, text: str) -> str | None:
+        """Longest official team (Title Case) that `text` starts with, case-insensitive. O(len(text))."""
+        self._refresh()
+        node = self._trie
+        found = None
+        for ch in (text or "").casefold():
+            node = node.get(ch)
+            if node is None:
+                break
+            found = node.get(_END, found)
+        return found
+
+    def team_from_nick(self, nick: str) -> str | None:
+        """TEAM (ALL CAPS) a display name starts with, ignoring leading symbols/emoji."""
+        if not nick:
+            return None
+        title = self.match_prefix(leading_alnum_casefold(nick))
+        return title.upper() if title else None
+
+
+# Shared instance for the bots
+TEAMS = TeamResolver()
+
+
+# ---------- free-text / typo-tolerant matching ----------
+
+# Code and city for each NFL_Teams.csv name. The CSV decides which teams exist; a
+# name listed here but not in the CSV is ignored, and a CSV name missing here is
+# matched by its nickname alone (code = the UPPER nickname).
+NFL_TEAM_INFO = {
+    "Cardinals": ("ARI", "Arizona"), "Falcons": ("ATL", "Atlanta"), "Ravens": ("BAL", "Baltimore"),
+    "Bills": ("BUF", "Buffalo"), "Panthers": ("CAR", "Carolina"), "Bears": ("CHI", "Chicago"),
+    "Bengals": ("CIN", "Cincinnati"), "Browns": ("CLE", "Cleveland"), "Cowboys": ("DAL", "Dallas"),
+    "Broncos": ("DEN", "Denver"), "Lions": ("DET", "Detroit"), "Packers": ("GB", "Green Bay"),
+    "Texans": ("HOU", "Houston"), "Colts": ("IND", "Indianapolis"), "Jaguars": ("JAX", "Jacksonville"),
+    "Chiefs": ("KC", "Kansas City"), "Raiders": ("LV", "Las Vegas"), "Chargers": ("LAC", "Los Angeles"),
+    "Rams": ("LAR", "Los Angeles"), "Dolphins": ("MIA", "Miami"), "Vikings": ("MIN", "Minnesota"),
+    "Patriots": ("NE", "New England"), "Saints": ("NO", "New Orleans"), "Giants": ("NYG", "New York"),
+    "Jets": ("NYJ", "New York"), "Eagles": ("PHI", "Philadelphia"), "Steelers": ("PIT", "Pittsburgh"),
+    "Seahawks": ("SEA", "Seattle"), "49ers": ("SF", "San Francisco"), "Buccaneers": ("TB", "Tampa Bay"),
+    "Titans": ("TEN", "Tennessee"), "Commanders": ("WAS", "Washington"),
+}
+
+# Extra spellings people actually type (keys are normalized: UPPER, single spaces)
+TEAM_NICKNAME_ALIASES = {
+    "NINERS": "SF", "BUCS": "TB", "PATS": "NE", "JAGS": "JAX", "PHINS": "MIA", "FINS": "MIA",
+    "LA RAMS": "LAR", "LA CHARGERS": "LAC", "NY GIANTS": "NYG", "NY JETS": "NYJ",
+    "OAKLAND": "LV", "OAKLAND RAIDERS": "LV", "SAN DIEGO": "LAC", "ST LOUIS": "LAR",
+    "WASHINGTON FOOTBALL TEAM": "WAS", "TAMPA": "TB", "VEGAS": "LV", "KC CHIEFS": "KC",
+}
+
+FUZZY_MIN_LEN = 4          # shorter text (codes like NE/NO) must match exactly
+_NGRAM = 3
+_WORD_WINDOW = 3           # find() tries up to this many words next to the anchor
+
+_NON_ALNUM_RE = re.compile(r"[^A-Z0-9]+")
+
+
+def normalize_team_text(s: str) -> str:
+    """UPPER, letters/digits only, single spaces: "  san-francisco 49ers!" -> "SAN FRANCISCO 49ERS"."""
+    return _NON_ALNUM_RE.sub(" ", (s or "").upper()).strip()
+
+
+def _ngrams(key: str) -> set[str]:
+    padded = f" {key} "
+    return {padded[i:i + _NGRAM] for i in range(len(padded) - _NGRAM + 1)}
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance counting insert/delete/substitute and adjacent swaps ("EAGELS") as one,
+    computed only inside a band of width `limit`. Returns limit + 1 once it must exceed limit.
+    """
+    la, lb = len(a), len(b)
+    over = limit + 1
+    if abs(la - lb) > limit:
+        return over
+    before = None
+    prev = [j if j <= limit else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [over] * (lb + 1)
+        cur[0] = i if i <= limit else over
+        lo, hi = max(1, i - limit), min(lb, i + limit)
+        for j in range(lo, hi + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if before is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, before[j - 2] + 1)
+            cur[j] = min(d, over)
+        if min(cur[lo - 1:hi + 1]) > limit:
+            return over
+        before, prev = prev, cur
+    return prev[lb]
+
+
+def _fuzzy_limit(n: int) -> int:
+    if n < FUZZY_MIN_LEN:
+        return 0
+    return 1 if n < 8 else 2
+
+
+class TeamMatcher:
+    """
+    Text -> team code ("DAL"), built from the teams in NFL_Teams.csv (via a
+    TeamResolver) and rebuilt whenever that file is reloaded:
+      * alias map: code, nickname, city, "city nickname" and TEAM_NICKNAME_ALIASES
+        (a city shared by two teams, e.g. NEW YORK, is left out as ambiguous)
+      * character trigram index over the aliases, so a typo is compared only with
+        aliases that share a trigram, using bounded_edit_distance
+    """
+
+    def __init__(self, resolver=None, info=NFL_TEAM_INFO, extra_aliases=TEAM_NICKNAME_ALIASES):
+        self._resolver = resolver or TEAMS
+        self._info = info
+        self._extra_aliases = extra_aliases
+        self._lock = threading.Lock()
+        self._built_gen = None
+        self._nickname = {}
+        self._title = {}
+        self._aliases = {}
+        self._grams = {}
+
+    def _refresh(self) -> None:
+        gen = self._resolver.generation()
+        if gen == self._built_gen:
+            return
+        with self._lock:
+            if gen != self._built_gen:
+                self._build(self._resolver.titles())
+                self._built_gen = gen
+
+    def _build(self, titles: list[str]) -> None:
+        table = []
+        for title in titles:
+            code, city = self._info.get(title, (None, None))
+            if code is None:
+                logger.warning(f"No code/city for team {title!r}; matching it by nickname only")
+                code = normalize_team_text(title)
+            table.append((code, city, title))
+
+        seen = defaultdict(set)
+        for code, city, nick in table:
+            keys = (code, nick, city, f"{city} {nick}") if city else (code, nick)
+            for key in keys:
+                seen[normalize_team_text(key)].add(code)
+        known = {code for code, _city, _nick in table}
+        for key, code in self._extra_aliases.items():
+            if code in known:
+                seen[normalize_team_text(key)].add(code)
+        aliases = {key: next(iter(codes)) for key, codes in seen.items() if len(codes) == 1}
+
+        grams = defaultdict(set)   # trigram -> alias keys
+        for key in aliases:
+            if len(key) >= FUZZY_MIN_LEN:
+                for g in _ngrams(key):
+                    grams[g].add(key)
+
+        # swap in complete structures so readers never see a half-built index
+        self._nickname = {code: nick.upper() for code, _city, nick in table}
+        self._title = {code: nick for code, _city, nick in table}
+        self._aliases = aliases
+        self._grams = grams
+
+    def codes(self) -> list[str]:
+        self._refresh()
+        return list(self._nickname)
+
+    def nickname(self, code: str) -> str | None:
+        """COWBOYS for DAL (the UPPER form of the NFL_Teams.csv name)."""
+        self._refresh()
+        return self._nickname.get(code)
+
+    def title(self, code: str) -> str | None:
+        self._refresh()
+        return self._title.get(code)
+
+    def exact(self, text: str) -> str | None:
+        self._refresh()
+        return self._aliases.get(normalize_team_text(text))
+
+    def match(self, text: str) -> str | None:
+        """Team code for `text`: exact alias first, then the closest alias within the edit bound."""
+        self._refresh()
+        key = normalize_team_text(text)
+        code = self._aliases.get(key)
+        if code or not key:
+            return code
+        limit = _fuzzy_limit(len(key))
+        if not limit:
+            return None
+
+        shared = defaultdict(int)
+        for g in _ngrams(key):
+            for cand in self._grams.get(g, ()):
+                shared[cand] += 1
+
+        best, best_codes = limit + 1, set()
+        for cand in sorted(shared, key=shared.get, reverse=True):
+            d = bounded_edit_distance(key, cand, min(limit, best))
+            if d < best:
+                best, best_codes = d, {self._aliases[cand]}
+            elif d == best and d <= limit:
+                best_codes.add(self._aliases[cand])
+        # a typo equally close to two different teams is not a match
+        return next(iter(best_codes)) if len(best_codes) == 1 else None
+
+    def find(self, text: str, anchor: str = "start") -> str | None:
+        """
+        Team named by the words at the start (anchor="start") or end (anchor="end") of
+        `text`, e.g. the words either side of "vs" in a stream title. Exact aliases win
+        over typo matches; longer windows are tried before shorter ones.
+        """
+        self._refresh()
+        words = normalize_team_text(text).split()
+        if not words:
+            return None
+        if anchor == "end":
+            windows = [" ".join(words[-n:]) for n in range(min(_WORD_WINDOW, len(words)), 0, -1)]
+        else:
+            windows = [" ".join(words[:n]) for n in range(min(_WORD_WINDOW, len(words)), 0, -1)]
+        for w in windows:
+            code = self._aliases.get(w)
+            if code:
+                return code
+        for w in reversed(windows):
+            code = self.match(w)
+            if code:
+                return code
+        return None
+
+
+# Shared instance for the bots
+TEAM_MATCHER = TeamMatcher()
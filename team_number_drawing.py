@@ -2,7 +2,7 @@
 #
 # pip install nextcord
 # Run with: TOKEN=your_bot_token python team_number_drawing.py
-import os, json, random, asyncio, time, re
+import os, json, random, asyncio, time, re, copy
 import nextcord
 from nextcord.ext import commands
 from nextcord.ui import View, Button
@@ -10,8 +10,15 @@ from nextcord.ui import View, Button
 from dotenv import load_dotenv
 load_dotenv(".env.teamdraw")
 
+from team_names import TEAM_MATCHER
+
 # ==== CONFIG ====
 STATE_FILE = os.getenv("TEAM_ORDER_STATE_FILE", "team_order_state.json")
+# Append-only log of draw/draft events since the last snapshot of STATE_FILE.
+EVENTS_FILE = os.getenv("TEAM_ORDER_EVENTS_FILE", STATE_FILE + ".events")
+# Snapshot after this many logged events, or this long after the first unsnapshotted one.
+SNAPSHOT_EVERY_EVENTS = max(1, int(os.getenv("TEAM_ORDER_SNAPSHOT_EVERY", "25") or 25))
+SNAPSHOT_DELAY_SECONDS = float(os.getenv("TEAM_ORDER_SNAPSHOT_DELAY_SECONDS", "30") or 30)
 WURD_WHEEL_URL = os.getenv("WURD_WHEEL_URL", "https://wurd-madden.com/team-wheel").strip()
 SPIN_DURATION_SECONDS = max(4.0, min(float(os.getenv("TEAM_WHEEL_SPIN_SECONDS", "7.0")), 12.0))
 # Keep the draw locked while the website holds the winning number on screen.
@@ -34,13 +41,8 @@ NFL_TEAMS = [
     "HOU","IND","JAX","KC","LV","LAC","LAR","MIA","MIN","NE","NO","NYG","NYJ",
     "PHI","PIT","SEA","SF","TB","TEN","WAS"
 ]
-TEAM_ALIASES = {
-    "CARDINALS":"ARI","FALCONS":"ATL","RAVENS":"BAL","BILLS":"BUF","PANTHERS":"CAR",
-    "BEARS":"CHI","BENGALS":"CIN","BROWNS":"CLE","COWBOYS":"DAL","BRONCOS":"DEN","LIONS":"DET","PACKERS":"GB",
-    "TEXANS":"HOU","COLTS":"IND","JAGUARS":"JAX","CHIEFS":"KC","RAIDERS":"LV","CHARGERS":"LAC","RAMS":"LAR",
-    "DOLPHINS":"MIA","VIKINGS":"MIN","PATRIOTS":"NE","SAINTS":"NO","GIANTS":"NYG","JETS":"NYJ",
-    "EAGLES":"PHI","STEELERS":"PIT","SEAHAWKS":"SEA","49ERS":"SF","BUCCANEERS":"TB","TITANS":"TEN","COMMANDERS":"WAS"
-}
+# Nicknames, cities and full names are resolved by the shared matcher (team_names.py);
+# draft input only records exact codes/aliases, a typo gets a "did you mean" reply instead
 
 
 TEAM_FULL_NAMES = {
@@ -53,7 +55,6 @@ TEAM_FULL_NAMES = {
     "NYJ":"New York Jets", "PHI":"Philadelphia Eagles", "PIT":"Pittsburgh Steelers", "SEA":"Seattle Seahawks",
     "SF":"San Francisco 49ers", "TB":"Tampa Bay Buccaneers", "TEN":"Tennessee Titans", "WAS":"Washington Commanders",
 }
-FULL_TEAM_ALIASES = {name.upper(): code for code, name in TEAM_FULL_NAMES.items()}
 
 # ---- Context-aware !help (only active phase) ----
 
@@ -128,7 +129,7 @@ def fresh_state():
         "team_preferences": {}   # {user_id: [team_code, ...]} private ranked backup lists
     }
 
-def load_state():
+def read_snapshot():
     if not os.path.exists(STATE_FILE):
         return fresh_state()
 
@@ -151,14 +152,281 @@ def load_state():
     loaded.setdefault("team_preferences", {})
     return loaded
 
-def save_state(state):
+def save_state(state, durable=True):
     """Atomically save state so the Discord bot / future website never reads a half-written JSON file."""
     tmp_file = STATE_FILE + ".tmp"
     with open(tmp_file, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+        json.dump({**state, "event_seq": _event_seq}, f, indent=2)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
     os.replace(tmp_file, STATE_FILE)
 
-state = load_state()
+# ---- Event log ----
+# Every change to `state` is an event: a small dict applied by one of the
+# _apply_* functions below and appended as one JSON line to EVENTS_FILE.
+# STATE_FILE is a snapshot (same shape as always, plus "event_seq"); on startup
+# it is loaded and every later event in the log is applied again. Events carry
+# their random outcome (spin number, late-owner order), so replay is exact.
+# Every event is folded into the snapshot every SNAPSHOT_EVERY_EVENTS events
+# or SNAPSHOT_DELAY_SECONDS later, and the log is emptied after each snapshot.
+# The live wheel page reads STATE_FILE too, so a spin / close / reset also
+# rewrites it right away, but without fsync and without emptying the log:
+# until the next (fsync'd) snapshot the log still holds those events.
+state = fresh_state()
+_event_seq = 0             # seq of the last applied event
+_events_since_snapshot = 0
+_events_fh = None          # append handle for EVENTS_FILE
+_snapshot_handle = None    # pending loop.call_later for the next snapshot
+
+def publish_state():
+    """Rewrite STATE_FILE for the wheel page now (atomic rename, no fsync; the log is kept)."""
+    try:
+        save_state(state, durable=False)
+    except Exception as e:
+        print(f"⚠️ Could not publish {STATE_FILE}: {type(e).__name__}: {e}", flush=True)
+
+def _apply_reset(ev):
+    # Fresh number/draft state; private team preferences always survive.
+    saved_preferences = dict(state.get("team_preferences") or {})
+    state.clear()
+    state.update(fresh_state())
+    state["team_preferences"] = saved_preferences
+
+def _apply_button(ev):
+    state["button_message"] = ev.get("message")
+
+def _apply_preferences(ev):
+    state.setdefault("team_preferences", {})[ev["uid"]] = list(ev["teams"])
+    if ev.get("owner"):
+        state.setdefault("owner_names", {})[ev["uid"]] = ev["owner"]
+
+def _apply_clear_preferences(ev):
+    prefs = state.setdefault("team_preferences", {})
+    if ev.get("uid"):
+        prefs.pop(ev["uid"], None)
+    else:
+        prefs.clear()
+
+def _apply_spin(ev):
+    uid, number = ev["uid"], int(ev["number"])
+    pool = sorted(int(n) for n in state["available"])
+    state["available"].remove(number)
+    state["assigned"][uid] = number
+    state.setdefault("wheel_numbers", {})[uid] = number
+    state.setdefault("owner_names", {})[uid] = {
+        "username": ev["username"],
+        "display_name": ev["display_name"],
+    }
+    state["spin_seq"] = int(state.get("spin_seq", 0)) + 1
+    spin_event = {
+        "seq": state["spin_seq"],
+        "user_id": uid,
+        "username": ev["username"],
+        "display_name": ev["display_name"],
+        "number": number,
+        "remaining": len(state["available"]),
+        "started_at_ms": ev["started_at_ms"],
+        "duration_ms": ev["duration_ms"],
+        "pool": pool,
+    }
+    state["last_spin"] = spin_event
+    history = state.setdefault("spin_history", [])
+    history.append(dict(spin_event))
+    state["spin_history"] = history[-32:]
+    state["spin_active_until"] = ev["active_until"]
+
+def _apply_close(ev):
+    state.setdefault("owner_names", {}).update(ev.get("owners") or {})
+    state["closed"] = True
+    compact_numbers_with_mapping(late_uids=ev.get("late_uids"))
+
+    # init draft order (now includes non-spinners at the end)
+    pairs = sorted(state["assigned"].items(), key=lambda kv: kv[1])
+    state["draft"] = {
+        "open": False,
+        "order": [uid for uid, _ in pairs],
+        "index": 0,
+        "available": [],
+        "picks": {},
+        "history": []
+    }
+
+def _apply_start_draft(ev):
+    # (re)initialize the simple one-pass draft
+    d = state["draft"]
+    d["open"] = True
+    d["index"] = 0
+    d["available"] = NFL_TEAMS.copy()
+    d["picks"] = {}
+    d["history"] = []
+
+def _apply_pick(ev):
+    d = state["draft"]
+    uid, team = ev["uid"], ev["team"]
+    on_clock = _current_uid() == uid
+    d["available"].remove(team)
+    d["picks"][uid] = team
+    entry = {k: v for k, v in ev.items() if k not in ("type", "at")}
+    entry["index"] = d["index"]       # where the clock was, so an undo can put it back
+    entry["advanced"] = on_clock
+    d["history"].append(entry)
+    # A pick for someone who is not on the clock (!pickfor) leaves the turn alone.
+    if on_clock:
+        _advance_picker()
+
+def _apply_skip(ev):
+    _advance_picker()
+
+def _apply_undo(ev):
+    """Reverse one earlier pick event; its history entry is kept and marked undone."""
+    d = state["draft"]
+    live = [h for h in d["history"] if not h.get("undone_by")]
+    target = live[-1] if ev.get("pick_seq") is None else next(
+        h for h in reversed(live) if h.get("seq") == ev["pick_seq"]
+    )
+    target["undone_by"] = ev["seq"]
+    if target["team"] not in d["available"]:
+        d["available"].append(target["team"])
+    d["picks"].pop(target["uid"], None)
+    if target.get("advanced", True):
+        # History entries from older state files have no index; step back one turn.
+        d["index"] = target.get("index", max(0, d["index"] - 1))
+
+def _apply_end_draft(ev):
+    state["draft"]["open"] = False
+
+EVENT_APPLIERS = {
+    "reset": _apply_reset,
+    "button": _apply_button,
+    "preferences": _apply_preferences,
+    "clear_preferences": _apply_clear_preferences,
+    "spin": _apply_spin,
+    "close": _apply_close,
+    "start_draft": _apply_start_draft,
+    "pick": _apply_pick,
+    "skip": _apply_skip,
+    "undo": _apply_undo,
+    "end_draft": _apply_end_draft,
+}
+
+def record_event(kind, publish=False, **data):
+    """
+    Apply one event to `state` and append it to the event log.
+    publish=True also rewrites STATE_FILE right away (for what the wheel page shows).
+    """
+    global _event_seq
+    ev = {"seq": _event_seq + 1, "type": kind, "at": time.time(), **data}
+    EVENT_APPLIERS[kind](ev)
+    _event_seq = ev["seq"]
+    _append_event(ev)
+    if publish:
+        publish_state()
+    _schedule_snapshot()
+    return ev
+
+def _append_event(ev):
+    global _events_fh
+    if _events_fh is None:
+        _events_fh = open(EVENTS_FILE, "a", encoding="utf-8")
+    _events_fh.write(json.dumps(ev, separators=(",", ":")) + "\n")
+    _events_fh.flush()
+    os.fsync(_events_fh.fileno())
+
+def _schedule_snapshot():
+    global _events_since_snapshot, _snapshot_handle
+    _events_since_snapshot += 1
+    due_now = _events_since_snapshot >= SNAPSHOT_EVERY_EVENTS
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        if due_now:
+            write_snapshot()
+        return
+    if _snapshot_handle is not None:
+        if not due_now:
+            return  # the pending snapshot will pick this event up
+        _snapshot_handle.cancel()
+    _snapshot_handle = loop.call_later(0 if due_now else SNAPSHOT_DELAY_SECONDS, write_snapshot)
+
+def write_snapshot():
+    """Fold the event log into STATE_FILE and empty the log."""
+    global _events_fh, _events_since_snapshot, _snapshot_handle
+    if _snapshot_handle is not None:
+        _snapshot_handle.cancel()
+        _snapshot_handle = None
+    try:
+        save_state(state)
+    except Exception as e:
+        # The events are still in the log; the next snapshot (or a restart) retries.
+        print(f"⚠️ Could not write state snapshot: {type(e).__name__}: {e}", flush=True)
+        return
+    if _events_fh is not None:
+        _events_fh.close()
+        _events_fh = None
+    with open(EVENTS_FILE, "w", encoding="utf-8"):
+        pass
+    _events_since_snapshot = 0
+
+def load_state():
+    """
+    Load the snapshot into `state` and replay the events logged after it.
+
+    Only an unreadable final line (a crash mid-append) is skipped. Any other bad
+    line or failing event stops the replay: `state` is left as of the last good
+    event, the log is moved aside to EVENTS_FILE + ".failed-<time>" for a manual
+    look, and only then is the good part folded into a new snapshot.
+    """
+    global _event_seq
+    loaded = read_snapshot()
+    _event_seq = int(loaded.pop("event_seq", 0) or 0)
+    state.clear()
+    state.update(loaded)
+
+    try:
+        with open(EVENTS_FILE, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+
+    replayed = 0
+    failure = None
+    for n, line in enumerate(lines, start=1):
+        try:
+            ev = json.loads(line)
+            seq = int(ev["seq"])
+            apply = EVENT_APPLIERS[ev["type"]]
+        except Exception as e:
+            if n == len(lines):
+                # torn last line from a crash mid-append; everything before it counts
+                print(f"⚠️ Skipping torn last line of {EVENTS_FILE}: {type(e).__name__}: {e}", flush=True)
+                break
+            failure = f"line {n} is unreadable ({type(e).__name__}: {e})"
+            break
+        if seq <= _event_seq:
+            continue  # already in the snapshot
+        before = copy.deepcopy(state)
+        try:
+            apply(ev)
+        except Exception as e:
+            # undo the half-applied event
+            state.clear()
+            state.update(before)
+            failure = f"event {seq} ({ev['type']}) on line {n} failed ({type(e).__name__}: {e})"
+            break
+        _event_seq = seq
+        replayed += 1
+
+    if failure:
+        aside = f"{EVENTS_FILE}.failed-{int(time.time())}"
+        os.replace(EVENTS_FILE, aside)
+        print(f"⚠️ Replay of {EVENTS_FILE} stopped: {failure}. Kept the log as {aside}; "
+              f"state is as of event {_event_seq}.", flush=True)
+
+    if lines:
+        # fold it in now so new appends never follow a torn line
+        print(f"Replayed {replayed} event(s) from {EVENTS_FILE} over {STATE_FILE}", flush=True)
+        write_snapshot()
 
 # ==== UI ====
 class TeamPreferenceModal(nextcord.ui.Modal):
@@ -189,7 +457,10 @@ class TeamPreferenceModal(nextcord.ui.Modal):
 
         teams, invalid, duplicates = _parse_preference_text(str(self.ranked_teams.value or ""))
         if invalid:
-            shown = ", ".join(f"`{x}`" for x in invalid[:8])
+            def _shown(x):
+                guess = _suggest_team(x)
+                return f"`{x}` (did you mean **{guess}**?)" if guess else f"`{x}`"
+            shown = ", ".join(_shown(x) for x in invalid[:8])
             extra = f" (+{len(invalid)-8} more)" if len(invalid) > 8 else ""
             await interaction.response.send_message(
                 "❌ I couldn't recognize: " + shown + extra +
@@ -202,13 +473,14 @@ class TeamPreferenceModal(nextcord.ui.Modal):
             return
 
         async with lock:
-            state.setdefault("team_preferences", {})[self.user_id] = teams
             member = interaction.user
-            state.setdefault("owner_names", {})[self.user_id] = {
-                "username": getattr(member, "name", str(member)),
-                "display_name": getattr(member, "display_name", getattr(member, "name", str(member))),
-            }
-            save_state(state)
+            record_event(
+                "preferences", uid=self.user_id, teams=teams,
+                owner={
+                    "username": getattr(member, "name", str(member)),
+                    "display_name": getattr(member, "display_name", getattr(member, "name", str(member))),
+                },
+            )
 
         preview = " > ".join(teams[:12])
         if len(teams) > 12:
@@ -348,34 +620,18 @@ class NumberView(View):
 
                 pool = sorted(int(n) for n in state["available"])
                 number = SECURE_RANDOM.choice(pool)
-                state["available"].remove(number)
-                state["assigned"][uid] = number
-                state.setdefault("wheel_numbers", {})[uid] = number
-                state.setdefault("owner_names", {})[uid] = {
-                    "username": getattr(member, "name", interaction.user.name),
-                    "display_name": getattr(member, "display_name", interaction.user.display_name),
-                }
-
-                state["spin_seq"] = int(state.get("spin_seq", 0)) + 1
-                started_at_ms = int(time.time() * 1000)
-                duration_ms = int(SPIN_DURATION_SECONDS * 1000)
-                spin_event = {
-                    "seq": state["spin_seq"],
-                    "user_id": uid,
-                    "username": getattr(member, "name", interaction.user.name),
-                    "display_name": getattr(member, "display_name", interaction.user.display_name),
-                    "number": number,
-                    "remaining": len(state["available"]),
-                    "started_at_ms": started_at_ms,
-                    "duration_ms": duration_ms,
-                    "pool": pool,
-                }
-                state["last_spin"] = spin_event
-                history = state.setdefault("spin_history", [])
-                history.append(dict(spin_event))
-                state["spin_history"] = history[-32:]
-                state["spin_active_until"] = time.time() + SPIN_DURATION_SECONDS + RESULT_HOLD_SECONDS + 0.35
-                save_state(state)
+                # publish: the wheel page starts animating as soon as it sees last_spin
+                record_event(
+                    "spin", publish=True,
+                    uid=uid,
+                    number=number,
+                    username=getattr(member, "name", interaction.user.name),
+                    display_name=getattr(member, "display_name", interaction.user.display_name),
+                    started_at_ms=int(time.time() * 1000),
+                    duration_ms=int(SPIN_DURATION_SECONDS * 1000),
+                    active_until=time.time() + SPIN_DURATION_SECONDS + RESULT_HOLD_SECONDS + 0.35,
+                )
+                spin_event = state["last_spin"]
 
             # At this point the result is official and the website can see it.
             await interaction.edit_original_message(
@@ -521,7 +777,7 @@ def format_mapping(guild, mapping, title="Old → New Mapping"):
             lines.append(f"• **#{new_num}** — {display} *(wheel #{old_num})*")
     return "\n".join(lines)
 
-def compact_numbers_with_mapping(guild, late_uids=None):
+def compact_numbers_with_mapping(late_uids=None):
     """
     Compact actual wheel spins by their original 1..32 number.
     Eligible users who never spun are appended after all spinners.
@@ -555,7 +811,6 @@ def compact_numbers_with_mapping(guild, late_uids=None):
     state["late_users"] = late_uids
     state["final_mapping"] = [list(item) for item in mapping]
     state["available"] = []  # wheel is no longer active after close
-    save_state(state)
     return mapping
 
 
@@ -714,7 +969,13 @@ def _norm_team(s):
     key = str(s).strip().upper()
     if key in NFL_TEAMS:
         return key
-    return TEAM_ALIASES.get(key, "") or FULL_TEAM_ALIASES.get(key, "")
+    code = TEAM_MATCHER.exact(key)
+    return code if code in NFL_TEAMS else ""
+
+def _suggest_team(s):
+    """Closest team for a typo ("Cowbys" -> "DAL"), to offer back; never recorded as a pick."""
+    code = TEAM_MATCHER.match(str(s or "").strip())
+    return code if code in NFL_TEAMS else ""
 
 def _parse_preference_text(text: str):
     """Return (team_codes, invalid_items, duplicate_items), preserving rank order."""
@@ -760,7 +1021,6 @@ def _current_uid():
 def _advance_picker():
     d = state["draft"]
     d["index"] += 1
-    save_state(state)
 
 def _format_available():
     d = state.get("draft") or {}
@@ -853,8 +1113,6 @@ def _phase_flags():
 @commands.has_permissions(manage_guild=True)
 async def startorder(ctx):
     """Reset everything, retire the previous button, post a fresh button, and pin it."""
-    global state
-
     # Retire the previously tracked draw button BEFORE replacing state. This keeps
     # an old season/test button from looking active after a new drawing begins.
     await disable_button_message()
@@ -862,10 +1120,7 @@ async def startorder(ctx):
 
     # Fresh number/draft state, but preserve private team preferences.
     # Owners can submit them days early; use !resetchoices if you really want to wipe them.
-    saved_preferences = dict(state.get("team_preferences") or {})
-    state = fresh_state()
-    state["team_preferences"] = saved_preferences
-    save_state(state)
+    record_event("reset", publish=True)
 
     # Housekeeping: unpin any previous final-results pins
     await unpin_previous_results(ctx.channel)
@@ -883,8 +1138,7 @@ async def startorder(ctx):
         view=view,
         allowed_mentions=ALLOWED,
     )
-    state["button_message"] = {"channel_id": ctx.channel.id, "message_id": sent.id}
-    save_state(state)
+    record_event("button", message={"channel_id": ctx.channel.id, "message_id": sent.id})
 
     # Pin the new start message
     try:
@@ -1041,8 +1295,9 @@ async def mychoices(ctx):
 async def clearmychoices(ctx):
     uid = str(ctx.author.id)
     async with lock:
-        existed = bool((state.get("team_preferences") or {}).pop(uid, None))
-        save_state(state)
+        existed = bool((state.get("team_preferences") or {}).get(uid))
+        if existed:
+            record_event("clear_preferences", uid=uid)
     await ctx.send(
         "🗑️ Your saved team preference list was cleared." if existed else "You did not have a saved team preference list.",
         allowed_mentions=ALLOWED, delete_after=25,
@@ -1115,8 +1370,7 @@ async def resetchoices(ctx):
     """Admin: clear all saved preference lists without touching number/draft state."""
     async with lock:
         count = len(state.get("team_preferences") or {})
-        state["team_preferences"] = {}
-        save_state(state)
+        record_event("clear_preferences")
     await ctx.send(f"🗑️ Cleared **{count}** saved team preference list(s). The number draw was not changed.", allowed_mentions=ALLOWED)
 
 def _send_chunks_factory(max_len=1900):
@@ -1157,12 +1411,10 @@ async def closeorder(ctx):
             )
             return
 
-        owner_names = state.setdefault("owner_names", {})
-        for m in eligible_members:
-            owner_names[str(m.id)] = {
-                "username": m.name,
-                "display_name": m.display_name,
-            }
+        owners = {
+            str(m.id): {"username": m.name, "display_name": m.display_name}
+            for m in eligible_members
+        }
 
         assigned_uids = set(state.get("assigned", {}).keys())
         late_uids = [str(m.id) for m in eligible_members if str(m.id) not in assigned_uids]
@@ -1171,20 +1423,9 @@ async def closeorder(ctx):
         # so there is no commissioner-controlled ordering within that last group.
         SECURE_RANDOM.shuffle(late_uids)
 
-        state["closed"] = True
-        mapping = compact_numbers_with_mapping(ctx.guild, late_uids=late_uids)
-
-        # init draft order (now includes non-spinners at the end)
-        pairs = sorted(state["assigned"].items(), key=lambda kv: kv[1])
-        state["draft"] = {
-            "open": False,
-            "order": [uid for uid, _ in pairs],
-            "index": 0,
-            "available": [],
-            "picks": {},
-            "history": []
-        }
-        save_state(state)
+        # The shuffled order is part of the event, so a replay closes the same way.
+        record_event("close", publish=True, owners=owners, late_uids=late_uids)
+        mapping = state["final_mapping"]
 
     try:
         await ctx.message.add_reaction("🔒")
@@ -1244,11 +1485,7 @@ async def showfinal(ctx):
 @commands.has_permissions(manage_guild=True)
 async def resetorder(ctx):
     """Reset number/draft state while preserving saved team preferences."""
-    global state
-    saved_preferences = dict(state.get("team_preferences") or {})
-    state = fresh_state()
-    state["team_preferences"] = saved_preferences
-    save_state(state)
+    record_event("reset", publish=True)
     await ctx.send("Order has been reset. Saved team preferences were kept. Use `!startorder` to begin again.")
 
 # ==== RUN ====
@@ -1279,14 +1516,7 @@ async def startdraft(ctx):
             await ctx.send("Draft order is empty. Did anyone draw numbers?", allowed_mentions=ALLOWED)
             return
 
-        # (re)initialize the simple one-pass draft
-        d["open"] = True
-        d["index"] = 0
-        d["available"] = NFL_TEAMS.copy()
-        d["picks"] = {}
-        d["history"] = []
-
-        save_state(state)  # persist before announcing
+        record_event("start_draft")  # persist before announcing
 
         # who is up first?
         cur_uid = _current_uid()
@@ -1414,7 +1644,10 @@ async def pick(ctx, *, team: str):
                 msg_primary = f"You already picked **{d['picks'][uid]}**."
             else:
                 code = _norm_team(team)
-                if not code:
+                guess = "" if code else _suggest_team(team)
+                if guess:
+                    msg_primary = f"Did you mean **{guess}**? Use `!pick {guess}`."
+                elif not code:
                     msg_primary = (
                         "❌ Unknown team. Please use a valid team code (e.g., `DAL`, `SF`, `NE`) "
                         "or a full name (e.g., `Cowboys`, `49ers`, `Patriots`).\n"
@@ -1423,14 +1656,10 @@ async def pick(ctx, *, team: str):
                 elif code not in d["available"]:
                     msg_primary = "That team is already taken."
                 else:
-                    d["available"].remove(code)
-                    d["picks"][uid] = code
-                    d["history"].append({"uid": uid, "team": code})
-                    save_state(state)
+                    record_event("pick", uid=uid, team=code)
 
                     msg_primary = f"{ctx.author.mention} picked **{code}**."
 
-                    _advance_picker()
                     next_uid = _current_uid()
                     if next_uid is None:
                         draft_just_completed = True
@@ -1493,18 +1722,14 @@ async def pickfromlist(ctx):
                         # Do not reveal how many teams the owner ranked or which ones were unavailable.
                         msg_primary = f"⚠️ I couldn't make an automatic pick for {who}. They remain on the clock."
                     else:
-                        d["available"].remove(chosen)
-                        d["picks"][uid] = chosen
-                        d["history"].append({
-                            "uid": uid, "team": chosen, "by": str(ctx.author.id),
-                            "from_preferences": True, "preference_rank": rank,
-                        })
-                        save_state(state)
+                        record_event(
+                            "pick", uid=uid, team=chosen, by=str(ctx.author.id),
+                            from_preferences=True, preference_rank=rank,
+                        )
                         team_name = TEAM_FULL_NAMES.get(chosen, chosen)
                         # Public result intentionally does not reveal that a preference list was used
                         # or where this team ranked on the owner's private list.
                         msg_primary = f"{who} picked **{team_name} ({chosen})**."
-                        _advance_picker()
                         next_uid = _current_uid()
                         if next_uid is None:
                             draft_just_completed = True
@@ -1542,23 +1767,21 @@ async def pickfor(ctx, member: nextcord.Member, *, team: str):
                 msg_primary = f"{member.mention} already picked **{d['picks'][uid]}**."
             else:
                 code = _norm_team(team)
-                if not code:
+                guess = "" if code else _suggest_team(team)
+                if guess:
+                    msg_primary = f"Did you mean **{guess}**? Use `!pickfor {member.id} {guess}`."
+                elif not code:
                     msg_primary = "Unknown team. Use a code like `DAL` or a name like `Cowboys`."
                 elif code not in d["available"]:
                     msg_primary = "That team is already taken."
                 else:
-                    # Apply the pick
-                    d["available"].remove(code)
-                    d["picks"][uid] = code
-                    d["history"].append({"uid": uid, "team": code, "by": str(ctx.author.id), "forced": True})
-                    save_state(state)
+                    # Apply the pick; it only advances the turn if they were on the clock
+                    was_on_clock = _current_uid() == uid
+                    record_event("pick", uid=uid, team=code, by=str(ctx.author.id), forced=True)
 
                     msg_primary = f"🛠️ {ctx.author.mention} picked **{code}** for {member.mention}."
 
-                    # If they were on the clock, advance
-                    cur_uid = _current_uid()
-                    if cur_uid == uid:
-                        _advance_picker()
+                    if was_on_clock:
                         next_uid = _current_uid()
                         if next_uid is None:
                             draft_just_completed = True
@@ -1613,7 +1836,7 @@ async def skip(ctx):
                 msg = "Draft is already complete."
             else:
                 # advance turn
-                _advance_picker()
+                record_event("skip", uid=cur_uid)
                 next_uid = _current_uid()
                 if next_uid is None:
                     msg = "Skipped. **Draft complete.**"
@@ -1635,26 +1858,22 @@ async def undo(ctx):
         d = state.get("draft")
         if not d or not d.get("open"):
             msg = "Draft not started. Use `!startdraft`."
-        elif not d.get("history"):
+        elif not any(not h.get("undone_by") for h in d.get("history") or []):
             msg = "No picks to undo."
         else:
-            last = d["history"].pop()
+            # Reverse the latest pick that has not been undone yet: the team goes back
+            # to the pool and, if that pick moved the clock, the clock goes back to it.
+            last = [h for h in d["history"] if not h.get("undone_by")][-1]
+            record_event("undo", pick_seq=last.get("seq"), uid=last["uid"], team=last["team"])
             uid = last["uid"]
             team = last["team"]
 
-            # return team and remove assignment
-            if team not in d["available"]:
-                d["available"].append(team)
-            d["picks"].pop(uid, None)
-
-            # rewind turn to the user who just got undone
-            d["index"] = max(0, d["index"] - 1)
-
-            save_state(state)
-
             member = ctx.guild.get_member(int(uid))
             who = member.mention if member else f"<@{uid}>"
-            msg = f"Undid last pick: {who} — **{team}**. It’s their turn again."
+            if last.get("advanced", True):
+                msg = f"Undid last pick: {who} — **{team}**. It’s their turn again."
+            else:
+                msg = f"Undid last pick: {who} — **{team}**. The turn did not change."
 
     await ctx.send(msg, allowed_mentions=ALLOWED)
 
@@ -1666,8 +1885,7 @@ async def enddraft(ctx):
     async with lock:
         d = state.get("draft")
         if d:
-            d["open"] = False
-            save_state(state)
+            record_event("end_draft")
             had_draft = True
 
     if not had_draft:
@@ -1741,4 +1959,5 @@ async def help_cmd(ctx):
     await send_chunks(ctx, msg)
 
 
+load_state()
 bot.run(TOKEN)
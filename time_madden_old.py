@@ -18,13 +18,12 @@ import sys
 import asyncio
 import logging
 import requests
-import hashlib
+import io
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 from nextcord import File, AllowedMentions
 
-from collections import defaultdict, OrderedDict
-import glob
-
 from logging.handlers import RotatingFileHandler
 from nfl_teams_divisions import nfl_teams  # Import the complete NFL teams mapping
 
@@ -32,12 +31,33 @@ from ai_bot.ai_handler import generate_ai_reply, should_bot_stay_quiet
 from ai_bot.ai_responses import is_bot_mentioned
 from ai_bot.ai_memory import update_last_message_time
 
-from ai_bot.lobby_bot import lobby_personality_loop, load_ai_advance_info
+from ai_bot.lobby_bot import (
+    send_personality_messages, next_personality_check, load_ai_advance_info, PERSONALITY_ENABLED,
+)
 from flyers.pipeline import handle_game_stream_post
 from flyers.renderer import generate_flyer_with_fallback
 from flyers.ai_generator import build_flyer_caption, build_flyer_image_prompt
 from flyers.registry import registry_has, registry_put
 from flyers.poster import post_flyer_with_everyone, watch_first_link_and_edit
+from message_log.archive import MessageArchive, MESSAGE_ARCHIVE_DB
+from message_log.reader import (
+    DEFAULT_LOG_LOOKBACK_DAYS, DEFAULT_FORUM_LIMIT, LEGACY_LOG_GLOB,
+    read_seed_entries, az_day_bounds,
+    render_day_all_forums, render_forum, render_user, render_search, render_file_payload,
+)
+from message_log.sink import setup_message_log, log_message, message_logger, MESSAGE_LOG_GLOB
+from message_log.log_queue import install_queue_logging, stop_queue_logging, LOG_QUEUE_BLOCK_SEC
+from message_router import MessageRouter, STOP
+from team_names import TEAMS, TEAM_MATCHER
+from member_index import MEMBER_INDEX, MemberTeamIndex
+from state_store import StateStore, STATE_DB
+from week_state import WeekState, ADVANCE
+from streamers_registry import open_streamers_registry
+from scheduler import SCHEDULER
+from job_queue import JobQueue, RetryJob
+from activity_tracker import ActivityTracker
+import channel_reconcile
+from ap_index import APIndex, RETURN as AP_RETURN, normalize_id as _normalize_id, date_from_str as _date_from_str
 
 try:
     from zoneinfo import ZoneInfo
@@ -59,12 +79,6 @@ ADMIN_ROLE_NAME = 'Admin'  # Admin role name
 # AUTHORIZED_USERS stored as comma-separated string -> convert to list of ints
 AUTHORIZED_USERS = [int(uid.strip()) for uid in os.getenv("AUTHORIZED_USERS", "").split(",") if uid.strip()]  # Bernard and me
 
-# Key: channel_id, Value: {"created_at": datetime, "member_ids": [member1_id, member2_id], "responses": set()}
-channel_activity_tracker = {}
-
-# Add a new dictionary to track last reminder times - used in check_inactivity function
-last_reminder_time = {}
-
 # Configure logging
 logger = logging.getLogger('discord_bot')
 logger.setLevel(logging.INFO)
@@ -81,7 +95,6 @@ file_handler = RotatingFileHandler('bot.log', maxBytes=5 * 1024 * 1024, backupCo
 GG_COOLDOWN_SEC = 600  # 10 minutes
 _last_gg_alert_ts = 0.0
 
-EXPORT_RETRY_IN_PROGRESS = False
 EXPORT_MAX_ATTEMPTS = 5
 EXPORT_RETRY_DELAY = 120  # seconds
 
@@ -130,9 +143,6 @@ COMMISSIONER_ROLE_NAME = os.getenv(
 COMMISSIONER_ADVANCE_FOLLOWUP_MINUTES = int(
     os.getenv("COMMISSIONER_ADVANCE_FOLLOWUP_MINUTES", "30") or 30
 )
-COMMISSIONER_ADVANCE_POLL_SECONDS = int(
-    os.getenv("COMMISSIONER_ADVANCE_POLL_SECONDS", "30") or 30
-)
 COMMISSIONER_ADVANCE_STATE_FILE = "data/commissioner_advance_reminder.json"
 _commissioner_claim_lock = asyncio.Lock()
 
@@ -186,19 +196,16 @@ def load_gotw_config():
 
 
 def load_gotw_state():
-    if os.path.exists(GOTW_STATE_FILE):
-        try:
-            with open(GOTW_STATE_FILE, "r") as f:
-                return json.load(f)
-        except:
-            pass
-    return {}
+    try:
+        return STATE.gotw_state()
+    except Exception as e:
+        print(f"[GOTW] Failed to load state: {e}")
+        return {}
 
 
 def save_gotw_state(state):
     try:
-        with open(GOTW_STATE_FILE, "w") as f:
-            json.dump(state, f)
+        STATE.set_gotw_state(state["last_week_posted"], state.get("pairs", []))
     except Exception as e:
         print(f"[GOTW] Failed to save state: {e}")
 
@@ -222,25 +229,25 @@ async def select_games_of_the_week():
         print("[GOTW] Disabled in config.")
         return
 
-    if _current_week is None:
+    if WEEK.week is None:
         print("[GOTW] No current week loaded yet.")
         return
 
-    if _current_week < config.get("start_week", 5):
+    if WEEK.week < config.get("start_week", 5):
         print("[GOTW] Week below start threshold.")
         return
 
-    if _current_week in PLAYOFF_WEEKS:
+    if WEEK.week in PLAYOFF_WEEKS:
         print("[GOTW] Skipping playoffs.")
         return
 
-    if not _current_pairs:
+    if not WEEK.pairs:
         print("[GOTW] No matchups loaded yet.")
         return
 
     state = load_gotw_state()
 
-    if state.get("last_week_posted") == _current_week:
+    if state.get("last_week_posted") == WEEK.week:
         print("[GOTW] Already posted for this week.")
 
         saved_pairs = state.get("pairs", [])
@@ -275,19 +282,13 @@ async def select_games_of_the_week():
         print("[GOTW] Guild not found.")
         return
 
-    team_to_member = {}
-    for m in guild.members:
-        if getattr(m, "bot", False):
-            continue
-        t = extract_team_from_nick(m.display_name or "")
-        if t:
-            team_to_member[t] = m
+    team_to_member = _member_index(guild).team_to_member()
 
     ap_list = load_ap_users()
 
     scored_games = []
 
-    for teamA, teamB in _current_pairs:
+    for teamA, teamB in WEEK.pairs:
 
         teamA = canonical_team(teamA)
         teamB = canonical_team(teamB)
@@ -360,7 +361,7 @@ async def select_games_of_the_week():
     await post_gotw_message()
 
     save_gotw_state({
-        "last_week_posted": _current_week,
+        "last_week_posted": WEEK.week,
         "pairs": [list(p) for p in _current_gotw_pairs]
     })
 
@@ -372,7 +373,7 @@ async def post_gotw_message():
 
     lines = [
         "🏆━━━━━━━━━━━━━━━━━━━━━━",
-        f"WURD • WEEK {_current_week}",
+        f"WURD • WEEK {WEEK.week}",
         "GAMES OF THE WEEK",
         "━━━━━━━━━━━━━━━━━━━━━━🏆",
         ""
@@ -393,11 +394,19 @@ async def post_gotw_message():
     except Exception as e:
         print(f"[GOTW] Failed to pin message: {e}")
 
-async def schedule_games_of_the_week():
+def schedule_games_of_the_week(advance_key: str) -> bool:
+    """Queue the GOTW post `delay_seconds` out; at most once per advance."""
     config = load_gotw_config()
     delay = config.get("delay_seconds", 480)
-    await asyncio.sleep(delay)
-    await select_games_of_the_week()
+    return JOBS.enqueue("gotw_post", f"gotw:{advance_key}", {"week": WEEK.week}, delay=delay)
+
+def _channel_member_ids(ch) -> list[int]:
+    """Players of a matchup channel: the (non-bot) members with an explicit read overwrite."""
+    return [
+        target.id
+        for target, overwrite in ch.overwrites.items()
+        if isinstance(target, nextcord.Member) and overwrite.read_messages is True and not target.bot
+    ]
 
 async def rebuild_channel_activity():
     guild = bot.get_guild(GUILD_ID)
@@ -408,149 +417,116 @@ async def rebuild_channel_activity():
     if not category or not isinstance(category, nextcord.CategoryChannel):
         return
 
+    # channels deleted while the bot was down
+    present = {ch.id for ch in category.text_channels}
+    ACTIVITY.forget([cid for cid in ACTIVITY.channel_ids() if cid not in present])
+
     for ch in category.text_channels:
-        # 🔥 Always rebuild tracker from explicit member overwrites
-        member_ids = []
-
-        for target, overwrite in ch.overwrites.items():
-            if (
-                isinstance(target, nextcord.Member)
-                and overwrite.read_messages is True
-                and not target.bot
-            ):
-                member_ids.append(target.id)
-
-        tracker = {
-            "created_at": datetime.now(pytz.utc),
-            "member_ids": member_ids,
-            "responses": set()
-        }
+        # 🔥 Members come from the explicit member overwrites
+        member_ids = _channel_member_ids(ch)
 
-        channel_activity_tracker[ch.id] = tracker
+        # Stored state for the same players is current (on_message kept it up to date)
+        known = ACTIVITY.get(ch.id)
+        if known and set(known["member_ids"]) == set(member_ids):
+            continue
 
-        # 🔎 Rebuild response set from message history
+        # 🔎 New or changed channel: rebuild its response set from message history
+        responses = set()
         try:
             async for msg in ch.history(limit=100):
-                if msg.author.id in tracker["member_ids"]:
-                    tracker["responses"].add(msg.author.id)
+                if msg.author.id in member_ids:
+                    responses.add(msg.author.id)
         except Exception as e:
             logger.warning(f"History scan failed for {ch.name}: {e}")
 
-async def pre_advance_reminder_loop():
-    await asyncio.sleep(15)
-
-    while True:
-        try:
-            st = _load_week_state()
-
-            week = int(st.get("week", 0))
-            matchups = st.get("matchups", [])
-            pre_sent = st.get("pre_reminder_sent", False)
-            advance_time_str = st.get("advance_time")
-
-            # Only run for regular season
-            if not week or week < 1 or week > 18:
-                await asyncio.sleep(60)
-                continue
-
-            if not advance_time_str:
-                await asyncio.sleep(60)
-                continue
-
-            tz = pytz.timezone("US/Arizona")
-            now = datetime.now(tz)
+        created_at = ch.created_at.timestamp() if ch.created_at else None
+        ACTIVITY.track(ch.id, member_ids, created_at=created_at, responses=responses)
 
-            # 🔥 Convert stored advance time
-            advance_time = datetime.fromisoformat(advance_time_str).astimezone(tz)
+PRE_ADVANCE_REMINDER_JOB = "pre_advance_reminder"
 
-            # 🔥 HARD RULE: 23 hours AFTER advance
-            reminder_time = advance_time + timedelta(hours=23)
+def _plan_pre_advance_reminder() -> None:
+    """(Re)schedule the 24h scheduling reminder for the current week, or drop it."""
+    week = WEEK.week or 0
 
-            # logger.info(
-            #     "[24H DEBUG] week=%s | pre_sent=%s | advance_time_az=%s | reminder_time_az=%s | now_az=%s",
-            #     week,
-            #     pre_sent,
-            #     advance_time.strftime("%Y-%m-%d %I:%M:%S %p %Z"),
-            #     reminder_time.strftime("%Y-%m-%d %I:%M:%S %p %Z"),
-            #     now.strftime("%Y-%m-%d %I:%M:%S %p %Z"),
-            # )
-
-            # Only fire once
-            if now >= reminder_time and not pre_sent:
+    # Only run for regular season, once per advance
+    if week < 1 or week > 18 or not WEEK.advance_time or WEEK.pre_reminder_sent:
+        SCHEDULER.cancel(PRE_ADVANCE_REMINDER_JOB)
+        return
 
-                guild = bot.get_guild(GUILD_ID)
-                category = guild.get_channel(CATEGORY_ID)
+    # 🔥 HARD RULE: 23 hours AFTER advance
+    advance_time = datetime.fromisoformat(WEEK.advance_time)
+    SCHEDULER.schedule(
+        PRE_ADVANCE_REMINDER_JOB,
+        advance_time + timedelta(hours=23),
+        _send_pre_advance_reminder,
+        note=f"24h scheduling reminder, week {week}",
+    )
 
-                for ch in category.text_channels:
-                    tracker = channel_activity_tracker.get(ch.id)
-                    if not tracker:
-                        continue
+async def _send_pre_advance_reminder():
+    try:
+        guild = bot.get_guild(GUILD_ID)
+        category = guild.get_channel(CATEGORY_ID)
 
-                    member_ids = tracker.get("member_ids", [])
-                    if not member_ids:
-                        continue
+        ap_list = load_ap_users()
 
-                    ap_list = load_ap_users()
+        for ch in category.text_channels:
+            tracker = ACTIVITY.get(ch.id)
+            if not tracker:
+                continue
 
-                    # 🔥 Check AP status
-                    ap_users_in_channel = [
-                        mid for mid in member_ids
-                        if is_on_ap(mid, ap_list)
-                    ]
+            member_ids = tracker.get("member_ids", [])
+            if not member_ids:
+                continue
 
-                    # 🚫 Skip if ANY user is on AP
-                    if ap_users_in_channel:
-                        logger.info(f"[24H REMINDER SKIP] {ch.name} has AP user(s), skipping.")
-                        continue
+            # 🔥 Check AP status
+            ap_users_in_channel = [
+                mid for mid in member_ids
+                if is_on_ap(mid, ap_list)
+            ]
 
-                    # Normal non-responder logic
-                    non_responders = [
-                        mid for mid in member_ids
-                        if mid not in tracker["responses"]
-                    ]
+            # 🚫 Skip if ANY user is on AP
+            if ap_users_in_channel:
+                logger.info(f"[24H REMINDER SKIP] {ch.name} has AP user(s), skipping.")
+                continue
 
-                    if not non_responders:
-                        continue
+            # Normal non-responder logic
+            non_responders = [
+                mid for mid in member_ids
+                if mid not in tracker["responses"]
+            ]
 
-                    mentions = " ".join(
-                        guild.get_member(mid).mention
-                        for mid in non_responders
-                        if guild.get_member(mid)
-                    )
+            if not non_responders:
+                continue
 
-                    await ch.send(
-                        f"🔔 **24-Hour Scheduling Reminder**\n"
-                        f"{mentions}\n"
-                        "Advance is approaching tomorrow.\n"
-                        "Please confirm scheduling.\n"
-                        "Failure to communicate may result in AP status.",
-                        allowed_mentions=AllowedMentions(users=True)
-                    )
+            mentions = " ".join(
+                guild.get_member(mid).mention
+                for mid in non_responders
+                if guild.get_member(mid)
+            )
 
-                    await asyncio.sleep(1.2)
+            await ch.send(
+                f"🔔 **24-Hour Scheduling Reminder**\n"
+                f"{mentions}\n"
+                "Advance is approaching tomorrow.\n"
+                "Please confirm scheduling.\n"
+                "Failure to communicate may result in AP status.",
+                allowed_mentions=AllowedMentions(users=True)
+            )
 
-                # 🔒 Mark as sent (prevents spam)
-                _save_week_state(
-                    week,
-                    matchups,
-                    pre_sent=True,
-                    advance_time=advance_time_str
-                )
+            await asyncio.sleep(1.2)
 
-            await asyncio.sleep(60)
+        # 🔒 Mark as sent (prevents spam); the WEEK subscriber drops the job
+        WEEK.mark_pre_reminder_sent()
 
-        except Exception as e:
-            logger.warning(f"pre_advance_reminder_loop error: {e}")
-            await asyncio.sleep(120)
+    except Exception as e:
+        logger.warning(f"pre-advance reminder error: {e}")
+        SCHEDULER.schedule_in(PRE_ADVANCE_REMINDER_JOB, 120, _send_pre_advance_reminder,
+                              note="24h scheduling reminder (retry)")
 
 
 def _load_commissioner_advance_state() -> dict:
     try:
-        with open(COMMISSIONER_ADVANCE_STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data if isinstance(data, dict) else {}
-    except FileNotFoundError:
-        return {}
+        return STATE.commissioner_advance()
     except Exception as e:
         logger.warning(f"Could not load commissioner advance state: {e}")
         return {}
@@ -558,11 +534,7 @@ def _load_commissioner_advance_state() -> dict:
 
 def _save_commissioner_advance_state(state: dict) -> None:
     try:
-        os.makedirs(os.path.dirname(COMMISSIONER_ADVANCE_STATE_FILE), exist_ok=True)
-        tmp = COMMISSIONER_ADVANCE_STATE_FILE + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2)
-        os.replace(tmp, COMMISSIONER_ADVANCE_STATE_FILE)
+        STATE.set_commissioner_advance(state)
     except Exception as e:
         logger.error(f"Could not save commissioner advance state: {e}")
 
@@ -732,107 +704,139 @@ async def _fetch_commissioner_reminder_message(state: dict):
         return None
 
 
-async def commissioner_advance_reminder_loop():
-    await bot.wait_until_ready()
-    await asyncio.sleep(10)
+COMMISSIONER_ADVANCE_DUE_JOB = "commissioner_advance_due"
+COMMISSIONER_ADVANCE_FOLLOWUP_JOB = "commissioner_advance_followup"
 
-    while not bot.is_closed():
-        try:
-            if not COMMISSIONER_ADVANCE_CHANNEL_ID:
-                await asyncio.sleep(120)
-                continue
+def _current_commissioner_advance():
+    """(info, advance_dt, state) for the scheduled advance, or None; starts fresh state for a new advance."""
+    info = _load_scheduled_advance_info()
+    if not info:
+        return None
 
-            info = _load_scheduled_advance_info()
-            if not info:
-                await asyncio.sleep(COMMISSIONER_ADVANCE_POLL_SECONDS)
-                continue
+    advance_dt = _parse_scheduled_advance(info["advance_time_iso"])
+    current_week = info.get("current_week", info.get("week"))
+    advance_to_week = info.get("advance_to_week", _next_advance_week(current_week))
+    expected_key = f"{current_week}|{advance_to_week}|{advance_dt.isoformat()}"
 
-            advance_dt = _parse_scheduled_advance(info["advance_time_iso"])
-            now = datetime.now(pytz.timezone("US/Arizona"))
-            current_week = info.get("current_week", info.get("week"))
-            advance_to_week = info.get("advance_to_week", _next_advance_week(current_week))
-            expected_key = f"{current_week}|{advance_to_week}|{advance_dt.isoformat()}"
+    state = _load_commissioner_advance_state()
+    if state.get("advance_key") != expected_key:
+        state = _new_commissioner_advance_state(info, advance_dt)
+        _save_commissioner_advance_state(state)
+    return info, advance_dt, state
 
-            state = _load_commissioner_advance_state()
-            if state.get("advance_key") != expected_key:
-                state = _new_commissioner_advance_state(info, advance_dt)
-                _save_commissioner_advance_state(state)
 
-            if now < advance_dt:
-                await asyncio.sleep(COMMISSIONER_ADVANCE_POLL_SECONDS)
-                continue
+def _plan_commissioner_advance_reminder() -> None:
+    """(Re)schedule the 'advance is due' post and its unclaimed follow-up from ADVANCE_INFO_FILE."""
+    SCHEDULER.cancel(COMMISSIONER_ADVANCE_DUE_JOB)
+    SCHEDULER.cancel(COMMISSIONER_ADVANCE_FOLLOWUP_JOB)
+    if not COMMISSIONER_ADVANCE_CHANNEL_ID:
+        return
 
-            guild = bot.get_guild(GUILD_ID)
-            if not guild:
-                await asyncio.sleep(COMMISSIONER_ADVANCE_POLL_SECONDS)
-                continue
+    current = _current_commissioner_advance()
+    if not current:
+        return
+    _info, advance_dt, state = current
+    label = _advance_week_label(state.get("advance_to_week"))
+
+    # Post the due-time reminder once.
+    if not state.get("reminder_message_id"):
+        SCHEDULER.schedule(COMMISSIONER_ADVANCE_DUE_JOB, advance_dt, _post_commissioner_advance_due,
+                           note=f"advance due: {label}")
+
+    # If nobody claims it, post one follow-up 30 minutes later.
+    if not state.get("claimed_by") and not state.get("followup_sent"):
+        SCHEDULER.schedule(
+            COMMISSIONER_ADVANCE_FOLLOWUP_JOB,
+            advance_dt + timedelta(minutes=COMMISSIONER_ADVANCE_FOLLOWUP_MINUTES),
+            _post_commissioner_advance_followup,
+            note=f"unclaimed advance follow-up: {label}",
+        )
 
-            channel = bot.get_channel(COMMISSIONER_ADVANCE_CHANNEL_ID)
-            if channel is None:
-                try:
-                    channel = await bot.fetch_channel(COMMISSIONER_ADVANCE_CHANNEL_ID)
-                except Exception as e:
-                    logger.warning(f"Commissioner advance channel not found: {e}")
-                    await asyncio.sleep(120)
-                    continue
 
-            # Post the due-time reminder once.
-            if not state.get("reminder_message_id"):
-                content = _build_commissioner_advance_message(
-                    guild,
-                    advance_to_week,
-                    advance_dt
-                )
-                reminder = await channel.send(
-                    content,
-                    allowed_mentions=AllowedMentions(roles=True, users=False, everyone=False)
-                )
-                await reminder.add_reaction("👍")
-
-                state["channel_id"] = channel.id
-                state["reminder_message_id"] = reminder.id
-                _save_commissioner_advance_state(state)
-                logger.info(
-                    "Commissioner advance reminder posted for %s",
-                    _format_advance_date(advance_dt)
-                )
+async def _commissioner_advance_channel():
+    channel = bot.get_channel(COMMISSIONER_ADVANCE_CHANNEL_ID)
+    if channel is None:
+        channel = await bot.fetch_channel(COMMISSIONER_ADVANCE_CHANNEL_ID)
+    return channel
 
-            # If nobody claims it, post one follow-up 30 minutes later.
-            followup_time = advance_dt + timedelta(
-                minutes=COMMISSIONER_ADVANCE_FOLLOWUP_MINUTES
-            )
-            if (
-                now >= followup_time
-                and not state.get("claimed_by")
-                and not state.get("followup_sent")
-            ):
-                reminder = await _fetch_commissioner_reminder_message(state)
-                jump_url = reminder.jump_url if reminder else None
-                role = _commissioner_role(guild)
-                commissioner_text = role.mention if role else "Commissioners"
-
-                followup_lines = [
-                    "⏰ **Advance is still unclaimed**",
-                    f"**Advance league to:** {_advance_week_label(state.get('advance_to_week', _next_advance_week(state.get('week'))))}",
-                    f"**Scheduled:** {_format_advance_date(advance_dt)}",
-                    f"{commissioner_text} — please react with 👍 on the original reminder.",
-                ]
-                if jump_url:
-                    followup_lines.append(f"[Go to the original reminder]({jump_url})")
 
-                await channel.send(
-                    "\n".join(followup_lines),
-                    allowed_mentions=AllowedMentions(roles=True, users=False, everyone=False)
-                )
-                state["followup_sent"] = True
-                _save_commissioner_advance_state(state)
-                logger.info("Unclaimed commissioner advance follow-up posted.")
+async def _post_commissioner_advance_due():
+    try:
+        current = _current_commissioner_advance()
+        if not current:
+            return
+        _info, advance_dt, state = current
+        if state.get("reminder_message_id"):
+            return
 
-            await asyncio.sleep(COMMISSIONER_ADVANCE_POLL_SECONDS)
+        guild = bot.get_guild(GUILD_ID)
+        if not guild:
+            raise RuntimeError(f"guild {GUILD_ID} not available")
+        channel = await _commissioner_advance_channel()
 
-        except Exception as e:
-            logger.warning(f"commissioner_advance_reminder_loop error: {e}")
-            await asyncio.sleep(120)
+        content = _build_commissioner_advance_message(
+            guild,
+            state.get("advance_to_week"),
+            advance_dt
+        )
+        reminder = await channel.send(
+            content,
+            allowed_mentions=AllowedMentions(roles=True, users=False, everyone=False)
+        )
+        await reminder.add_reaction("👍")
+
+        state["channel_id"] = channel.id
+        state["reminder_message_id"] = reminder.id
+        _save_commissioner_advance_state(state)
+        logger.info(
+            "Commissioner advance reminder posted for %s",
+            _format_advance_date(advance_dt)
+        )
+    except Exception as e:
+        logger.warning(f"Commissioner advance reminder error: {e}")
+        SCHEDULER.schedule_in(COMMISSIONER_ADVANCE_DUE_JOB, 120, _post_commissioner_advance_due,
+                              note="advance due (retry)")
+
+
+async def _post_commissioner_advance_followup():
+    try:
+        current = _current_commissioner_advance()
+        if not current:
+            return
+        _info, advance_dt, state = current
+        if state.get("claimed_by") or state.get("followup_sent"):
+            return
+
+        guild = bot.get_guild(GUILD_ID)
+        if not guild:
+            raise RuntimeError(f"guild {GUILD_ID} not available")
+        channel = await _commissioner_advance_channel()
+
+        reminder = await _fetch_commissioner_reminder_message(state)
+        jump_url = reminder.jump_url if reminder else None
+        role = _commissioner_role(guild)
+        commissioner_text = role.mention if role else "Commissioners"
+
+        followup_lines = [
+            "⏰ **Advance is still unclaimed**",
+            f"**Advance league to:** {_advance_week_label(state.get('advance_to_week', _next_advance_week(state.get('week'))))}",
+            f"**Scheduled:** {_format_advance_date(advance_dt)}",
+            f"{commissioner_text} — please react with 👍 on the original reminder.",
+        ]
+        if jump_url:
+            followup_lines.append(f"[Go to the original reminder]({jump_url})")
+
+        await channel.send(
+            "\n".join(followup_lines),
+            allowed_mentions=AllowedMentions(roles=True, users=False, everyone=False)
+        )
+        state["followup_sent"] = True
+        _save_commissioner_advance_state(state)
+        logger.info("Unclaimed commissioner advance follow-up posted.")
+    except Exception as e:
+        logger.warning(f"Commissioner advance follow-up error: {e}")
+        SCHEDULER.schedule_in(COMMISSIONER_ADVANCE_FOLLOWUP_JOB, 120, _post_commissioner_advance_followup,
+                              note="unclaimed advance follow-up (retry)")
 
 
 def write_advance_file(advance_dt, week):
@@ -857,6 +861,9 @@ def write_advance_file(advance_dt, week):
 
         logger.info(f"Advance file updated: {ADVANCE_INFO_FILE}")
 
+        # new due time -> new commissioner reminder / follow-up deadlines
+        _plan_commissioner_advance_reminder()
+
     except Exception as e:
         logger.error(f"Failed to write advance file: {e}")
 
@@ -944,6 +951,16 @@ def fetch_flyer_data(home_id: str, away_id: str):
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+# Structured one-JSON-object-per-message log read by !logs (rotates on its own)
+setup_message_log()
+
+# Console/file writes happen on a background thread; on_message only enqueues.
+# LOG_QUEUE_SIZE / LOG_QUEUE_OVERFLOW (drop_oldest | drop_new | block) tune the bot.log buffer.
+install_queue_logging(logger)
+# messages.jsonl only seeds / backs up the archive (live rows are written by _archive_message):
+# a burst waits at most LOG_QUEUE_BLOCK_SEC for room, then the record is dropped and counted
+install_queue_logging(message_logger, overflow="block", block_timeout=LOG_QUEUE_BLOCK_SEC)
+
 # Initialize time zone variables
 utc = pytz.utc
 phoenix_time = datetime.now(pytz.timezone('US/Arizona'))
@@ -992,39 +1009,19 @@ TITLE_RE = re.compile(
 
 ADVANCE_CHANNEL_ID = int(os.getenv("ADVANCE_CHANNEL_ID", "0") or 0)
 
-WEEK_STATE_FILE = "data/week_state.json"
+WEEK_STATE_FILE = "data/week_state.json"       # legacy; imported into the state store once
+WEEK_CACHE_PATH = "data/week_cache.json"       # exported copy of the week cache
 os.makedirs("data", exist_ok=True)
 
-# Learned each advance:
-_current_week: int | None = None
-# team -> opponent
-_current_matchups: dict[str, str] = {}
-# list of (left_team, right_team) in the written order
-_current_pairs: list[tuple[str, str]] = []
+# Learned each advance: WEEK (week_state.WeekState) holds the week, the (left, right)
+# pairs in written order and team -> opponent; it is created with the state store below.
 
 TEAM_NAME_RE = r"[A-Z0-9][A-Za-z0-9 ]+"  # simple, forgiving
 
 # === PLAYTIME: storage & helpers =============================================
-PLAYTIME_FILE = "data/playtime.json"
+PLAYTIME_FILE = "data/playtime.json"  # legacy; imported into the state store once
 os.makedirs("data", exist_ok=True)
 
-def _load_playtime_map() -> dict[str, str]:
-    try:
-        with open(PLAYTIME_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # normalize keys to string
-            return {str(k): str(v) for k, v in data.items()}
-    except FileNotFoundError:
-        return {}
-    except Exception:
-        return {}
-
-def _save_playtime_map(d: dict[str, str]) -> None:
-    tmp = PLAYTIME_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(d, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, PLAYTIME_FILE)
-
 MENTION_TOKENS_RE = re.compile(
     r"(?:<@!?\d+>|<@&\d+>|@everyone|@here)",  # user, role, mass mentions
     flags=re.IGNORECASE,
@@ -1044,13 +1041,13 @@ def sanitize_playtime_text(raw: str) -> str:
     return txt if txt else "(no details provided)"
 
 def get_playtime(user_id: int | str) -> str | None:
-    d = _load_playtime_map()
-    return d.get(str(user_id))
+    try:
+        return STATE.playtime(user_id)
+    except Exception:
+        return None
 
 def set_playtime(user_id: int | str, text: str) -> str:
-    d = _load_playtime_map()
-    d[str(user_id)] = text
-    _save_playtime_map(d)
+    STATE.set_playtime(user_id, text)
     return text
 
 async def _find_availability_message(channel: nextcord.TextChannel) -> nextcord.Message | None:
@@ -1080,10 +1077,10 @@ def _availability_panel_lines(guild: nextcord.Guild, member_ids: list[int]) -> l
 async def _ensure_or_update_availability_board(channel: nextcord.TextChannel) -> None:
     """
     Create or update the '📅 Availability' message for this matchup channel.
-    Uses channel_activity_tracker[channel.id]['member_ids'] to show both players.
+    Uses the ACTIVITY tracker's member_ids for the channel to show both players.
     """
     try:
-        tracker = channel_activity_tracker.get(channel.id)
+        tracker = ACTIVITY.get(channel.id)
         if not tracker or not tracker.get("member_ids"):
             return
 
@@ -1113,7 +1110,7 @@ async def _update_user_matchup_boards(user: nextcord.Member | nextcord.User) ->
 
     updated = 0
     for ch in category.text_channels:
-        tracker = channel_activity_tracker.get(ch.id)
+        tracker = ACTIVITY.get(ch.id)
         if tracker and user.id in tracker.get("member_ids", []):
             await _ensure_or_update_availability_board(ch)
             updated += 1
@@ -1125,10 +1122,8 @@ def _canon_team_upper(s: str) -> str | None:
     return t if t else None
 
 def _load_nfl_title_and_upper():
-    with open('NFL_Teams.csv', 'r', encoding='utf-8') as f:
-        titles = [ln.strip() for ln in f if ln.strip()]
-    uppers = {t.upper(): t for t in titles}
-    return titles, uppers
+    # In-memory copy; team_names reloads NFL_Teams.csv only when it changes
+    return TEAMS.titles(), TEAMS.upper_map()
 
 def _scan_guild_for_team_claims(guild):
     """Return (claims, conflicts, unknowns)
@@ -1137,19 +1132,10 @@ def _scan_guild_for_team_claims(guild):
        unknowns: members whose name looks like a team but isn't in NFL_Teams.csv
     """
     titles, upper_map = _load_nfl_title_and_upper()
-    claims = {}
-    unknowns = []
-    for m in guild.members:
-        if getattr(m, "bot", False):
-            continue
-        team_up = _canon_team_upper(m.display_name or m.name)
-        if not team_up:
-            continue
-        if team_up in upper_map:
-            claims.setdefault(team_up, []).append(m)
-        else:
-            unknowns.append((m, team_up))
-    conflicts = {t: members for t, members in claims.items() if len(members) > 1}
+    index = _member_index(guild)
+    claims = index.claims()
+    unknowns = []   # the index only ever holds official teams
+    conflicts = index.conflicts()
     return claims, conflicts, unknowns, upper_map
 
 def _format_audit_report(guild, claims, conflicts, unknowns, upper_map):
@@ -1274,49 +1260,8 @@ def _parse_advance_block(text: str):
     return week, pairs, mapping
 
 
-def _load_week_state():
-    try:
-        with open(WEEK_STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-            if "pre_reminder_sent" not in data:
-                data["pre_reminder_sent"] = False
-
-            if "advance_time" not in data:
-                data["advance_time"] = None
-
-            return data
-    except:
-        return {
-            "week": 0,
-            "matchups": [],
-            "pre_reminder_sent": False,
-            "advance_time": None
-        }
-
-def _save_week_state(wk, pairs, pre_sent=None, advance_time="__KEEP__"):
-    existing = _load_week_state()
-
-    data = {
-        "week": wk,
-        "matchups": pairs,
-        "pre_reminder_sent": (
-            pre_sent if pre_sent is not None
-            else existing.get("pre_reminder_sent", False)
-        ),
-        "advance_time": (
-            existing.get("advance_time")
-            if advance_time == "__KEEP__"
-            else advance_time
-        )
-    }
-
-    with open(WEEK_STATE_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
 def get_current_week_and_matchups():
-    st = _load_week_state()
-    return int(st.get("week", 0)), st.get("matchups", [])
+    return int(WEEK.week or 0), [list(p) for p in WEEK.pairs]
 
 ADVANCE_LINE_RE = re.compile(
     r"^\s*([A-Za-z0-9 .’'-]+)\s*\([^)]*\)\s*vs\s*([A-Za-z0-9 .’'-]+)\s*\([^)]*\)\s*$",
@@ -1385,15 +1330,9 @@ def canonical_team(s: str) -> str:
     # keep digits (for 49ERS) but drop punctuation
     s = re.sub(r"[^A-Z0-9 ]+", "", s)
 
-    # common aliases
-    aliases = {
-        "DAL": "COWBOYS", "DALLAS": "COWBOYS",
-        "MIN": "VIKINGS", "MINNESOTA": "VIKINGS",
-        "NYG": "GIANTS", "SF": "49ERS", "SAN FRANCISCO": "49ERS",
-        "NINERS": "49ERS"
-    }
-    s = aliases.get(s, s)
-    return s
+    # codes, cities, aliases and typos ("DAL", "DALLAS", "COWBYS") -> "COWBOYS"
+    code = TEAM_MATCHER.match(s)
+    return TEAM_MATCHER.nickname(code) if code else s
 
 def extract_team_from_nick(nick: str) -> str | None:
     """
@@ -1403,37 +1342,31 @@ def extract_team_from_nick(nick: str) -> str | None:
     if not nick:
         return None
 
-    # normalize: drop leading non-alnum, then casefold for robust comparison
-    lead = _leading_alnum_lower(nick)
-
-    try:
-        titles, upper_map = _load_nfl_title_and_upper()  # Title Case list + UPPER->Title map
-    except Exception:
-        return None
-
-    # Find the first official team whose name is a prefix of the nickname
-    for title in titles:                  # e.g., "Raiders"
-        if lead.startswith(title.casefold()):
-            return title.upper()          # -> "RAIDERS"
+    # drop leading non-alnum, casefold, then walk the team-name trie: O(len(nick))
+    return TEAMS.team_from_nick(nick)
 
-    return None
+def _member_index(guild) -> MemberTeamIndex:
+    """Member <-> team index kept current by the member events (built from guild.members on first use)."""
+    if not MEMBER_INDEX.ready and guild is not None:
+        MEMBER_INDEX.rebuild(guild.members)
+    return MEMBER_INDEX
 
-# put this near TITLE_RE (or replace TITLE_RE with this teams-only regex)
-TEAMS_IN_TITLE_RE = re.compile(
-    r"\b([A-Z0-9][A-Z0-9 ]+?)\b\s+vs\s+\b([A-Z0-9][A-Z0-9 ]+?)\b",
-    re.IGNORECASE
-)
+# "<team> vs <team>" in a stream title; the teams are the words right before / after
+TITLE_VS_RE = re.compile(r"\s+vs\.?\s+", re.IGNORECASE)
 
 def parse_title_for_week_and_teams(title: str) -> tuple[int | None, str | None, str | None]:
     # week can be regular (e.g., WEEK 7) or preseason (e.g., PRE 2 / PRESEASON 2 -> negative week)
     wk = parse_week_token(title or "")
 
-    m = TEAMS_IN_TITLE_RE.search(title or "")
+    m = TITLE_VS_RE.search(title or "")
     if not m:
         return wk, None, None
 
-    t1 = canonical_team(m.group(1))
-    t2 = canonical_team(m.group(2))
+    # typo-tolerant; a side that names no team comes back None for the learned schedule to fill
+    c1 = TEAM_MATCHER.find(title[:m.start()], anchor="end")
+    c2 = TEAM_MATCHER.find(title[m.end():], anchor="start")
+    t1 = TEAM_MATCHER.nickname(c1) if c1 else None
+    t2 = TEAM_MATCHER.nickname(c2) if c2 else None
     return wk, t1, t2
 
 
@@ -1454,51 +1387,34 @@ def name_starts_with_team(display_name: str, team_name: str) -> bool:
 @bot.command(name="check_users")
 @commands.has_role(ADMIN_ROLE_NAME)
 async def check_users(ctx):
-    # Load official team list exactly as in NFL_Teams.csv (Title Case)
-    try:
-        with open('NFL_Teams.csv', 'r', encoding='utf-8') as f:
-            official = [ln.strip() for ln in f if ln.strip()]
-    except FileNotFoundError:
+    # Official team list exactly as in NFL_Teams.csv (Title Case), from the shared resolver
+    if not TEAMS.titles():
         await ctx.send("NFL_Teams.csv not found on the Pi.")
         return
 
-    # Build case-insensitive lookup
-    teams_cf = [(t, t.casefold()) for t in official]
-
     guild = bot.get_guild(GUILD_ID)
     if guild is None:
         await ctx.send(f"Guild {GUILD_ID} not found.")
         return
 
-    claimed_by_user = {}   # team -> member
+    index = _member_index(guild)
+    upper_map = TEAMS.upper_map()
+
+    claimed_by_user = {upper_map.get(t, t.title()): m for t, m in index.team_to_member().items()}  # team -> member
     unknown = []           # (member, preview)
-    for m in guild.members:
-        if getattr(m, "bot", False):
-            continue
+    for m in index.unmatched_members():
         disp = m.display_name or m.name or ""
-        lead = _leading_alnum_lower(disp)
-
-        found_team = None
-        for t_title, t_cf in teams_cf:
-            if lead.startswith(t_cf):
-                found_team = t_title
-                break
-
-        if found_team:
-            # first come wins; if you want to detect duplicates, keep a list per team
-            claimed_by_user.setdefault(found_team, m)
-        else:
-            # show the first token-ish for debugging
-            preview = (disp.strip().split(maxsplit=2)[0:2])
-            preview = " ".join(preview) if preview else disp.strip()[:12]
-            unknown.append((m, preview))
+        # show the first token-ish for debugging
+        preview = (disp.strip().split(maxsplit=2)[0:2])
+        preview = " ".join(preview) if preview else disp.strip()[:12]
+        unknown.append((m, preview))
 
     # Compose report
     lines = []
     lines.append(f"**WURD users → teams audit for {guild.name}**")
-    lines.append(f"Claimed teams: {len(claimed_by_user)} | Claiming members: {len(claimed_by_user)}")
+    lines.append(f"Claimed teams: {len(claimed_by_user)} | Claiming members: {sum(len(v) for v in index.claims().values())}")
     lines.append("")
-    dupes = []  # populate if you change claimed_by_user to track multiples
+    dupes = [(upper_map.get(t, t.title()), members) for t, members in sorted(index.conflicts().items())]
     if dupes:
         lines.append("Conflicts detected ❗")
         for team, members in dupes:
@@ -1568,25 +1484,20 @@ def get_current_season(flyer_data: dict | None = None) -> int | str:
 
 def prefer_learned_week(parsed_week: int | None) -> int | None:
     """If we’ve learned a week from the advance, prefer it over any parsed/user week."""
-    return _current_week if _current_week is not None else parsed_week
+    return WEEK.week if WEEK.week is not None else parsed_week
 
 def order_by_advance(a: str, b: str) -> tuple[str, str]:
     """
-    Return (L,R) in the exact left/right order from _current_pairs if possible,
+    Return (L,R) in the exact left/right order from the learned pairs if possible,
     otherwise return (a,b) unchanged.
     """
-    if _current_pairs:
-        ab = {a, b}
-        for L, R in _current_pairs:
-            if {L, R} == ab:
-                return (L, R)
-    return (a, b)
+    return WEEK.ordered_pair(a, b)
 
 def normalize_matchup_with_learned(t1: str | None, t2: str | None, author=None) -> tuple[str | None, str | None]:
     """
-    Use _current_matchups/_current_pairs to complete/override/validate the matchup.
+    Use the learned matchups (WEEK) to complete/override/validate the matchup.
     Priority is the learned schedule:
-      - If only one team, fill opponent from _current_matchups
+      - If only one team, fill opponent from WEEK.matchups
       - If both teams but not a learned pair, force the correct opponent from mapping
       - If nothing parsed, try author’s nickname -> team -> opponent
       - Finally, enforce advance left/right order
@@ -1594,14 +1505,14 @@ def normalize_matchup_with_learned(t1: str | None, t2: str | None, author=None)
     t1 = canonical_team(t1) if t1 else None
     t2 = canonical_team(t2) if t2 else None
 
-    if _current_matchups:
+    if WEEK.matchups:
         if t1 and not t2:
-            t2 = _current_matchups.get(t1)
+            t2 = WEEK.matchups.get(t1)
         elif t2 and not t1:
-            t1 = _current_matchups.get(t2)
+            t1 = WEEK.matchups.get(t2)
         elif t1 and t2:
             # If user provided the wrong opponent, snap to the learned opponent
-            mapped = _current_matchups.get(t1)
+            mapped = WEEK.matchups.get(t1)
             if mapped and mapped != t2:
                 t2 = mapped
 
@@ -1610,7 +1521,7 @@ def normalize_matchup_with_learned(t1: str | None, t2: str | None, author=None)
             author_team = extract_team_from_nick(getattr(author, "display_name", "") or "")
             if author_team:
                 t1 = author_team
-                t2 = _current_matchups.get(author_team)
+                t2 = WEEK.matchups.get(author_team)
 
     if t1 and t2:
         t1, t2 = order_by_advance(t1, t2)
@@ -1618,12 +1529,14 @@ def normalize_matchup_with_learned(t1: str | None, t2: str | None, author=None)
 
 MACRODROID_ADVANCE_URL = "https://trigger.macrodroid.com/0173acce-c77b-4627-9c87-25fb2f03d580/wurd_advance"
 
-def trigger_macrodroid_advance():
+def trigger_macrodroid_advance() -> bool:
     try:
         r = requests.get(MACRODROID_ADVANCE_URL, timeout=5)
         logger.info(f"MacroDroid webhook sent. Status: {r.status_code}")
+        return r.ok
     except Exception as e:
         logger.error(f"MacroDroid webhook failed: {e}")
+        return False
 
 
 # The trigger: on_thread_create (new block)
@@ -1805,16 +1718,17 @@ def get_timezone_offset_info(tz1_code, tz2_code, tz1_nick, tz2_nick):
 
 
 AP_FILE = 'ap_users.json'
-# --- AP auto-reload state ---
-_AP_MTIME = 0
-_AP_CACHE = None
-
 ON_VACATION_FORUM_ID = int(os.getenv("ON_VACATION_FORUM_ID", "0"))
 
 AP_NOTIFIED_FILE = 'ap_notified.json'
 AP_ALERT_ADMIN_ID = int(os.getenv("AP_ALERT_ADMIN_ID", "0"))
 AP_ALERT_CHANNEL_ID = int(os.getenv("AP_ALERT_CHANNEL_ID", "0"))
 AP_ALERT_TZ = os.getenv("AP_ALERT_TZ", "US/Arizona")
+# Longest the AP return reminder sleeps without hearing that ap_users.json changed
+AP_RECHECK_SEC = int(os.getenv("AP_RECHECK_SEC", "21600") or 21600)
+
+# Today's AP list, recompiled only when ap_users.json changes or the local day rolls over
+AP_INDEX = APIndex(AP_FILE, _tz(AP_ALERT_TZ))
 
 
 os.makedirs("data", exist_ok=True)
@@ -1825,53 +1739,9 @@ def _parse_date(d: str) -> datetime:
     return datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=dt_timezone.utc)
 
 def load_ap_users(force=False):
-    global _AP_MTIME, _AP_CACHE
-
-    try:
-        mtime = os.path.getmtime(AP_FILE)
-    except FileNotFoundError:
-        return []
-
-    if force or mtime != _AP_MTIME:
-        with open(AP_FILE, "r", encoding="utf-8") as f:
-            _AP_CACHE = json.load(f)
-        _AP_MTIME = mtime
-
-    # 🔥 ALWAYS FILTER HERE
-    tz = _tz(AP_ALERT_TZ)
-    today_local = datetime.now(tz).date()
-
-    active = []
-    for u in _AP_CACHE:
-        try:
-            start_date = _start_date(u)
-            until_date = _date_from_str(u["until"])
-
-            # skip invalid ranges
-            if start_date > until_date:
-                continue
-
-            if start_date <= today_local < until_date:
-                u = dict(u)
-                u["user_id"] = _normalize_id(u.get("user_id"))
-                active.append(u)
-        except Exception:
-            continue
-
-    return active
-
-
-def _normalize_id(value) -> str | None:
-    """
-    Coerce a Discord ID (int or string) to a normalized numeric-string.
-    Returns None if it cannot be parsed as an integer.
-    """
-    if value is None:
-        return None
+    """Users on AP today (an ActiveAP list); compiled at most once per file change / local day."""
+    return AP_INDEX.current(force=force)
 
-    # Keep ONLY ASCII digits — no int() conversion!
-    digits = "".join(ch for ch in str(value) if ch.isdigit())
-    return digits if digits else None
 
 def is_on_ap(user_id: int | str, ap_users=None):
     """
@@ -1879,14 +1749,7 @@ def is_on_ap(user_id: int | str, ap_users=None):
     Works whether ap_users.json stores IDs as ints or strings.
     """
     ap_users = ap_users if ap_users is not None else load_ap_users()
-    target = _normalize_id(user_id)
-    if target is None:
-        return None
-    for u in ap_users:
-        uid = _normalize_id(u.get("user_id"))
-        if uid is not None and uid == target:
-            return u
-    return None
+    return ap_users.get(user_id)
 
 AP_STATE_FILE = "ap_state.json"
 
@@ -1906,37 +1769,36 @@ def get_current_ap_state():
 
 def load_last_ap_state():
     try:
-        with open(AP_STATE_FILE, "r") as f:
-            return json.load(f)
-    except:
+        return STATE.ap_state()
+    except Exception:
         return []
 
 
-def save_ap_state(state):
-    with open(AP_STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
-
 def ap_state_changed():
-    current = get_current_ap_state()
-    previous = load_last_ap_state()
-
-    if current != previous:
-        save_ap_state(current)
-        return True
-
-    return False
+    # compare and store the new snapshot in one transaction; no write when unchanged
+    return STATE.replace_ap_state_if_changed(get_current_ap_state())
 
 
 AP_TRIGGER_FILE = "_ap_trigger.json"
 LAST_TRIGGER_TS = 0
 LAST_POST_TIME = 0
 
-async def ap_trigger_watcher():
-    await bot.wait_until_ready()
+# The AP editor (outside this bot) signals by writing the trigger file, so this is
+# the one job that has to look periodically; it only stats the file until it changes.
+AP_TRIGGER_POLL_SEC = float(os.getenv("AP_TRIGGER_POLL_SEC", "2") or 2)
+AP_TRIGGER_JOB = "ap_trigger"
+_ap_trigger_mtime = None
 
-    while not bot.is_closed():
+async def ap_trigger_watcher():
+    global _ap_trigger_mtime
+    try:
         try:
-            with open("_ap_trigger.json", "r") as f:
+            mtime = os.path.getmtime(AP_TRIGGER_FILE)
+        except OSError:
+            mtime = None
+
+        if mtime is not None and mtime != _ap_trigger_mtime:
+            with open(AP_TRIGGER_FILE, "r") as f:
                 data = json.load(f)
 
             if data.get("ready"):
@@ -1946,32 +1808,16 @@ async def ap_trigger_watcher():
 
                 data["ready"] = False
 
-                with open("_ap_trigger.json", "w") as f:
+                with open(AP_TRIGGER_FILE, "w") as f:
                     json.dump(data, f, indent=2)
+                mtime = os.path.getmtime(AP_TRIGGER_FILE)
 
-        except Exception as e:
-            print(f"AP trigger error: {e}")
-
-        await asyncio.sleep(2)
+            _ap_trigger_mtime = mtime
 
-def _start_date(u: dict):
-    """
-    Returns the date the AP should begin (date object).
-    If 'start' missing/invalid, treat as today in the alert timezone.
-    """
-    tz = _tz(AP_ALERT_TZ)
-    today_local = datetime.now(tz).date()
-    s = (u.get("start") or "").strip()
-    if not s:
-        return today_local
-    try:
-        return _date_from_str(s)
-    except Exception:
-        return today_local
+    except Exception as e:
+        print(f"AP trigger error: {e}")
 
-def _date_from_str(dstr: str):
-    """Return a date object from 'YYYY-MM-DD' (no timezone math)."""
-    return datetime.strptime(dstr, "%Y-%m-%d").date()
+    SCHEDULER.schedule_in(AP_TRIGGER_JOB, AP_TRIGGER_POLL_SEC, ap_trigger_watcher, note="AP editor trigger file check")
 
 # Add timedelta to the bot's datetime import:
 # from datetime import datetime, timedelta
@@ -2063,89 +1909,101 @@ async def ap(ctx):
 
 def _load_notified():
     try:
-        with open(AP_NOTIFIED_FILE, "r", encoding="utf-8") as f:
-            return set(tuple(x) for x in json.load(f))
-    except FileNotFoundError:
-        return set()
+        return STATE.ap_notified()
     except Exception:
         return set()
 
 def _save_notified(s: set[tuple]):
     try:
-        with open(AP_NOTIFIED_FILE, "w", encoding="utf-8") as f:
-            json.dump(list(s), f)
+        STATE.add_ap_notified(s)   # insert-or-ignore; rows already stored are untouched
     except Exception:
         pass
 
 
-async def ap_return_reminder_loop():
-    notified = _load_notified()
-    tz = _tz(AP_ALERT_TZ)
+AP_RETURN_REMINDER_JOB = "ap_return_reminder"
+_ap_notified = None   # {(user id, until)} already reminded, loaded on first run
 
-    while True:
-        try:
-            ap_users = load_ap_users()
-            now_local = datetime.now(tz)
-            today_local = now_local.date()
-            tomorrow_local = today_local + timedelta(days=1)
+@AP_INDEX.subscribe
+def _replan_ap_return_reminder(index):
+    # ap_users.json changed: check right away, which also plans the next run
+    if SCHEDULER.get(AP_RETURN_REMINDER_JOB):
+        SCHEDULER.schedule_in(AP_RETURN_REMINDER_JOB, 0, ap_return_reminder, note="AP return reminder (AP list changed)")
 
-            due = []
-            for u in ap_users:
-                try:
-                    until_date = _date_from_str(u["until"])
-                    if until_date == tomorrow_local:
-                        due.append(u)
-                except Exception:
-                    continue
-            if due:
-                guild = bot.get_guild(GUILD_ID)
-                # Where to send: DM admin if set; else channel if set; else skip
-                admin_member = guild.get_member(AP_ALERT_ADMIN_ID) if AP_ALERT_ADMIN_ID else None
-                alert_channel = bot.get_channel(AP_ALERT_CHANNEL_ID) if AP_ALERT_CHANNEL_ID else None
-
-                # Prepare message
-                header = f"⚠️ AP return reminder for {tomorrow_local.strftime('%a, %b %d, %Y')}"
-                lines = [header, ""]
-                for u in due:
-                    uid = _normalize_id(u.get("user_id")) or ""
-                    key = (uid, u.get("until"))
-                    if key in notified:
-                        continue  # already sent for this (user, date)
-                    disp = u.get("display", f"User {u.get('user_id')}")
-                    reason = u.get("reason", "").strip()
-                    line = f"• {disp}" + (f" — {reason}" if reason else "")
-                    line += f"\n  Returns: {human_date(u['until'])}\n  Action: Turn off AP."
-                    lines.append(line)
-                    lines.append("")
-                msg = "\n".join(lines).rstrip()
-
-                # If there is something new to notify
-                if len(lines) > 2:
-                    sent_ok = False
-                    if admin_member:
-                        try:
-                            await admin_member.send(msg)
-                            sent_ok = True
-                        except Exception:
-                            pass
-                    if not sent_ok and alert_channel:
-                        try:
-                            await alert_channel.send(msg)
-                            sent_ok = True
-                        except Exception:
-                            pass
+def _plan_ap_return_reminder(retry_soon: bool = False) -> None:
+    """Next run: local midnight of the day before the next return; a failed send retries in an hour."""
+    if retry_soon:
+        SCHEDULER.schedule_in(AP_RETURN_REMINDER_JOB, 3600, ap_return_reminder, note="AP return reminder (retry)")
+        return
+    when = time.time() + AP_RECHECK_SEC
+    next_day = load_ap_users().next_transition(AP_RETURN, lead_days=1)
+    if next_day is not None:
+        when = min(when, AP_INDEX.local_midnight(next_day).timestamp())
+    SCHEDULER.schedule(AP_RETURN_REMINDER_JOB, when, ap_return_reminder, note="AP return eve")
+
+async def ap_return_reminder():
+    global _ap_notified
+    if _ap_notified is None:
+        _ap_notified = _load_notified()
+    notified = _ap_notified
+
+    retry_soon = False
+    try:
+        ap_users = load_ap_users()
+        today_local = ap_users.day
+        tomorrow_local = today_local + timedelta(days=1)
 
-                    if sent_ok:
-                        for u in due:
-                            uid = _normalize_id(u.get("user_id")) or ""
-                            key = (uid, u.get("until"))
-                            notified.add(key)
-                        _save_notified(notified)
-        except Exception as e:
-            logger.warning(f"ap_return_reminder_loop: {e}")
+        due = ap_users.returning_on(tomorrow_local)
+        if due:
+            guild = bot.get_guild(GUILD_ID)
+            # Where to send: DM admin if set; else channel if set; else skip
+            admin_member = guild.get_member(AP_ALERT_ADMIN_ID) if AP_ALERT_ADMIN_ID else None
+            alert_channel = bot.get_channel(AP_ALERT_CHANNEL_ID) if AP_ALERT_CHANNEL_ID else None
+
+            # Prepare message
+            header = f"⚠️ AP return reminder for {tomorrow_local.strftime('%a, %b %d, %Y')}"
+            lines = [header, ""]
+            for u in due:
+                uid = _normalize_id(u.get("user_id")) or ""
+                key = (uid, u.get("until"))
+                if key in notified:
+                    continue  # already sent for this (user, date)
+                disp = u.get("display", f"User {u.get('user_id')}")
+                reason = u.get("reason", "").strip()
+                line = f"• {disp}" + (f" — {reason}" if reason else "")
+                line += f"\n  Returns: {human_date(u['until'])}\n  Action: Turn off AP."
+                lines.append(line)
+                lines.append("")
+            msg = "\n".join(lines).rstrip()
+
+            # If there is something new to notify
+            if len(lines) > 2:
+                sent_ok = False
+                if admin_member:
+                    try:
+                        await admin_member.send(msg)
+                        sent_ok = True
+                    except Exception:
+                        pass
+                if not sent_ok and alert_channel:
+                    try:
+                        await alert_channel.send(msg)
+                        sent_ok = True
+                    except Exception:
+                        pass
+
+                if sent_ok:
+                    for u in due:
+                        uid = _normalize_id(u.get("user_id")) or ""
+                        key = (uid, u.get("until"))
+                        notified.add(key)
+                    _save_notified(notified)
+                else:
+                    retry_soon = True
+    except Exception as e:
+        logger.warning(f"ap_return_reminder: {e}")
+        retry_soon = True
 
-        # Check hourly
-        await asyncio.sleep(3600)
+    _plan_ap_return_reminder(retry_soon)
 
 def _is_in_target_game_channel(ch) -> bool:
     try:
@@ -2174,14 +2032,39 @@ def _is_in_target_game_channel(ch) -> bool:
 
 
 # BOT CREATING PRIVATE CHANNELS
-async def create_channel_helper(guild, team_name, member_ids, ctx=None, message_content="Good Luck and Have Fun!"):
+# Discord's per-route rate-limit buckets are honored by nextcord's HTTP client (it reads the
+# X-RateLimit headers and waits per bucket), so provisioning needs no fixed sleeps; this only
+# caps how many channels are being seeded with messages at once.
+CHANNEL_PROVISION_CONCURRENCY = max(1, int(os.getenv("CHANNEL_PROVISION_CONCURRENCY", "4") or 4))
+
+def _matchup_overwrites(guild, admin_role, member_ids):
+    """Private-channel overwrites (bot, admins and the players in) and (mention, name) of each player found."""
+    overwrites = {
+        guild.default_role: nextcord.PermissionOverwrite(read_messages=False),
+        guild.me: nextcord.PermissionOverwrite(read_messages=True, send_messages=True),
+        admin_role: nextcord.PermissionOverwrite(read_messages=True, send_messages=True)
+    }
+
+    member_info = []
+    for member_id in member_ids:
+        member = guild.get_member(member_id)
+        if member:
+            overwrites[member] = nextcord.PermissionOverwrite(read_messages=True, send_messages=True)
+            member_info.append((member.mention, member.display_name or member.name))
+    return overwrites, member_info
+
+async def _create_matchup_channel(guild, team_name, member_ids, ctx=None, ignore_ids=()):
+    """
+    Create one private matchup channel; returns (channel, member_info), or None if it exists or failed.
+    Channels in ignore_ids (just archived; the cache may not show the move yet) do not count as existing.
+    """
     category = guild.get_channel(CATEGORY_ID)
     if category is None or not isinstance(category, nextcord.CategoryChannel):
         if ctx:
             await ctx.send("Category not found or is not a valid category.")
         else:
             logger.warning("Category not found or is not valid.")
-        return
+        return None
 
     admin_role = nextcord.utils.get(guild.roles, name=ADMIN_ROLE_NAME)
     if not admin_role:
@@ -2189,115 +2072,161 @@ async def create_channel_helper(guild, team_name, member_ids, ctx=None, message_
             await ctx.send(f"Unable to find the admin role '{ADMIN_ROLE_NAME}'. Please check your server settings.")
         else:
             print(f"Admin role '{ADMIN_ROLE_NAME}' not found.")
-        return
-
-    overwrites = {
-        guild.default_role: nextcord.PermissionOverwrite(read_messages=False),
-        guild.me: nextcord.PermissionOverwrite(read_messages=True, send_messages=True),
-        admin_role: nextcord.PermissionOverwrite(read_messages=True, send_messages=True)
-    }
+        return None
 
-    member_info = []
-    for member_id in member_ids:
-        member = guild.get_member(member_id)
-        if member:
-            overwrites[member] = nextcord.PermissionOverwrite(read_messages=True, send_messages=True)
-            member_info.append((member.mention, member.display_name or member.name))
+    overwrites, member_info = _matchup_overwrites(guild, admin_role, member_ids)
 
-    existing_channel = nextcord.utils.get(guild.channels, name=team_name, category=category)
+    existing_channel = next(
+        (ch for ch in category.channels if ch.name == team_name and ch.id not in ignore_ids), None
+    )
     if existing_channel:
         logger.info(f"Channel '{team_name}' already exists in the category '{category.name}'.")
-    else:
-        try:
-            channel = await guild.create_text_channel(
-                name=team_name,
-                category=category,
-                overwrites=overwrites,
-                reason="Creating a private channel with the bot."
-            )
+        return None
+    try:
+        channel = await guild.create_text_channel(
+            name=team_name,
+            category=category,
+            overwrites=overwrites,
+            reason="Creating a private channel with the bot."
+        )
+    except nextcord.Forbidden:
+        logger.error("Bot does not have permission to create channels.")
+        return None
+    except nextcord.HTTPException as e:
+        logger.error(f"Failed to create channel: {e}")
+        return None
 
-            await asyncio.sleep(1.5)  # throttle between channel creations (prevents global rate limit)
+    ACTIVITY.track(channel.id, member_ids)
+    return channel, member_info
 
-            channel_activity_tracker[channel.id] = {
-                "created_at": datetime.now(pytz.utc),
-                "member_ids": member_ids,
-                "responses": set()
-            }
+async def _seed_matchup_channel(guild, channel, member_ids, member_info, message_content):
+    """Post the welcome, availability board and AP notes into a new matchup channel (in order)."""
+    try:
+        # === MENTIONS (TOP) ===
+        ap_list = load_ap_users()
+        non_ap_mentions = []
 
-            # === MENTIONS (TOP) ===
-            ap_list = load_ap_users()
-            non_ap_mentions = []
+        for member_id in member_ids:
+            member = guild.get_member(member_id)
+            if not member:
+                continue
+            if not is_on_ap(member_id, ap_list):
+                non_ap_mentions.append(member.mention)
 
-            for member_id in member_ids:
-                member = guild.get_member(member_id)
-                if not member:
-                    continue
-                if not is_on_ap(member_id, ap_list):
-                    non_ap_mentions.append(member.mention)
-
-            if non_ap_mentions:
-                await channel.send(" ".join(non_ap_mentions))
-                await asyncio.sleep(1.1)  # throttle between sends
-
-            # channel welcome message
-            await channel.send(message_content)
-            await asyncio.sleep(1.1)
-
-            await channel.send("\u200b")
-            await asyncio.sleep(1.1)
-
-            # Timezone difference logic (keep as-is)
-            if len(member_info) == 2:
-                tz1_code = extract_timezone_code(member_info[0][1])
-                tz2_code = extract_timezone_code(member_info[1][1])
-                if tz1_code and tz2_code:
-                    tz_msg = get_timezone_offset_info(tz1_code, tz2_code, member_info[0][1], member_info[1][1])
-                    if tz_msg:
-                        await channel.send(tz_msg)
-                        await channel.send("\u200b")  # zero-width space
-
-            # === PLAYTIME: seed or update the availability board for this matchup
-            try:
-                await _ensure_or_update_availability_board(channel)
-            except Exception as e:
-                logger.warning(f"could not seed availability board for {channel.name}: {e}")
+        if non_ap_mentions:
+            await channel.send(" ".join(non_ap_mentions))
 
-            await channel.send("\u200b")  # zero-width space
+        # channel welcome message
+        await channel.send(message_content)
 
-            # 4️⃣ Reminder
-            await channel.send("**Reminder:** Please **@mention** your opponent — some users won’t see messages otherwise.")
+        await channel.send("\u200b")
 
-            # === AP INSERT START ===
-            # spacer so AP notice stands alone
-            await channel.send("\u200b")
+        # Timezone difference logic (keep as-is)
+        if len(member_info) == 2:
+            tz1_code = extract_timezone_code(member_info[0][1])
+            tz2_code = extract_timezone_code(member_info[1][1])
+            if tz1_code and tz2_code:
+                tz_msg = get_timezone_offset_info(tz1_code, tz2_code, member_info[0][1], member_info[1][1])
+                if tz_msg:
+                    await channel.send(tz_msg)
+                    await channel.send("\u200b")  # zero-width space
 
-            # === AP HEADS-UP (BOTTOM) ===
-            ap_notes = []
+        # === PLAYTIME: seed or update the availability board for this matchup
+        try:
+            await _ensure_or_update_availability_board(channel)
+        except Exception as e:
+            logger.warning(f"could not seed availability board for {channel.name}: {e}")
 
-            for member_id in member_ids:
-                member = guild.get_member(member_id)
-                if not member:
-                    continue
+        await channel.send("\u200b")  # zero-width space
 
-                ap = is_on_ap(member_id, ap_list)
-                if ap:
-                    shown_name = ap.get("display", member.display_name)
-                    until = ap.get("until", "")
-                    ap_notes.append(
-                        f"🚨 **Heads-up:** {shown_name} is on **Auto-Pilot** until "
-                        f"**{human_date(until)}**.\n"
-                        f"➡️ Please play the **CPU** for this matchup."
-                    )
+        # 4️⃣ Reminder
+        await channel.send("**Reminder:** Please **@mention** your opponent — some users won’t see messages otherwise.")
 
-            if ap_notes:
-                await channel.send("\n\n".join(ap_notes))
-            # === AP INSERT END ===
+        # === AP INSERT START ===
+        # spacer so AP notice stands alone
+        await channel.send("\u200b")
 
-            logger.info(f"Channel '{channel.name}' created successfully in category '{category.name}'.")
-        except nextcord.Forbidden:
-            logger.error("Bot does not have permission to create channels.")
-        except nextcord.HTTPException as e:
-            logger.error(f"Failed to create channel: {e}")
+        # === AP HEADS-UP (BOTTOM) ===
+        ap_notes = []
+
+        for member_id in member_ids:
+            member = guild.get_member(member_id)
+            if not member:
+                continue
+
+            ap = is_on_ap(member_id, ap_list)
+            if ap:
+                shown_name = ap.get("display", member.display_name)
+                until = ap.get("until", "")
+                ap_notes.append(
+                    f"🚨 **Heads-up:** {shown_name} is on **Auto-Pilot** until "
+                    f"**{human_date(until)}**.\n"
+                    f"➡️ Please play the **CPU** for this matchup."
+                )
+
+        if ap_notes:
+            await channel.send("\n\n".join(ap_notes))
+        # === AP INSERT END ===
+
+        logger.info(f"Channel '{channel.name}' created successfully in category '{channel.category.name}'.")
+    except nextcord.Forbidden:
+        logger.error(f"Bot does not have permission to post in '{channel.name}'.")
+    except nextcord.HTTPException as e:
+        logger.error(f"Failed to seed channel '{channel.name}': {e}")
+
+async def create_channel_helper(guild, team_name, member_ids, ctx=None, message_content="Good Luck and Have Fun!"):
+    made = await _create_matchup_channel(guild, team_name, member_ids, ctx=ctx)
+    if made:
+        channel, member_info = made
+        await _seed_matchup_channel(guild, channel, member_ids, member_info, message_content)
+
+async def provision_matchup_channels(guild, specs, reuse=None, archived_ids=()) -> dict:
+    """
+    Create and seed matchup channels; specs are (name, member_ids, welcome) in category order.
+    Creations go out one after another (they share one route bucket and this keeps the order);
+    each channel is seeded in its own task as soon as it exists, CHANNEL_PROVISION_CONCURRENCY
+    at a time. `reuse` maps a name to an existing channel that is only re-tracked and seeded;
+    `archived_ids` are channels just moved out that may still share a wanted name.
+    Returns {"channels": [{"name", "create_sec", "seed_sec"}, ...], "total_sec"}.
+    """
+    reuse = reuse or {}
+    started = time.monotonic()
+    slots = asyncio.Semaphore(CHANNEL_PROVISION_CONCURRENCY)
+    timings = []
+    seeding = []
+
+    async def seed(channel, member_ids, member_info, welcome, timing):
+        async with slots:
+            t0 = time.monotonic()
+            await _seed_matchup_channel(guild, channel, member_ids, member_info, welcome)
+            timing["seed_sec"] = time.monotonic() - t0
+
+    for name, member_ids, welcome in specs:
+        t0 = time.monotonic()
+        if name in reuse:
+            channel = reuse[name]
+            member_info = [(m.mention, m.display_name or m.name)
+                           for m in (guild.get_member(mid) for mid in member_ids) if m]
+            ACTIVITY.track(channel.id, member_ids)   # a new week for this channel
+        else:
+            made = await _create_matchup_channel(guild, name, member_ids, ignore_ids=archived_ids)
+            if not made:
+                continue
+            channel, member_info = made
+        timing = {"name": name, "create_sec": time.monotonic() - t0, "seed_sec": None}
+        timings.append(timing)
+        seeding.append(asyncio.create_task(seed(channel, member_ids, member_info, welcome, timing)))
+
+    for result in await asyncio.gather(*seeding, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error(f"[PROVISION] seeding failed: {result}")
+
+    total = time.monotonic() - started
+    for t in timings:
+        seed_sec = f"{t['seed_sec']:.1f}s" if t["seed_sec"] is not None else "failed"
+        logger.info(f"[PROVISION] {t['name']}: create {t['create_sec']:.1f}s, seed {seed_sec}")
+    logger.info(f"[PROVISION] {len(timings)}/{len(specs)} channel(s) ready in {total:.1f}s")
+    return {"channels": timings, "total_sec": total}
 
 
 # Function to delete all channels in the specified category
@@ -2336,61 +2265,175 @@ def load_user_user_teams():
 
 # Function to fetch members of each team
 async def fetch_team_members(guild, team_name):
-    # Example logic to match users based on a naming convention or a lookup list (adjust based on your server setup)
+    """
+    Members playing each team of a "team-team" channel name, looked up exactly in the
+    member index (one dict hit per team, no guild scan).
+    Returns (member_ids, unmatched): unmatched holds the parts that are not an official
+    team or that no member currently claims.
+    """
+    index = _member_index(guild)
     member_ids = []
-    for member in guild.members:
-        # Check if the member's nickname or username contains part of the team name
-        if any(team_part in (member.display_name or member.name).lower() for team_part in team_name.split('-')):
-            member_ids.append(member.id)
-    return member_ids
-
-async def check_inactivity():
-    while True:
-        now = datetime.now(pytz.utc)
-        for channel_id, data in channel_activity_tracker.items():
-            elapsed_time = (now - data["created_at"]).total_seconds()
-            non_responders = [member_id for member_id in data["member_ids"] if member_id not in data["responses"]]
-
-            # Check if a reminder has been sent for this channel and ensure 4-hour interval
-            if channel_id in last_reminder_time:
-                time_since_last_reminder = (now - last_reminder_time[channel_id]).total_seconds()
-                if time_since_last_reminder < 4 * 3600:  # 4 hours
-                    continue  # Skip sending another reminder
-
-            # If no recent reminder or 4+ hours have passed, send a new reminder
-            guild = bot.get_guild(GUILD_ID)
-            channel = guild.get_channel(channel_id)
+    unmatched = []
+    for part in team_name.split('-'):
+        team = part.strip().upper()
+        claimants = index.members_for(team) if TEAMS.is_team(team) else []
+        if not claimants:
+            unmatched.append(part)
+            continue
+        if len(claimants) > 1:
+            logger.warning(f"{team} is claimed by {len(claimants)} members; inviting all of them to '{team_name}'")
+        member_ids.extend(m.id for m in claimants)
+    return member_ids, unmatched
+
+INACTIVITY_REMINDERS_ENABLED = False  # Toggle inactivity reminders ON-True or OFF-False
+INACTIVITY_JOB_PREFIX = "inactivity:"
 
-            if len(non_responders) == 1:
-                member = guild.get_member(non_responders[0])
-                await channel.send(f"{member.mention}, your opponent is waiting. Please respond.")
-            elif len(non_responders) == 2:
-                mentions = " ".join([guild.get_member(mid).mention for mid in non_responders])
-                await channel.send(f"{mentions}, let's get this game on. Please respond.")
+def _inactivity_job(channel_id: int) -> str:
+    return f"{INACTIVITY_JOB_PREFIX}{channel_id}"
 
-            # Update the last reminder time for the channel
-            last_reminder_time[channel_id] = now
+def _replan_inactivity_reminder(tracker, channel_id):
+    _plan_inactivity_reminder(channel_id)
 
-        # Check inactivity every 4 hours
-        await asyncio.sleep(4 * 3600)
+def _plan_inactivity_reminder(channel_id: int) -> None:
+    """(Re)schedule one channel's reminder at its deadline, or drop it if nobody is left to nag."""
+    due = ACTIVITY.deadline(channel_id) if INACTIVITY_REMINDERS_ENABLED else None
+    if due is None:
+        SCHEDULER.cancel(_inactivity_job(channel_id))
+        return
+    SCHEDULER.schedule(_inactivity_job(channel_id), due, check_inactivity, channel_id,
+                       note=f"inactivity reminder, channel {channel_id}")
 
-# Create channels for each user-user team with member invites
-async def create_user_user_channels(guild):
-    # 🔄 Load the latest AP file before creating any new channels
-    # ap_list = load_ap_users()
+async def check_inactivity(channel_id: int):
+    """Remind whoever has not posted in one matchup channel; the next reminder is planned from this one."""
+    non_responders = ACTIVITY.non_responders(channel_id)
+    if not non_responders:
+        return
 
+    guild = bot.get_guild(GUILD_ID)
+    channel = guild.get_channel(channel_id) if guild else None
+    if channel is None:
+        # the channel is gone; stop tracking it
+        ACTIVITY.forget([channel_id])
+        return
+
+    # members who left the server are skipped
+    members = [m for m in (guild.get_member(mid) for mid in non_responders) if m is not None]
+    try:
+        if len(members) == 1:
+            await channel.send(f"{members[0].mention}, your opponent is waiting. Please respond.")
+        elif len(members) >= 2:
+            mentions = " ".join(m.mention for m in members)
+            await channel.send(f"{mentions}, let's get this game on. Please respond.")
+    finally:
+        # counts as a reminder even if the send failed, so a broken channel is not retried in a loop
+        ACTIVITY.mark_reminded(channel_id)
+
+# The user-user team channels to build, with member invites
+async def user_user_channel_specs(guild):
+    """Returns (specs, unmatched): specs for provision_matchup_channels, unmatched {name: [teams]}."""
     user_user_teams = load_user_user_teams()
+    unmatched = {}   # channel name -> teams nobody was invited for
+    specs = []
     for team_name in user_user_teams:
         # Fetch the member IDs associated with the team
-        member_ids = await fetch_team_members(guild, team_name)
-        # Create the channel for the team and invite members
-        await create_channel_helper(
-            guild,
-            team_name=team_name,
-            member_ids=member_ids,
-            message_content=f"Welcome to the {team_name} channel!",
-            )
-        await asyncio.sleep(0.8)
+        member_ids, missing = await fetch_team_members(guild, team_name)
+        if missing:
+            unmatched[team_name] = missing
+            logger.warning(f"'{team_name}': no member found for {', '.join(missing)}")
+        specs.append((team_name, member_ids, f"Welcome to the {team_name} channel!"))
+    return specs, unmatched
+
+def playoff_channel_specs(guild):
+    """Specs for this week's playoff pairs (WEEK.pairs)."""
+    index = _member_index(guild)
+    specs = []
+    for team1, team2 in WEEK.pairs:
+        channel_name = f"{team1.lower()}-{team2.lower()}"
+        members = [m.id for t in (team1, team2) for m in index.members_for(t)]
+
+        logger.info(f"Creating playoff channel: {team1}-{team2}")
+        specs.append((channel_name, members, f"Welcome to the {team1} vs {team2} playoff matchup!"))
+    return specs
+
+# ---- Matchup channel reconciliation ----
+# "reconcile" diffs the wanted channels against last week's and applies only the changes;
+# "recreate" is the old delete-everything-then-create-everything.
+MATCHUP_CHANNEL_MODE = (os.getenv("MATCHUP_CHANNEL_MODE", "reconcile") or "reconcile").lower()
+# Leftover channels move to this category (taking its permissions); 0 deletes them instead
+MATCHUP_ARCHIVE_CATEGORY_ID = int(os.getenv("MATCHUP_ARCHIVE_CATEGORY_ID", "0") or 0)
+
+def plan_matchup_channels(guild, specs):
+    """channel_reconcile ops turning the category into `specs`, or None if the category is missing."""
+    category = guild.get_channel(CATEGORY_ID)
+    if category is None or not isinstance(category, nextcord.CategoryChannel):
+        logger.warning("Category not found or is not a valid category.")
+        return None
+    # compare against the players who can actually be invited
+    desired = [(name, [mid for mid in member_ids if guild.get_member(mid)], welcome)
+               for name, member_ids, welcome in specs]
+    existing = [(ch.id, ch.name, _channel_member_ids(ch)) for ch in category.text_channels]
+    return channel_reconcile.plan(desired, existing)
+
+async def reconcile_matchup_channels(guild, specs, dry_run: bool = False):
+    """
+    Apply the plan: rename / archive existing channels (concurrently), then create the
+    missing ones. Renamed and new channels get the welcome messages; channels kept as
+    they are only start a new week in the activity tracker.
+    With dry_run (or TEST) only logs the plan. Returns the ops, or None.
+    """
+    ops = plan_matchup_channels(guild, specs)
+    if ops is None:
+        return None
+    logger.info(f"[RECONCILE] plan: {channel_reconcile.counts(ops)}")
+    if dry_run or TEST:
+        logger.info("[RECONCILE] dry run:\n" + channel_reconcile.format_plan(ops))
+        return ops
+
+    archive_category = guild.get_channel(MATCHUP_ARCHIVE_CATEGORY_ID) if MATCHUP_ARCHIVE_CATEGORY_ID else None
+
+    slots = asyncio.Semaphore(CHANNEL_PROVISION_CONCURRENCY)
+    renamed = {}
+    archived = []
+
+    async def apply(op):
+        channel = guild.get_channel(op.channel_id)
+        if channel is None:
+            return
+        if op.kind == channel_reconcile.KEEP:
+            ACTIVITY.track(channel.id, op.member_ids)   # a new week, same conversation
+            return
+        async with slots:
+            try:
+                if op.kind == channel_reconcile.RENAME:
+                    await channel.edit(name=op.name, reason="Matchup channel reused for the new week")
+                elif op.kind == channel_reconcile.ARCHIVE:
+                    if archive_category is not None:
+                        await channel.edit(category=archive_category, sync_permissions=True,
+                                           reason="Matchup channel archived")
+                    else:
+                        await channel.delete(reason="Matchup channel no longer needed")
+                    archived.append(channel.id)
+                    logger.info(f"[RECONCILE] archived '{op.name}'")
+                    return
+            except nextcord.Forbidden:
+                logger.error(f"[RECONCILE] no permission to {op.kind} '{op.old_name or op.name}'.")
+                return
+            except nextcord.HTTPException as e:
+                logger.error(f"[RECONCILE] {op.kind} '{op.old_name or op.name}' failed: {e}")
+                return
+        logger.info(f"[RECONCILE] {op.kind} '{op.old_name}' -> '{op.name}'")
+        renamed[op.name] = channel
+
+    # archives run before the creates, so a re-created channel's name is free again
+    await asyncio.gather(*(apply(op) for op in ops if op.kind != channel_reconcile.CREATE))
+    ACTIVITY.forget(archived)
+
+    # renamed channels are seeded for their new matchup; missing ones are created
+    # (a failed rename leaves its channel out)
+    specs = [(op.name, op.member_ids, op.welcome) for op in ops
+             if op.kind == channel_reconcile.CREATE or op.name in renamed]
+    await provision_matchup_channels(guild, specs, reuse=renamed, archived_ids=set(archived))
+    return ops
 
 
 def get_time_zones():
@@ -2445,29 +2488,13 @@ def nicknames_to_users_file():
     base_dir = Path(__file__).resolve().parent
     out_path = base_dir / "wurd24users.csv"
 
-    # load canonical team names exactly as in NFL_Teams.csv (title case preserved)
-    try:
-        with open(base_dir / 'NFL_Teams.csv', 'r', encoding='utf-8') as f:
-            teams_exact = [ln.strip() for ln in f if ln.strip()]
-    except FileNotFoundError:
-        logger.error(f"NFL_Teams.csv not found at {base_dir}.")
+    # canonical team names exactly as in NFL_Teams.csv (title case preserved)
+    if not TEAMS.titles():
+        logger.error(f"NFL_Teams.csv not found at {TEAMS.csv_path}.")
         return
 
-    # precompute (UPPER, ORIGINAL) for quick startswith checks
-    lookup = [(t.upper(), t) for t in teams_exact]
-
-    taken_original_case = set()
-
-    for m in guild.members:
-        if getattr(m, "bot", False):
-            continue
-        disp = (m.display_name or m.name or "").strip()
-        disp_up = disp.upper()
-        for up, original in lookup:
-            # exact “starts with team name”
-            if disp_up.startswith(up):
-                taken_original_case.add(original)
-                break
+    upper_map = TEAMS.upper_map()
+    taken_original_case = {upper_map[t] for t in _member_index(guild).teams() if t in upper_map}
 
     # write result
     try:
@@ -2617,37 +2644,17 @@ def admin_or_authorized():
 @bot.command(name="seed_week")
 @admin_or_authorized()
 async def seed_week(ctx, week: int):
-    global _current_week, _current_pairs, _current_matchups
-    _current_week = week
-    _current_pairs = []
-    _current_matchups = {}
-    _save_week_state(
-        week,
-        [],
-        pre_sent=False,
-        advance_time=None
-    )
-    await ctx.reply(f"Seeded week_state.json → WEEK {week} (no matchups).")
+    WEEK.set_advance(week, [], advance_time=None)
+    await ctx.reply(f"Seeded week state → WEEK {week} (no matchups).")
 
 @bot.command(name="seed_advance")
 @admin_or_authorized()
 async def seed_advance(ctx, *, block: str):
-    wk, pairs, mapping = _parse_advance_block(block or "")
+    wk, pairs, _mapping = _parse_advance_block(block or "")
     if not wk or not pairs:
         return await ctx.reply("Couldn’t parse a week + matchups from your block.")
-    global _current_week, _current_pairs, _current_matchups
-    _current_week = wk
-    _current_pairs = pairs
-    _current_matchups = mapping
-
-    _save_week_state(
-        wk,
-        [[L, R] for (L, R) in pairs],
-        pre_sent=False,
-        advance_time=datetime.now(pytz.utc).isoformat()
-    )
-    # write flyer cache
-    build_week_cache_from_current_state()
+    # stores it and rebuilds the flyer week cache (subscriber)
+    WEEK.set_advance(wk, pairs, advance_time=datetime.now(pytz.utc).isoformat())
     await ctx.reply(f"Seeded WEEK {wk} with {len(pairs)} matchups. No messages posted.")
 
 
@@ -2680,9 +2687,44 @@ def is_exact_word(msg_text, word):
     return bool(match)
 
 
-# ===== BOT.LOG READER =====
+# ===== STATE STORE =====
+# SQLite-backed state and the module-level singletons built on it
+
+def _open_state_store() -> StateStore:
+    try:
+        store = StateStore(STATE_DB)
+    except sqlite3.Error as e:
+        logger.error(f"State store unavailable ({STATE_DB}): {e} — state will not survive a restart")
+        return StateStore(":memory:")
+
+    # One-shot import of the JSON files this state used to live in
+    store.migrate_json_files({
+        "week_state": WEEK_STATE_FILE,
+        "playtime": PLAYTIME_FILE,
+        "gotw": GOTW_STATE_FILE,
+        "ap_state": AP_STATE_FILE,
+        "ap_notified": AP_NOTIFIED_FILE,
+        "commissioner_advance": COMMISSIONER_ADVANCE_STATE_FILE,
+        "week_cache": WEEK_CACHE_PATH,
+    })
+    return store
+
+STATE = _open_state_store()
+
+# The learned week, in memory; setters write through to STATE and notify subscribers
+WEEK = WeekState(STATE)
+
+# Delayed advance work (exports, GOTW) stored in STATE; replayed on_ready, run by SCHEDULER
+JOBS = JobQueue(STATE, SCHEDULER)
+
+# Who has posted in each matchup channel; stored in STATE, so a restart does not rescan history
+ACTIVITY = ActivityTracker(STATE)
+ACTIVITY.subscribe(_replan_inactivity_reminder)
+
+# ===== END STATE STORE =====
 
-LOG_BACKUP_GLOB = "bot.log*"       # we'll read bot.log, bot.log.1, ... (in modified-time order)
+
+# ===== BOT.LOG READER =====
 
 # Gate: only Admin role or AUTHORIZED_USERS can use the log reader
 def _is_authorized(member) -> bool:
@@ -2693,343 +2735,137 @@ def _is_authorized(member) -> bool:
     except Exception:
         return False
 
-# Parse one cohesive entry that looks like:
-# Phoenix Time: 09-23-25 06:52 PM
-# Channel: lobby-talk (or "Direct Message")
-# Username: Foo | ID: 123
-# User Message: text...
-#
-# We detect entries by the "Phoenix Time:" line and collect the following 3 lines.
-PT_LINE = "Phoenix Time:"
-CH_LINE = "Channel:"
-UN_LINE = "Username:"
-UM_LINE = "User Message:"
-
-def _iter_log_entries(lines: list[str]):
-    """Yield dicts with datetime, forum, username, user_id, message. Tolerant to missing parts."""
-    entry = {}
-    expect_block = False
-    tz_az = pytz.timezone('US/Arizona')
-
-    for raw in lines:
-        line = raw.rstrip("\n")
-        if line.startswith(PT_LINE):
-            # Start new entry
-            # Example: "Phoenix Time: 09-23-25 06:52 PM"
-            entry = {}
-            expect_block = True
-            try:
-                stamp = line.split(":", 1)[1].strip()
-                dt = datetime.strptime(stamp, "%m-%d-%y %I:%M %p")
-                entry["dt"] = tz_az.localize(dt)
-            except Exception:
-                entry["dt"] = None
-
-        elif expect_block and line.startswith(CH_LINE):
-            entry["forum"] = line.split(":", 1)[1].strip()
+# ---- Message archive (SQLite) ----
 
-        elif expect_block and line.startswith(UN_LINE):
-            # "Username: Name | ID: 123"
-            try:
-                payload = line.split(":", 1)[1].strip()
-                if " | ID:" in payload:
-                    uname, uid = payload.split(" | ID:", 1)
-                    entry["username"] = uname.strip()
-                    entry["user_id"] = uid.strip()
-                else:
-                    entry["username"] = payload
-                    entry["user_id"] = ""
-            except Exception:
-                entry["username"] = ""
-                entry["user_id"] = ""
-
-        elif expect_block and line.startswith(UM_LINE):
-            entry["message"] = line.split(":", 1)[1].strip()
-            # Emit on message line (our block ends here in your logger)
-            yield entry
-            entry = {}
-            expect_block = False
-
-    # no trailing yield; block closes only when we see User Message
-
-def _read_recent_log_lines(days_back: int) -> list[str]:
-    """Read bot.log and its backups newest->oldest; return lines within days_back window."""
-    files = sorted(
-        glob.glob(LOG_BACKUP_GLOB),
-        key=lambda p: os.path.getmtime(p),
-        reverse=True
-    )
+def _open_message_archive() -> MessageArchive | None:
+    try:
+        archive = MessageArchive(MESSAGE_ARCHIVE_DB, tz=pytz.timezone('US/Arizona'))
+    except sqlite3.Error as e:
+        logger.error(f"Message archive unavailable ({MESSAGE_ARCHIVE_DB}): {e} — !logs will re-read the message log")
+        return None
 
-    lines_kept = []
-    # Read newest first; we’ll still filter by date after parsing
-    for path in files:
+    # First run: seed the archive once from the history still on disk (legacy bot.log,
+    # then messages.jsonl); from here on it only takes live messages
+    if archive.is_empty():
         try:
-            with open(path, "r", encoding="utf-8", errors="replace") as f:
-                lines_kept.extend(f.readlines())
-        except Exception:
-            continue
-    # We return raw lines; time filtering happens after parsing so we don’t miss multi-line blocks
-    return lines_kept
-
-def _group_entries(entries):
-    """Group into OrderedDict[date_str][forum] -> list[entry]. date_str in AZ local."""
-    tz_az = pytz.timezone('US/Arizona')
-    by_date = defaultdict(lambda: defaultdict(list))
-    for e in entries:
-        dt = e.get("dt")
-        if not dt:
-            continue
-        d = dt.astimezone(tz_az).date()
-        date_key = d.strftime("%Y-%m-%d (%a)")
-        forum = e.get("forum") or "Unknown"
-        by_date[date_key][forum].append(e)
-    # Sorted by date ascending
-    ordered = OrderedDict(sorted(by_date.items(), key=lambda kv: kv[0]))
-    # Sort each forum’s entries by time
-    for date_key in ordered:
-        for forum in ordered[date_key]:
-            ordered[date_key][forum].sort(key=lambda e: e["dt"])
-    return ordered
-
-def _sanitize_message(msg: str) -> str:
-    """
-    Remove Discord embeds by breaking URLs.
-    Example: 'https://twitch.tv/foo' -> '<https://twitch.tv/foo>'
-    (wrapped in angle brackets disables embedding)
-    """
-    if not msg:
-        return msg
-    # Wrap all http/https URLs in < >
-    return re.sub(r'(https?://\S+)', r'<\1>', msg)
+            seeded = archive.add_entries(read_seed_entries(DEFAULT_LOG_LOOKBACK_DAYS))
+            logger.info(f"Message archive seeded with {seeded} message(s) from {LEGACY_LOG_GLOB} + {MESSAGE_LOG_GLOB}")
+        except Exception as e:
+            logger.warning(f"Message archive seed from {LEGACY_LOG_GLOB} + {MESSAGE_LOG_GLOB} failed: {e}")
+    return archive
+
+MESSAGE_ARCHIVE = _open_message_archive()
 
-def _render_day_all_forums(grouped, the_date: str):
+def _log_archive(since: datetime | None = None) -> MessageArchive:
     """
-    Render ALL forums for a specific date (YYYY-MM-DD), excluding 'Direct Message'.
-    Sections:
-      # Date header
-      ## Forum name — N messages
-         - HH:MM AM/PM — user: message
+    The on-disk archive, or a throwaway in-memory copy of the message log if it could not be opened.
+    `since` narrows the message-log read for the fallback (e.g. a single-day query).
     """
-    tz_az = pytz.timezone('US/Arizona')
-    date_key_prefix = the_date.strip()  # our grouped keys look like "YYYY-MM-DD (Dow)"
-
-    # Find the matching date key
-    day_forums = None
-    for date_key, forum_map in grouped.items():
-        if date_key.startswith(date_key_prefix):
-            day_forums = forum_map
-            break
+    if MESSAGE_ARCHIVE is not None:
+        return MESSAGE_ARCHIVE
+    fallback = MessageArchive(":memory:", tz=pytz.timezone('US/Arizona'))
+    fallback.add_entries(read_seed_entries(DEFAULT_LOG_LOOKBACK_DAYS, since=since))
+    return fallback
 
-    if day_forums is None:
-        return f"No messages found on {the_date}."
+# One writer thread: keeps archive inserts in arrival order and the SQLite commit off the event loop
+_ARCHIVE_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
 
-    # Build output: sort forums by message count desc, then name asc
-    forums = []
-    for forum, items in day_forums.items():
-        if forum.lower() == "direct message":
-            continue
-        forums.append((forum, items))
-    if not forums:
-        return f"No server-channel messages on {the_date}."
-
-    forums.sort(key=lambda x: (-len(x[1]), x[0]))
-
-    lines = [f"__**{the_date}**__"]
-    for forum, items in forums:
-        # items should already be time-sorted by _group_entries
-        lines.append(f"**{forum}** — {len(items)} message(s)")
-        for e in items:
-            t = e["dt"].astimezone(tz_az).strftime("%I:%M %p").lstrip("0")
-            user = e.get("username", "")
-            msg = _sanitize_message((e.get("message") or "").strip()) or "(no content)"
-            lines.append(f"- **{t}** — {user}: {msg}")
-        lines.append("")  # blank line between forums
-
-    return "\n".join(lines).rstrip()
-
-# ---- Forum filtering / rendering helpers ----
-
-DEFAULT_LOG_LOOKBACK_DAYS = int(os.getenv("LOG_LOOKBACK_DAYS", "14"))
-DEFAULT_FORUM_LIMIT = int(os.getenv("LOGS_FORUM_DEFAULT_LIMIT", "100"))
+def _archive_write(ts, channel_name, user_id, username, content, channel_id, discord_id) -> None:
+    try:
+        MESSAGE_ARCHIVE.add(ts, channel_name, user_id, username, content,
+                            channel_id=channel_id, discord_id=discord_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Message archive write failed: {e}")
 
-def _normalize_forum_name(s: str) -> str:
-    if not s:
-        return ""
-    s = s.strip().lower()
-    s = s.replace("_", "-").replace(" ", "-")
-    # collapse duplicate hyphens
-    s = re.sub(r"-{2,}", "-", s)
-    return s
+def _archive_message(msg, channel_name: str) -> None:
+    if MESSAGE_ARCHIVE is None:
+        return
+    _ARCHIVE_WRITER.submit(
+        _archive_write,
+        msg.created_at.timestamp(),
+        channel_name,
+        msg.author.id,
+        msg.author.display_name,
+        str(msg.content),
+        getattr(msg.channel, "id", None),
+        msg.id,
+    )
 
-def _entries_for_forum(entries: list, forum_query: str):
-    """
-    Return (filtered_entries, canonical_forum_name or forum_query)
-    Matches exact normalized name first; otherwise substring match on normalized names.
-    """
-    qn = _normalize_forum_name(forum_query)
-    if not qn:
-        return [], forum_query
-
-    # Build map: forum_name -> [entries...]
-    by_forum = {}
-    for e in entries:
-        f = e.get("forum") or ""
-        by_forum.setdefault(f, []).append(e)
-
-    # Score forums for best match
-    scored = []  # (score, forum_name)
-    for forum_name in by_forum.keys():
-        fn = _normalize_forum_name(forum_name)
-        score = 0
-        if fn == qn:
-            score = 3
-        elif fn.startswith(qn):
-            score = 2
-        elif qn in fn:
-            score = 1
-        if score:
-            scored.append((score, forum_name))
-
-    if not scored:
-        return [], forum_query
-
-    # Pick best score, tie-break by shorter name
-    best_score = max(s for s, _ in scored)
-    candidates = [name for s, name in scored if s == best_score]
-    candidates.sort(key=len)
-    chosen = candidates[0]
-
-    return by_forum.get(chosen, []), chosen
-
-def _render_forum(entries: list, forum_query: str, limit: int = DEFAULT_FORUM_LIMIT, only_date: str | None = None) -> str:
-    """
-    entries: list from _iter_log_entries (each has dt, forum, username, message)
-    forum_query: name or partial (e.g., 'bills-panthers')
-    limit: last N messages across the lookback window
-    only_date: optional 'YYYY-MM-DD' to restrict to that day (AZ time)
-    """
-    tz_az = pytz.timezone('US/Arizona')
+def get_lobby_talk_channel(guild):
+    return nextcord.utils.get(guild.text_channels, name="lobby-talk")
 
-    # Filter to forum
-    f_entries, canonical = _entries_for_forum(entries, forum_query)
-    if not f_entries:
-        return f"No messages found for forum '{forum_query}' in the last {DEFAULT_LOG_LOOKBACK_DAYS} day(s)."
+# ---- !logs worker (keeps the event loop free) ----
 
-    # Optional date filter
-    if only_date:
-        def same_day(e):
-            if not e.get("dt"): return False
-            return e["dt"].astimezone(tz_az).strftime("%Y-%m-%d") == only_date
-        f_entries = [e for e in f_entries if same_day(e)]
-
-        if not f_entries:
-            return f"No messages found for **{canonical}** on {only_date}."
-
-    # Sort by time, take the last `limit`
-    f_entries.sort(key=lambda e: e.get("dt") or datetime.min.replace(tzinfo=tz_az))
-    if limit and limit > 0:
-        f_entries = f_entries[-limit:]
-
-    # Group by date for nice headings
-    by_date = defaultdict(list)
-    for e in f_entries:
-        dkey = e["dt"].astimezone(tz_az).date().strftime("%Y-%m-%d (%a)") if e.get("dt") else "Unknown Date"
-        by_date[dkey].append(e)
-
-    # Build output
-    lines = [f"__**Forum:**__ **{canonical}** — {len(f_entries)} message(s)"]
-    if only_date:
-        lines[0] += f" on {only_date}"
-    lines.append("")  # blank
-
-    for dkey in sorted(by_date.keys()):
-        lines.append(f"**{dkey}**")
-        for e in by_date[dkey]:
-            t = e["dt"].astimezone(tz_az).strftime("%I:%M %p").lstrip("0") if e.get("dt") else "??:??"
-            user = e.get("username", "")
-            msg = _sanitize_message((e.get("message") or "").strip()) or "(no content)"
-            lines.append(f"- **{t}** — {user}: {msg}")
-        lines.append("")
+LOGS_MAX_CONCURRENT = max(1, int(os.getenv("LOGS_MAX_CONCURRENT", "1") or 1))
+_logs_slots = asyncio.Semaphore(LOGS_MAX_CONCURRENT)
 
-    return "\n".join(lines).rstrip()
+async def _logs_progress(status, text: str) -> None:
+    """Best-effort edit of the !logs status message."""
+    if status is None:
+        return
+    try:
+        await status.edit(content=text)
+    except Exception:
+        pass
 
-def _render_user(
-    entries: list,
-    user_query: str,
-    limit: int = DEFAULT_FORUM_LIMIT,
-    only_date: str | None = None
-) -> str:
+def _build_logs_result(
+    search_query: str | None,
+    forum_query: str | None,
+    user_query: str | None,
+    only_date: str | None,
+    limit: int
+) -> tuple[str, str, list[dict]]:
     """
-    Render log lines filtered by username / ID fragment across ALL forums.
-
-    - user_query can be part of the username (e.g., 'panthers') or a full ID.
-    - Looks only within DEFAULT_LOG_LOOKBACK_DAYS worth of log files.
+    Everything !logs does that touches disk or burns CPU: open the archive
+    (or re-read the message log), query and render.
+    Returns (header, body, rendered entries).
+    Runs in a worker thread via asyncio.to_thread — no Discord calls in here.
     """
-    tz_az = pytz.timezone('US/Arizona')
-    q = (user_query or "").strip().lower()
-    if not q:
-        return "No user query provided."
-
-    filtered = []
-
-    for e in entries:
-        dt = e.get("dt")
-
-        # Optional date filter (YYYY-MM-DD in AZ time)
-        if only_date:
-            if not dt:
-                continue
-            if dt.astimezone(tz_az).strftime("%Y-%m-%d") != only_date:
-                continue
-
-        uname = (e.get("username") or "").strip()
-        uid_raw = str(e.get("user_id") or "").strip()
-
-        # Match if query is in username or equals the numeric ID
-        if q in uname.lower() or q == uid_raw.lower():
-            filtered.append(e)
-
-    if not filtered:
-        msg = f"No messages found for user '{user_query}'"
-        if only_date:
-            msg += f" on {only_date}"
-        msg += f" in the last {DEFAULT_LOG_LOOKBACK_DAYS} day(s)."
-        return msg
-
-    # Sort by time and limit to last N
-    filtered.sort(key=lambda e: e.get("dt") or datetime.min.replace(tzinfo=tz_az))
-    if limit and limit > 0:
-        filtered = filtered[-limit:]
-
-    # Group by date for neat output
-    by_date = defaultdict(list)
-    for e in filtered:
-        if e.get("dt"):
-            dkey = e["dt"].astimezone(tz_az).date().strftime("%Y-%m-%d (%a)")
-        else:
-            dkey = "Unknown Date"
-        by_date[dkey].append(e)
+    # A pure date query only needs the log back to the start of that day.
+    read_since = None
+    if only_date and not forum_query and not user_query and not search_query:
+        day_start = datetime.fromtimestamp(az_day_bounds(only_date)[0], pytz.timezone('US/Arizona'))
+        lookback = datetime.now(pytz.timezone('US/Arizona')) - timedelta(days=DEFAULT_LOG_LOOKBACK_DAYS)
+        read_since = max(day_start, lookback)
+    archive = _log_archive(since=read_since)
+
+    entries = []
+    day_suffix = f" — {only_date}" if only_date else ""
+    if search_query:
+        header = f"**Message log — search: {search_query}**{day_suffix}"
+        body = render_search(archive, search_query=search_query, limit=limit, only_date=only_date, entries_out=entries)
+    elif forum_query:
+        header = f"**Message log — forum: {forum_query}**{day_suffix}"
+        body = render_forum(archive, forum_query=forum_query, limit=limit, only_date=only_date, entries_out=entries)
+    elif user_query:
+        header = f"**Message log — user: {user_query}**{day_suffix}"
+        body = render_user(archive, user_query=user_query, limit=limit, only_date=only_date, entries_out=entries)
+    else:
+        header = f"**Message log — {only_date} — all forums**"
+        body = render_day_all_forums(archive, the_date=only_date, entries_out=entries)
 
-    lines = [f"__**User filter:**__ `{user_query}` — {len(filtered)} message(s)"]
-    if only_date:
-        lines[0] += f" on {only_date}"
-    lines.append("")
+    return header, body, entries
 
-    for dkey in sorted(by_date.keys()):
-        lines.append(f"**{dkey}**")
-        for e in by_date[dkey]:
-            dt = e.get("dt")
-            t = dt.astimezone(tz_az).strftime("%I:%M %p").lstrip("0") if dt else "??:??"
-            forum = e.get("forum") or "Unknown"
-            uname = (e.get("username") or "").strip()
-            msg = _sanitize_message((e.get("message") or "").strip()) or "(no content)"
-            lines.append(f"- **{t}** — #{forum} — {uname}: {msg}")
-        lines.append("")
+# ---- !logs file attachments ----
 
-    return "\n".join(lines).rstrip()
+LOGS_ATTACH_THRESHOLD = int(os.getenv("LOGS_ATTACH_THRESHOLD", "4000") or 4000)   # chars of rendered text
+LOGS_ATTACH_MAX_BYTES = int(os.getenv("LOGS_ATTACH_MAX_BYTES", str(8 * 1024 * 1024)) or 8 * 1024 * 1024)
+LOGS_DEFAULT_FORMAT = os.getenv("LOGS_DEFAULT_FORMAT", "md")
+LOGS_FORMATS = {"txt": "txt", "md": "md", "markdown": "md", "jsonl.gz": "jsonl.gz", "jsonl": "jsonl.gz", "gz": "jsonl.gz"}
 
-def get_lobby_talk_channel(guild):
-    return nextcord.utils.get(guild.text_channels, name="lobby-talk")
+def _logs_file_name(search_query, forum_query, user_query, only_date, fmt: str) -> str:
+    if search_query:
+        mode, what = "search", search_query
+    elif forum_query:
+        mode, what = "forum", forum_query
+    elif user_query:
+        mode, what = "user", user_query
+    else:
+        mode, what = "day", ""
+    slug = re.sub(r"[^a-z0-9]+", "-", what.lower()).strip("-")[:40]
+    day = only_date or datetime.now(pytz.timezone('US/Arizona')).strftime("%Y-%m-%d")
+    parts = ["logs", mode] + ([slug] if slug else []) + [day]
+    return "-".join(parts) + f".{fmt}"
 
 @bot.command(name="logs")
 async def logs_cmd(ctx, *, rest: str = ""):
@@ -3043,29 +2879,49 @@ async def logs_cmd(ctx, *, rest: str = ""):
       • !logs bills-panthers here
       • !logs forum="bills panthers"    # spaces ok if quoted
       • !logs user=panthers [limit=50] [date=YYYY-MM-DD] [here]
+      • !logs search="disconnect quit 'rage quit'" [limit=20] [date=YYYY-MM-DD] [here]
+      • any of the above + format=txt|md|jsonl.gz   # send one file instead of chunked messages
 
     Notes:
       - Replies by DM unless you add 'here'.
-      - Looks back DEFAULT_LOG_LOOKBACK_DAYS across bot.log files.
+      - Looks back DEFAULT_LOG_LOOKBACK_DAYS in the message archive (data/messages.db).
       - Limit defaults to DEFAULT_FORUM_LIMIT (env overridable).
+      - search= matches any of the words or 'quoted phrases' (as written). Phrase hits rank higher.
+      - Work runs in a background thread; at most LOGS_MAX_CONCURRENT queries run at once.
+      - Output over LOGS_ATTACH_THRESHOLD characters is sent as a single LOGS_DEFAULT_FORMAT file.
     """
 
     author = ctx.author
     text = (rest or "").strip()
 
+    # --- parse args ---
+    # search= takes a "quoted value" or everything up to the next option (or a trailing 'here'),
+    # so pull it out before the others and before looking for the 'here' flag
+    m_search = re.search(
+        r'search\s*=\s*("[^"]*"|.+?)(?=\s+(?:(?:forum|user|limit|date|format)\s*=|here\s*$)|$)',
+        text, flags=re.IGNORECASE,
+    )
+    search_query = None
+    if m_search:
+        search_query = m_search.group(1).strip()
+        text = (text[:m_search.start()] + " " + text[m_search.end():]).strip()
+
     # detect and strip the 'here' flag (so it doesn't pollute forum/user names)
     want_here = bool(re.search(r'\bhere\b', text, flags=re.IGNORECASE))
     if want_here:
         text = re.sub(r'\bhere\b', '', text, flags=re.IGNORECASE).strip()
 
-    # --- parse args ---
     m_date = re.search(r'date\s*=\s*(\d{4}-\d{2}-\d{2})', text, flags=re.IGNORECASE)
     m_forum = re.search(r'forum\s*=\s*("?)(.+?)\1($|\s)', text, flags=re.IGNORECASE)  # supports forum="bills panthers"
     m_limit = re.search(r'limit\s*=\s*(\d{1,4})', text, flags=re.IGNORECASE)
     m_user = re.search(r'user\s*=\s*("?)(.+?)\1($|\s)', text, flags=re.IGNORECASE)
+    m_format = re.search(r'format\s*=\s*(\S+)', text, flags=re.IGNORECASE)
+    if m_format:
+        text = (text[:m_format.start()] + " " + text[m_format.end():]).strip()
 
     only_date = m_date.group(1) if m_date else None
     limit = int(m_limit.group(1)) if m_limit else DEFAULT_FORUM_LIMIT
+    file_format = LOGS_FORMATS.get(m_format.group(1).lower()) if m_format else None
 
     forum_query = None
     user_query = None
@@ -3074,7 +2930,7 @@ async def logs_cmd(ctx, *, rest: str = ""):
         forum_query = m_forum.group(2).strip()
     elif m_user:
         user_query = m_user.group(2).strip()
-    else:
+    elif not search_query:
         # if user typed a bare token and NOT a pure date usage, treat it as forum shorthand
         # (e.g., "!logs bills-panthers")
         if text and not re.search(r'\bdate\s*=', text, flags=re.IGNORECASE):
@@ -3089,79 +2945,117 @@ async def logs_cmd(ctx, *, rest: str = ""):
                 await ctx.reply("Sorry, you’re not authorized to use the log reader.")
         return
 
-    # --- acknowledge if in-guild and not forcing 'here' ---
-    if ctx.guild and not want_here:
+    if only_date:
         try:
-            await ctx.reply("I’m sending the log info to your DMs…")
-        except:
-            pass
+            datetime.strptime(only_date, "%Y-%m-%d")
+        except ValueError:
+            await ctx.reply(f"`{only_date}` is not a valid date (use YYYY-MM-DD).")
+            return
 
-    # --- read logs once ---
-    raw_lines = _read_recent_log_lines(DEFAULT_LOG_LOOKBACK_DAYS)
-    entries = list(_iter_log_entries(raw_lines))
+    if m_format and not file_format:
+        await ctx.reply(f"`{m_format.group(1)}` is not a log format (use txt, md or jsonl.gz).")
+        return
 
-    chunks = []
+    if not (search_query or forum_query or user_query or only_date):
+        usage = (
+            "Usage:\n"
+            "  `!logs date=YYYY-MM-DD`\n"
+            "OR\n"
+            "  `!logs forum=NAME [limit=N] [date=YYYY-MM-DD]`\n"
+            "OR\n"
+            "  `!logs user=NAME [limit=N] [date=YYYY-MM-DD]`\n"
+            "OR\n"
+            "  `!logs search=\"words 'exact phrase'\" [limit=N] [date=YYYY-MM-DD]`"
+        )
+        try:
+            if ctx.guild and not want_here:
+                await author.send(usage)
+            else:
+                await ctx.reply(usage)
+        except:
+            pass
+        return
 
-    if forum_query:
-        # Forum mode
-        header = f"**bot.log — forum: {forum_query}**"
-        if only_date:
-            header += f" — {only_date}"
-        body = _render_forum(entries, forum_query=forum_query, limit=limit, only_date=only_date)
-        chunks = [header] + split_message(body)
+    # --- acknowledge; this message doubles as the progress line ---
+    status = None
+    try:
+        if ctx.guild and not want_here:
+            status = await ctx.reply("I’m sending the log info to your DMs…")
+        else:
+            status = await ctx.reply("Working on it…")
+    except:
+        pass
 
-    elif user_query:
-        # User mode
-        header = f"**bot.log — user: {user_query}**"
-        if only_date:
-            header += f" — {only_date}"
-        body = _render_user(entries, user_query=user_query, limit=limit, only_date=only_date)
-        chunks = [header] + split_message(body)
+    # --- archive reads + rendering run in a worker thread, a few at a time ---
+    started = time.monotonic()
+    if _logs_slots.locked():
+        await _logs_progress(status, "Another `!logs` is running — you’re queued…")
+    async with _logs_slots:
+        await _logs_progress(status, "Reading the message archive…")
+        try:
+            header, body, entries = await asyncio.to_thread(
+                _build_logs_result, search_query, forum_query, user_query, only_date, limit
+            )
+            # Big results go out as one attachment instead of dozens of chunked messages
+            if not file_format and len(body) > LOGS_ATTACH_THRESHOLD:
+                file_format = LOGS_FORMATS.get(LOGS_DEFAULT_FORMAT, "md")
+            if file_format:
+                payload = await asyncio.to_thread(render_file_payload, header, body, entries, file_format)
+                filename = _logs_file_name(search_query, forum_query, user_query, only_date, file_format)
+            else:
+                chunks = [header] + split_message(body)
+        except Exception as e:
+            logger.error(f"!logs failed: {e}")
+            await _logs_progress(status, "Sorry, reading the logs failed. Check bot.log for details.")
+            return
 
-    else:
-        # Date mode (original behavior)
-        if not only_date:
-            usage = (
-                "Usage:\n"
-                "  `!logs date=YYYY-MM-DD`\n"
-                "OR\n"
-                "  `!logs forum=NAME [limit=N] [date=YYYY-MM-DD]`\n"
-                "OR\n"
-                "  `!logs user=NAME [limit=N] [date=YYYY-MM-DD]`"
+    if file_format:
+        if len(payload) > LOGS_ATTACH_MAX_BYTES:
+            await _logs_progress(
+                status,
+                f"That result is {len(payload) / 1024 / 1024:.1f} MB — too big to upload. "
+                f"Narrow it with limit= or date=, or use format=jsonl.gz."
             )
-            try:
-                if ctx.guild and not want_here:
-                    await author.send(usage)
-                else:
-                    await ctx.reply(usage)
-            except:
-                pass
             return
+        caption = f"{header} — {len(entries)} message(s), attached as `{filename}`"
+        done_note = f"sent `{filename}`"
+        await _logs_progress(status, f"Uploading `{filename}` ({len(payload) / 1024:.1f} KB)…")
+    else:
+        done_note = f"{len(chunks)} message(s)"
+        await _logs_progress(status, f"Sending {len(chunks)} message(s)…")
 
-        grouped = _group_entries([e for e in entries if e.get("dt")])
-        header = f"**bot.log — {only_date} — all forums**"
-        body = _render_day_all_forums(grouped, the_date=only_date)
-        chunks = [header] + split_message(body)
+    async def _deliver(send):
+        if file_format:
+            # A fresh File per attempt: a failed DM upload has already consumed the stream
+            await send(content=caption, file=File(io.BytesIO(payload), filename=filename))
+        else:
+            for c in chunks:
+                await send(c)
 
     # --- deliver (DM first unless 'here') ---
     delivered = False
     if not want_here:
         try:
-            for c in chunks:
-                await author.send(c)
+            await _deliver(author.send)
             delivered = True
         except Exception as dm_err:
             logger.warning(f"!logs DM failed; falling back to channel: {dm_err}")
 
     if not delivered:
         try:
-            for c in chunks:
-                await ctx.reply(c)
+            await _deliver(ctx.reply)
+            delivered = True
             if not want_here:
                 await ctx.reply("*(Heads-up: I couldn’t DM you. Check Privacy Settings → Allow DMs from server members.)*")
         except Exception as ch_err:
             logger.error(f"!logs delivery failed in channel as well: {ch_err}")
 
+    elapsed = time.monotonic() - started
+    if delivered:
+        await _logs_progress(status, f"Done — {done_note} in {elapsed:.1f}s.")
+    else:
+        await _logs_progress(status, f"Sorry, sending the logs failed after {elapsed:.1f}s. Check bot.log for details.")
+
 # ===== END BOT.LOG READER =====
 
 
@@ -3312,34 +3206,12 @@ def extract_streamer_name_from_url(url: str) -> str:
     return last.replace("@", "").lower()
 
 
-def load_streamers_json() -> list:
-    try:
-        if not os.path.exists(STREAMERS_JSON_PATH):
-            return []
-
-        with open(STREAMERS_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        return data if isinstance(data, list) else []
-
-    except Exception as e:
-        logger.warning(f"[STREAMERS] Failed to load streamers.json: {e}")
-        return []
-
-
-def save_streamers_json(streamers: list) -> None:
-    try:
-        os.makedirs(os.path.dirname(STREAMERS_JSON_PATH), exist_ok=True)
-
-        tmp = STREAMERS_JSON_PATH + ".tmp"
+# In-memory, indexed copy of streamers.json; changes are flushed to the file (debounced)
+STREAMERS = open_streamers_registry(STREAMERS_JSON_PATH)
 
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(streamers, f, indent=2)
 
-        os.replace(tmp, STREAMERS_JSON_PATH)
-
-    except Exception as e:
-        logger.warning(f"[STREAMERS] Failed to save streamers.json: {e}")
+def load_streamers_json() -> list:
+    return STREAMERS.records()
 
 
 def update_streamers_json_from_message(msg, url: str) -> bool:
@@ -3357,8 +3229,6 @@ def update_streamers_json_from_message(msg, url: str) -> bool:
         )
         return False
 
-    streamers = load_streamers_json()
-
     new_entry = {
         "discord_id": str(msg.author.id),
         "name": streamer_name,
@@ -3367,33 +3237,76 @@ def update_streamers_json_from_message(msg, url: str) -> bool:
         "url": url
     }
 
-    for existing in streamers:
-        same_discord_user = str(existing.get("discord_id", "")) == str(msg.author.id)
-        same_url = existing.get("url", "").rstrip("/").lower() == url.rstrip("/").lower()
-        same_name_platform = (
-            existing.get("name", "").lower() == streamer_name.lower()
-            and existing.get("platform", "").lower() == platform.lower()
-        )
+    # matched by discord id, URL or (platform, name), same as before
+    result = STREAMERS.upsert(new_entry)
+    if result == "added":
+        logger.info(f"[STREAMERS] Added {streamer_name} → {team}")
+    elif result == "updated":
+        logger.info(f"[STREAMERS] Updated {streamer_name} → {team}")
+    return True
 
-        if same_discord_user or same_url or same_name_platform:
-            existing.update(new_entry)
-            save_streamers_json(streamers)
-            logger.info(f"[STREAMERS] Updated {streamer_name} → {team}")
-            return True
+LOBBY_PERSONALITY_JOB = "lobby_personality"
 
-    streamers.append(new_entry)
-    save_streamers_json(streamers)
+async def _lobby_personality_job():
+    await send_personality_messages(bot, logger, ADVANCE_INFO_FILE, get_lobby_talk_channel)
+    SCHEDULER.schedule(LOBBY_PERSONALITY_JOB, next_personality_check(), _lobby_personality_job,
+                       note="lobby personality post check")
+
+
+@bot.command(name="jobs")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def jobs(ctx):
+    """List the scheduler's pending timed jobs, soonest first."""
+    pending = SCHEDULER.pending()
+    if not pending:
+        await ctx.send("No scheduled jobs.")
+        return
+
+    tz = pytz.timezone("US/Arizona")
+    now = time.time()
+    lines = [f"**Scheduled jobs ({len(pending)})**"]
+    for job in pending:
+        due = datetime.fromtimestamp(job.due, tz).strftime("%a %b %d %I:%M:%S %p AZ")
+        left = job.due - now
+        eta = "due now" if left <= 0 else f"in {int(left // 3600)}h {int(left % 3600 // 60)}m"
+        lines.append(f"• `{job.name}` — {due} ({eta})" + (f" — {job.note}" if job.note else ""))
+    for chunk in split_message("\n".join(lines)):
+        await ctx.send(chunk)
+
+
+@bot.command(name="matchup_plan")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def matchup_plan(ctx, source: str = "teams"):
+    """Dry run: what the next advance would do to the matchup channels (`!matchup_plan playoffs` uses WEEK's pairs)."""
+    guild = ctx.guild or bot.get_guild(GUILD_ID)
+    if source.lower().startswith("playoff"):
+        specs = playoff_channel_specs(guild)
+    else:
+        specs, _ = await user_user_channel_specs(guild)
+
+    ops = plan_matchup_channels(guild, specs)
+    if ops is None:
+        await ctx.send("Category not found or is not a valid category.")
+        return
+
+    def player(mid):
+        member = guild.get_member(mid)
+        return member.display_name if member else str(mid)
+
+    report = channel_reconcile.format_plan(ops, player)
+    if MATCHUP_CHANNEL_MODE == "recreate":
+        report += "\n_(MATCHUP_CHANNEL_MODE is recreate: the advance deletes and recreates instead.)_"
+    for chunk in split_message(report):
+        await ctx.send(chunk)
 
-    logger.info(f"[STREAMERS] Added {streamer_name} → {team}")
-    return True
 
 ### THIS IS A DEBUGGING COMMAND TEMP
 @bot.command(name="debug_advance")
 @commands.has_role(ADMIN_ROLE_NAME)
 async def debug_advance(ctx):
-    await ctx.send(f"Current week: {_current_week}")
-    await ctx.send(f"Current pairs: {_current_pairs}")
-    await ctx.send(f"Current matchups: {_current_matchups}")
+    await ctx.send(f"Current week: {WEEK.week}")
+    await ctx.send(f"Current pairs: {WEEK.pairs}")
+    await ctx.send(f"Current matchups: {WEEK.matchups}")
 
 
 # Event handler for bot login and startup details
@@ -3402,7 +3315,6 @@ async def on_ready():
     global personality_loop_started
     global startup_loops_started
     global members_synced_on_startup
-    global _current_week, _current_pairs, _current_matchups
 
     load_team_id_mapping()
 
@@ -3415,6 +3327,9 @@ async def on_ready():
         logger.info(f"Logged in as {bot.user.name}")
         load_ap_users(force=True)
 
+        # member <-> team index; member events keep it current from here on
+        MEMBER_INDEX.rebuild(guild.members)
+
     except Exception as e:
         logger.error(f"Error during bot startup: {e}")
         return
@@ -3433,58 +3348,46 @@ async def on_ready():
         except Exception as e:
             logger.warning(f"Discord member sync failed: {e}")
 
-    # Start background loops only once
+    # Register the timed jobs only once; the scheduler runs them at their deadlines
     if not startup_loops_started:
-        bot.loop.create_task(pre_advance_reminder_loop())
-        bot.loop.create_task(commissioner_advance_reminder_loop())
-        bot.loop.create_task(ap_return_reminder_loop())
-        bot.loop.create_task(ap_trigger_watcher())
+        SCHEDULER.start()
+        JOBS.replay()   # delayed advance work that was pending when the bot stopped
+        _plan_pre_advance_reminder()
+        _plan_commissioner_advance_reminder()
+        SCHEDULER.schedule_in(AP_RETURN_REMINDER_JOB, 10, ap_return_reminder, note="AP return reminder (startup)")
+        SCHEDULER.schedule_in(AP_TRIGGER_JOB, 0, ap_trigger_watcher, note="AP editor trigger file check")
+
+        # localhost JSON view of the streamers registry (STREAMERS_HTTP_PORT=0 keeps it off)
+        STREAMERS.serve()
 
-        # start inactivity loop
-        # bot.loop.create_task(check_inactivity())  # This is turned off for now
+        # one inactivity reminder per tracked channel, at its deadline (off unless INACTIVITY_REMINDERS_ENABLED)
+        for channel_id in ACTIVITY.channel_ids():
+            _plan_inactivity_reminder(channel_id)
 
         startup_loops_started = True
-        print("✅ Startup loops started")
+        print("✅ Scheduled jobs registered")
 
-    # Start AI personality loop only once
+    # AI personality posts (only when enabled; nothing is scheduled otherwise)
     if not personality_loop_started:
-        bot.loop.create_task(
-            lobby_personality_loop(
-                bot,
-                logger,
-                ADVANCE_INFO_FILE,
-                get_lobby_talk_channel
-            )
-        )
+        if PERSONALITY_ENABLED:
+            SCHEDULER.schedule(LOBBY_PERSONALITY_JOB, next_personality_check(), _lobby_personality_job,
+                               note="lobby personality post check")
+            print("✅ AI personality posts scheduled")
         personality_loop_started = True
-        print("✅ AI personality loop started")
 
-    # Restore last learned advance
+    # Last learned advance (WEEK was loaded from the state store at startup)
     try:
-        st = _load_week_state()
-        wk = int(st.get("week", 0))
-        pairs = [tuple(x) for x in st.get("matchups", [])]
-
-        mapping = {}
-        for a, b in pairs:
-            mapping[a] = b
-            mapping[b] = a
-
-        _current_week = wk if wk != 0 else None
-        _current_pairs = pairs
-        _current_matchups = mapping
+        logger.info(f"Restored advance: WEEK={WEEK.week}, games={len(WEEK.pairs)}")
 
-        logger.info(f"Restored advance from file: WEEK={_current_week}, games={len(_current_pairs)}")
-
-        if os.path.exists("data/week_cache.json"):
-            logger.info("Week cache found on disk — flyer system ready")
+        if STATE.week_cache() is not None:
+            logger.info("Week cache found in state store — flyer system ready")
         else:
             logger.warning("No week cache found — AI flyers will require seeding")
 
         # Restore GOTW pairs on startup
         try:
             state = load_gotw_state()
-            if state and state.get("last_week_posted") == _current_week:
+            if state and state.get("last_week_posted") == WEEK.week:
                 _current_gotw_pairs.clear()
                 saved_pairs = state.get("pairs", [])
                 for p in saved_pairs:
@@ -3502,12 +3405,37 @@ async def on_ready():
     for channel in channels:
         logger.info(f"Channel Name: {channel.name}, ID: {channel.id}, Category: {channel.category}")
 
+# Keep the member <-> team index in step with nickname changes and departures
+@bot.event
+async def on_member_update(before, after):
+    if after.guild.id != GUILD_ID:
+        return
+    if before.display_name != after.display_name or MEMBER_INDEX.team_of(after) is None:
+        _member_index(after.guild).upsert(after)
+
+@bot.event
+async def on_user_update(before, after):
+    # global display-name changes show up as the member's display_name when no nickname is set
+    guild = bot.get_guild(GUILD_ID)
+    member = guild.get_member(after.id) if guild else None
+    if member is not None:
+        _member_index(guild).upsert(member)
+
+@bot.event
+async def on_member_remove(member):
+    if member.guild.id != GUILD_ID:
+        return
+    MEMBER_INDEX.remove(member)
+
 # Event to welcome new members to the server
 RECRUIT_AREA_CHANNEL_ID = 1506802048916652032
 RECRUIT_ROLE_NAME = "Recruit"
 
 @bot.event
 async def on_member_join(member):
+    if member.guild.id != GUILD_ID:
+        return
+    _member_index(member.guild).upsert(member)
     nicknames_to_users_file()  # make sure available teams is up-to-date
 
     # Give the new user the Recruit role
@@ -3553,27 +3481,21 @@ async def on_member_join(member):
 
 
 def write_week_cache_if_changed(new_cache):
-    def _hash(x):
-        return hashlib.sha256(json.dumps(x, sort_keys=True).encode()).hexdigest()
-
-    if os.path.exists(WEEK_CACHE_PATH):
-        old = json.load(open(WEEK_CACHE_PATH))
-        if _hash(old) == _hash(new_cache):
-            logger.info("Week cache unchanged — not rewriting")
-            return
+    if not STATE.replace_week_cache_if_changed(new_cache):
+        logger.info("Week cache unchanged — not rewriting")
+        return
 
+    # The store is the source of truth; the JSON file is still exported for the flyer site
     tmp = WEEK_CACHE_PATH + ".tmp"
     with open(tmp, "w") as f:
         json.dump(new_cache, f, indent=2)
     os.replace(tmp, WEEK_CACHE_PATH)
 
-    logger.info(f"Week cache written: WEEK {_current_week}")
-
+    logger.info(f"Week cache written: WEEK {WEEK.week}")
 
-WEEK_CACHE_PATH = "data/week_cache.json"
 
 def build_week_cache_from_current_state():
-    if not _current_week or not _current_pairs:
+    if not WEEK.week or not WEEK.pairs:
         logger.warning("Cannot build week cache — no advance loaded")
         return
 
@@ -3582,23 +3504,17 @@ def build_week_cache_from_current_state():
         return
 
     games = {}
+    index = _member_index(guild)
 
-    for a, b in _current_pairs:
-        user_a = None
-        user_b = None
-
-        for m in guild.members:
-            team = extract_team_from_nick(m.display_name or "")
-            if team == a:
-                user_a = m
-            elif team == b:
-                user_b = m
+    for a, b in WEEK.pairs:
+        user_a = index.member_for(a)
+        user_b = index.member_for(b)
 
         if not user_a or not user_b:
             logger.info(f"Week cache: skipping CPU matchup {a} vs {b}")
             continue
 
-        game_id = f"{_current_week}_{a}_{b}"
+        game_id = f"{WEEK.week}_{a}_{b}"
 
         games[a] = {
             "team": a,
@@ -3617,13 +3533,32 @@ def build_week_cache_from_current_state():
 
     cache = {
         "season": datetime.now().year,
-        "week": _current_week,
+        "week": WEEK.week,
         "games": games
     }
 
     write_week_cache_if_changed(cache)
 
 
+# ---- Week state subscribers (run right after WEEK changes) ----
+
+@WEEK.subscribe
+def _replan_pre_advance_reminder(week_state, change):
+    _plan_pre_advance_reminder()
+
+@WEEK.subscribe
+def _reset_gotw_for_new_week(week_state, change):
+    # GOTW pairs belong to one week; select_games_of_the_week() restores or re-picks them
+    if change == ADVANCE and STATE.gotw_state().get("last_week_posted") != week_state.week:
+        _current_gotw_pairs.clear()
+
+@WEEK.subscribe
+def _refresh_week_cache(week_state, change):
+    # flyer pipeline input; unchanged caches are not rewritten
+    if change == ADVANCE and week_state.pairs:
+        build_week_cache_from_current_state()
+
+
 async def safe_async_sleep(sec: float):
     try:
         loop = asyncio.get_event_loop()
@@ -3635,11 +3570,30 @@ async def safe_async_sleep(sec: float):
         # no loop or loop closed
         time.sleep(sec)
 
-# ---------------------------------------------------------------
-async def trigger_companion_export():
-    await asyncio.sleep(300)
+# ---- Durable advance jobs (JOBS) ----
+
+COMPANION_EXPORT_DELAY_SEC = 300
+
+def _advance_job_key(week) -> str:
+    """Idempotency key for one advance: the week posted and the Arizona date it was posted on."""
+    return f"week{week}:{datetime.now(pytz.timezone('US/Arizona')).date().isoformat()}"
+
+def trigger_companion_export(advance_key: str) -> bool:
+    """Queue the Companion App export 5 minutes out; at most once per advance."""
+    return JOBS.enqueue("companion_export", f"companion_export:{advance_key}", delay=COMPANION_EXPORT_DELAY_SEC)
 
-    trigger_macrodroid_advance()
+@JOBS.handler("companion_export", max_attempts=4)
+async def _companion_export_job(payload, attempt):
+    if not await asyncio.to_thread(trigger_macrodroid_advance):
+        raise RetryJob("MacroDroid webhook failed")
+
+@JOBS.handler("gotw_post", max_attempts=3)
+async def _gotw_post_job(payload, attempt):
+    if payload.get("week") != WEEK.week:
+        # a later advance replaced this week; its own job covers it
+        print(f"[GOTW] Queued post for week {payload.get('week')} is stale (current {WEEK.week}); skipping.")
+        return
+    await select_games_of_the_week()
 
 # ---------------------------------------------------------------
 
@@ -3652,41 +3606,37 @@ def get_stats_hash():
         logger.warning(f"Could not get stats hash: {e}")
     return None
 
-async def retry_export_until_changed():
-    global EXPORT_RETRY_IN_PROGRESS
-
-    if EXPORT_RETRY_IN_PROGRESS:
+async def retry_export_until_changed() -> bool:
+    """Queue a GG export chain: export, then re-export until the stats hash moves."""
+    if JOBS.pending("export_retry"):
         logger.info("Export retry already in progress. Skipping new loop.")
-        return
+        return False
 
-    EXPORT_RETRY_IN_PROGRESS = True
+    previous_hash = await asyncio.to_thread(get_stats_hash)
     logger.info("Starting export retry loop.")
+    return JOBS.enqueue("export_retry", f"export_retry:{int(time.time())}", {"previous_hash": previous_hash})
+
+# Attempt 1 exports; each later attempt (EXPORT_RETRY_DELAY doubling, capped) first checks the hash
+@JOBS.handler("export_retry", max_attempts=EXPORT_MAX_ATTEMPTS + 1,
+              retry_base=EXPORT_RETRY_DELAY, retry_max=EXPORT_RETRY_DELAY * 4)
+async def _export_retry_job(payload, attempt):
+    if attempt > 1:
+        new_hash = await asyncio.to_thread(get_stats_hash)
+        previous_hash = payload.get("previous_hash")
+
+        if new_hash and (previous_hash is None or new_hash != previous_hash):
+            logger.info("New stats detected. Stopping retry loop.")
+            return
 
-    try:
-        previous_hash = get_stats_hash()
-
-        for attempt in range(EXPORT_MAX_ATTEMPTS):
-            trigger_macrodroid_advance()
-            logger.info(f"Export attempt {attempt + 1} sent.")
-
-            await asyncio.sleep(EXPORT_RETRY_DELAY)
-
-            new_hash = get_stats_hash()
-
-            if new_hash and (previous_hash is None or new_hash != previous_hash):
-                logger.info("New stats detected. Stopping retry loop.")
-                return
-
-            logger.info("Stats unchanged. Retrying...")
+        if attempt > EXPORT_MAX_ATTEMPTS:
+            logger.warning("Max export attempts reached. No stat change detected.")
+            return
 
-        logger.warning("Max export attempts reached. No stat change detected.")
+        logger.info("Stats unchanged. Retrying...")
 
-    except Exception as e:
-        logger.error(f"Retry export error: {e}")
-
-    finally:
-        EXPORT_RETRY_IN_PROGRESS = False
-        logger.info("Export retry loop finished.")
+    await asyncio.to_thread(trigger_macrodroid_advance)
+    logger.info(f"Export attempt {attempt} sent.")
+    raise RetryJob("waiting for new stats")
 
 # ---------------------------------------------------------------
 
@@ -3746,6 +3696,7 @@ async def on_raw_reaction_add(payload: nextcord.RawReactionActionEvent):
         state["claimed_by"] = member.id
         state["claimed_at"] = datetime.now(pytz.utc).isoformat()
         _save_commissioner_advance_state(state)
+        SCHEDULER.cancel(COMMISSIONER_ADVANCE_FOLLOWUP_JOB)
 
         try:
             advance_dt = _parse_scheduled_advance(state["advance_time_iso"])
@@ -3765,131 +3716,104 @@ async def on_raw_reaction_add(payload: nextcord.RawReactionActionEvent):
             logger.warning(f"Could not edit claimed advance reminder: {e}")
 
 
-# Event handler for processing incoming messages
-@bot.event
-async def on_message(msg):
-    global _last_gg_alert_ts, _current_week, _current_pairs, _current_matchups
+# ===== MESSAGE ROUTES =====
+# on_message logs every message and runs commands, then hands off to the router,
+# which only calls the handlers registered for that channel / category / DM.
 
-    # ignore all bot messages except *our own DM*
-    if msg.author == bot.user and msg.guild is None:
-        # this is the bot's own DM going out
-        _last_gg_alert_ts = time.monotonic()
-        logger.info("Cooldown started because bot sent a GG DM.")
-        return
+# Slow routes (AI replies, flyers, DM schedule posts, sends) run on per-channel
+# background queues: in order within a channel, ROUTE_MAX_CONCURRENCY at a time overall.
+LOBBY_AI_TIMEOUT_SEC = float(os.getenv("LOBBY_AI_TIMEOUT_SEC", "45") or 45)
+GAME_STREAM_TIMEOUT_SEC = float(os.getenv("GAME_STREAM_TIMEOUT_SEC", "180") or 180)
+# week posts build every game channel: past this they are only logged as slow, never cancelled
+DM_COMMAND_TIMEOUT_SEC = float(os.getenv("DM_COMMAND_TIMEOUT_SEC", "900") or 900)
 
-    msg_text = str(msg.content).lower()
-    username = msg.author.display_name
-    userid = msg.author.id
-    user_message = str(msg.content)
-    channel = "Direct Message" if msg.guild is None else str(msg.channel)  # Distinguish DM from server messages
+message_router = MessageRouter()
 
-    # log the time the message was sent
-    phoenix_time = datetime.now(pytz.timezone('US/Arizona'))
-    logger.info(f"Phoenix Time: {phoenix_time.strftime('%m-%d-%y %I:%M %p')}")
+async def _lobby_ai_reply(msg):
+    await asyncio.sleep(random.randint(2, 4))  # thinking time
+    async with msg.channel.typing():
+        await asyncio.sleep(random.randint(4, 7))
 
-    # Log message metadata
-    logger.info(f"Channel: {channel}")
-    logger.info(f"Username: {username} | ID: {userid}")
-    logger.info(f"User Message: {user_message}\n")
+        # File read + blocking OpenAI call stay off the event loop
+        context = await asyncio.to_thread(load_ai_advance_info, logger, ADVANCE_INFO_FILE)
+        reply = await asyncio.to_thread(generate_ai_reply, msg.content, context)
 
-    # Process command if itâ€™s not from the bot itself
-    if msg.author != bot.user:
-        # Update to track member responses
-        if msg.guild and msg.channel.id in channel_activity_tracker:
-            tracker = channel_activity_tracker[msg.channel.id]
-            if msg.author.id in tracker["member_ids"]:
-                tracker["responses"].add(msg.author.id)  # Mark the member as having responded
-        await bot.process_commands(msg)  # Ensure bot commands in on_message are handled
+        if reply and reply.strip():
+            reply = reply.strip().strip('"').strip("'").strip("“").strip("”")  # strip quotation marks add mention in front
+            await msg.channel.send(f"{msg.author.mention} {reply}")
 
+@message_router.channel_name("lobby-talk", priority=10)
+async def _route_lobby_ai(msg):
     # =============================
     # 🤖 AI LOBBY BOT (SAFE INSERT)
     # =============================
     try:
-        if msg.guild:
-            lobby_channel = get_lobby_talk_channel(msg.guild)
-
-            if lobby_channel and msg.channel.id == lobby_channel.id:
-                if msg.author != bot.user:
-                    update_last_message_time()
+        if msg.author != bot.user:
+            update_last_message_time()
 
-                if msg.author != bot.user and is_bot_mentioned(msg, bot.user):
-                    if should_bot_stay_quiet(msg.content):
-                        return
+        if msg.author != bot.user and is_bot_mentioned(msg, bot.user):
+            if should_bot_stay_quiet(msg.content):
+                return STOP
 
-                    await asyncio.sleep(random.randint(2, 4))  # thinking time
-                    async with msg.channel.typing():
-                        await asyncio.sleep(random.randint(4, 7))
-
-                        context = load_ai_advance_info(logger, ADVANCE_INFO_FILE)
-                        reply = generate_ai_reply(msg.content, context)
-
-                        if reply and reply.strip():
-                            reply = reply.strip().strip('"').strip("'").strip("“").strip("”")  # strip quotation marks add mention in front
-                            await msg.channel.send(f"{msg.author.mention} {reply}")
+            message_router.spawn(msg, "lobby AI reply", _lobby_ai_reply, msg, timeout=LOBBY_AI_TIMEOUT_SEC)
 
     except Exception as e:
         logger.warning(f"AI handler failed: {e}")
 
-    # --- Advance channel watcher: cache WEEK + matchups -------------------------
+@message_router.channel(ADVANCE_CHANNEL_ID, priority=20)
+async def _route_advance_watcher(msg):
+    """Advance channel watcher: cache WEEK + matchups."""
     try:
-        if msg.guild and ADVANCE_CHANNEL_ID and msg.channel.id == ADVANCE_CHANNEL_ID:
-            wk, pairs, mapping = _parse_advance_block(msg.content or "")
-            if wk and pairs:
-                _current_week = wk
-                _current_pairs = pairs
-                _current_matchups = mapping
-
-                # ⬇️ persist to disk so it survives restarts
-                _save_week_state(
-                    wk,
-                    [[L, R] for (L, R) in pairs],
-                    pre_sent=False,
-                    advance_time=datetime.now(pytz.utc).isoformat()
-                )
-                logger.info(f"Advance learned & saved: WEEK={wk}, games={len(pairs)}")
-
-                # 🔥 ONLY POST AP IF IT CHANGED
-                if ap_state_changed():
-                    logger.info("AP state changed — posting update.")
-                    await post_ap_bulletin(bot)
-                else:
-                    logger.info("AP state unchanged — no post.")
+        wk, pairs, _mapping = _parse_advance_block(msg.content or "")
+        if wk and pairs:
+            # ⬇️ persisted (survives restarts); subscribers refresh GOTW, week cache and the 24h reminder
+            WEEK.set_advance(wk, pairs, advance_time=datetime.now(pytz.utc).isoformat())
+            logger.info(f"Advance learned & saved: WEEK={wk}, games={len(pairs)}")
+
+            # 🔥 ONLY POST AP IF IT CHANGED
+            if ap_state_changed():
+                logger.info("AP state changed — posting update.")
+                message_router.spawn(msg, "AP bulletin", post_ap_bulletin, bot)
+            else:
+                logger.info("AP state unchanged — no post.")
 
     except Exception as e:
         logger.warning(f"advance parse failed: {e}")
 
-    # ---------------------------------------------------------------------------
+@message_router.channel(GAME_STREAMS_CHANNEL_ID, priority=30, background=True, timeout=GAME_STREAM_TIMEOUT_SEC)
+async def _route_game_streams(msg):
+    """Text-channel flyer trigger for game-streams."""
+    link = find_stream_link(msg.content or "")
 
-    # --- Text-channel flyer trigger for game-streams ----------------------------
-    if msg.guild and GAME_STREAMS_CHANNEL_ID and msg.channel.id == GAME_STREAMS_CHANNEL_ID:
-        link = find_stream_link(msg.content or "")
+    if link:
+        updated_streamer = update_streamers_json_from_message(msg, link)
 
-        if link:
-            updated_streamer = update_streamers_json_from_message(msg, link)
-
-            if updated_streamer:
-                try:
-                    await msg.add_reaction("📺")
-                except Exception:
-                    pass
+        if updated_streamer:
+            try:
+                await msg.add_reaction("📺")
+            except Exception:
+                pass
 
-        await handle_game_stream_post(bot, msg)
-    # --- end text-channel flyer trigger -----------------------------------------
+    await handle_game_stream_post(bot, msg)
 
-    # PUT ONE WORD COMMANDS AFTER THIS STATEMENT THAT EVERYONE CAN USE
+# PUT ONE WORD COMMANDS AFTER THIS STATEMENT THAT EVERYONE CAN USE
 
-    # Display current times in various time zones if message contains "time"
-    if is_exact_word(msg_text, 'time'):
-        pt_time, az_time, mtn_time, central_time, eastern_time = get_time_zones()
-        await msg.author.send(f'{pt_time.strftime("%I:%M %p-PT")}')
-        await msg.author.send(f'{az_time.strftime("%I:%M %p-AZ")} <- server time (No DST)')
-        await msg.author.send(f'{mtn_time.strftime("%I:%M %p-MT")}')
-        await msg.author.send(f'{central_time.strftime("%I:%M %p-CT")}')
-        await msg.author.send(f'{eastern_time.strftime("%I:%M %p-ET")}')
+@message_router.when(lambda msg: is_exact_word(str(msg.content).lower(), 'time'), priority=40, background=True)
+async def _route_time_word(msg):
+    """Display current times in various time zones if the message is just "time"."""
+    pt_time, az_time, mtn_time, central_time, eastern_time = get_time_zones()
+    await msg.author.send(f'{pt_time.strftime("%I:%M %p-PT")}')
+    await msg.author.send(f'{az_time.strftime("%I:%M %p-AZ")} <- server time (No DST)')
+    await msg.author.send(f'{mtn_time.strftime("%I:%M %p-MT")}')
+    await msg.author.send(f'{central_time.strftime("%I:%M %p-CT")}')
+    await msg.author.send(f'{eastern_time.strftime("%I:%M %p-ET")}')
 
-    # ===== GG DETECTOR (category + text channels) =====
+@message_router.category(GG_CATEGORY_ID, priority=50)
+async def _route_gg_detector(msg):
+    """GG DETECTOR (category + text channels)."""
+    global _last_gg_alert_ts
     try:
-        if msg.guild and _is_in_target_game_channel(msg.channel):
+        if _is_in_target_game_channel(msg.channel):
             if GG_WORD_RE.search(msg.content or ""):
                 now = time.monotonic()
                 if now - _last_gg_alert_ts >= GG_COOLDOWN_SEC:
@@ -3916,329 +3840,376 @@ async def on_message(msg):
                     if sent_ok:
                         _last_gg_alert_ts = now
 
-                        # 🚀 Schedule GG-based export in 60 seconds
-                        asyncio.create_task(retry_export_until_changed())
+                        # 🚀 Queue the GG-based export chain (durable across restarts)
+                        await retry_export_until_changed()
                     else:
                         logger.warning("GG alert not sent (no channel/DM path worked).")
                 else:
                     logger.info("GG detected but still in cooldown, skipping alert.")
     except Exception as e:
         logger.warning(f"GG detector error: {e}")
-    # ===== END GG DETECTOR =====
 
+@message_router.dm(priority=60, background=True, timeout=DM_COMMAND_TIMEOUT_SEC, cancel_on_timeout=False)
+async def _route_dm_commands(msg):
+    """Authorized-user DM commands: !send relay and week/pre/playoff/all schedule posts."""
+    msg_text = str(msg.content).lower()
 
-    # Check for messages in Direct Messages or containing specific keywords
-    if 'Direct Message' in channel:
+    # ONLY AUTHORIZED_USERS CAN GO PASS HERE
+    if msg.author.id not in AUTHORIZED_USERS:
+        return
 
-        # ONLY AUTHORIZED_USERS CAN GO PASS HERE
-        if msg.author.id not in AUTHORIZED_USERS:
-            return
+    # =============================  This DM message cannot ping users or @everyone -  it's on purpose so it won't spam
+    # 📢 DM → LOBBY (!send command) - 🏈 **WURD Update**\n
+    # =============================
+    try:
+        guild = bot.get_guild(GUILD_ID)
+        lobby_channel = get_lobby_talk_channel(guild) if guild else None
 
-        # =============================  This DM message cannot ping users or @everyone -  it's on purpose so it won't spam
-        # 📢 DM → LOBBY (!send command) - 🏈 **WURD Update**\n
-        # =============================
-        try:
-            guild = bot.get_guild(GUILD_ID)
-            lobby_channel = get_lobby_talk_channel(guild) if guild else None
+        # Only trigger if message starts with !send (case-insensitive)
+        if msg.content.lower().startswith("!send"):
 
-            # Only trigger if message starts with !send (case-insensitive)
-            if msg.content.lower().startswith("!send"):
+            if not lobby_channel:
+                await msg.channel.send("❌ Lobby channel not found.")
+                return
 
-                if not lobby_channel:
-                    await msg.channel.send("❌ Lobby channel not found.")
-                    return
+            # Safe removal of command
+            parts = msg.content.split(" ", 1)
 
-                # Safe removal of command
-                parts = msg.content.split(" ", 1)
+            if len(parts) < 2:
+                await msg.channel.send("❌ Please include a message after !send.")
+                return
 
-                if len(parts) < 2:
-                    await msg.channel.send("❌ Please include a message after !send.")
-                    return
+            text = parts[1].strip()
 
-                text = parts[1].strip()
+            await lobby_channel.send(
+                f"{text}"
+            )  # 🏈 **WURD Update**\n
 
-                await lobby_channel.send(
-                    f"{text}"
-                )  # 🏈 **WURD Update**\n
+            await msg.channel.send("✅ Sent to lobby-chat.")
+            return
 
-                await msg.channel.send("✅ Sent to lobby-chat.")
-                return
+    except Exception as e:
+        logger.warning(f"!send relay failed: {e}")
 
-        except Exception as e:
-            logger.warning(f"!send relay failed: {e}")
+    nicknames_to_users_file()  # Call function to save users with matching team names.  This updates discord teams to wurd24users.csv
+
+    # checking 'week' plus one or two numbers or 'all'
+    pattern_week = r"^week \d{1,2}$"
+    pattern_pre = r"^pre\s*[1234]$"  # NEW: pre 1, pre 2, pre 3, pre 4
+    pattern_all = r"^all$"
+    pattern_playoffs = r"^week\s+(wild\s*card|divisional|conference|super\s*bowl)$"
+
+    if (
+            re.fullmatch(pattern_week, msg_text) or
+            re.fullmatch(pattern_pre, msg_text) or
+            re.fullmatch(pattern_playoffs, msg_text) or
+            re.fullmatch(pattern_all, msg_text)
+    ):
 
-        nicknames_to_users_file()  # Call function to save users with matching team names.  This updates discord teams to wurd24users.csv
+        # Normalize what we pass into the scheduler
+        norm = msg_text.upper()
+        if re.fullmatch(pattern_pre, msg_text):
+            # If your Wurd24Scheduler expects uppercase "PRE 1" tokens:
+            norm = msg_text.replace("pre", "PRE").upper()  # -> "PRE 1"
+            # If instead your scheduler expects negative "week -3/-2/-1",
+            # you can convert here instead (uncomment if needed):
+            # n = int(re.search(r"\d", msg_text).group(0))   # 1..3
+            # week_map = {1: -3, 2: -2, 3: -1}
+            # norm = f"week {week_map[n]}"
+
+        # Convert playoff tokens to numeric weeks for the scheduler
+        playoff_map = {
+            "WEEK WILD CARD": "week 19",
+            "WEEK DIVISIONAL": "week 20",
+            "WEEK CONFERENCE": "week 21",
+            "WEEK SUPER BOWL": "week 23"
+        }
 
-        # checking 'week' plus one or two numbers or 'all'
-        pattern_week = r"^week \d{1,2}$"
-        pattern_pre = r"^pre\s*[1234]$"  # NEW: pre 1, pre 2, pre 3, pre 4
-        pattern_all = r"^all$"
-        pattern_playoffs = r"^week\s+(wild\s*card|divisional|conference|super\s*bowl)$"
+        norm_sched = playoff_map.get(norm.upper(), norm)
 
-        if (
-                re.fullmatch(pattern_week, msg_text) or
-                re.fullmatch(pattern_pre, msg_text) or
-                re.fullmatch(pattern_playoffs, msg_text) or
-                re.fullmatch(pattern_all, msg_text)
-        ):
+        playoff_weeks = {"week 19", "week 20", "week 21", "week 23"}
 
-            # Normalize what we pass into the scheduler
-            norm = msg_text.upper()
-            if re.fullmatch(pattern_pre, msg_text):
-                # If your Wurd24Scheduler expects uppercase "PRE 1" tokens:
-                norm = msg_text.replace("pre", "PRE").upper()  # -> "PRE 1"
-                # If instead your scheduler expects negative "week -3/-2/-1",
-                # you can convert here instead (uncomment if needed):
-                # n = int(re.search(r"\d", msg_text).group(0))   # 1..3
-                # week_map = {1: -3, 2: -2, 3: -1}
-                # norm = f"week {week_map[n]}"
-
-            # Convert playoff tokens to numeric weeks for the scheduler
-            playoff_map = {
-                "WEEK WILD CARD": "week 19",
-                "WEEK DIVISIONAL": "week 20",
-                "WEEK CONFERENCE": "week 21",
-                "WEEK SUPER BOWL": "week 23"
-            }
-
-            norm_sched = playoff_map.get(norm.upper(), norm)
-
-            playoff_weeks = {"week 19", "week 20", "week 21", "week 23"}
-
-            # Parse week early so PRE 4 can bypass Wurd24Scheduler
-            parsed_week = parse_week_token(msg_text)
-
-            # PRE 4 is cut week / no games.
-            # Do not call Wurd24Scheduler because it has no PRE 4 schedule block.
-            if parsed_week == -4:
-                week_schedule = ""
-            elif norm_sched.lower() in playoff_weeks:
-                week_schedule = ""  # playoffs handled by seed_advance
-            else:
-                week_schedule = wrd.wurd_sched_main(norm_sched)
+        # Parse week early so PRE 4 can bypass Wurd24Scheduler
+        parsed_week = parse_week_token(msg_text)
 
-            # IF TEST IS TRUE THEN WE PRINT SCHEDULE WITHOUT POSTING IT
-            if TEST:
-                logger.info("--------TEST PRINT--------------\n%s\n------------TEST PRINT---------", week_schedule)
-                return  # Prevent it from posting to Discord
-            else:
-                # schedule forum ID (for 'all')  vs  advance forum ID (for a single week/pre)
-                channel_id = 1290487933131952138 if 'all' in msg_text else 1149401984466681856
-                channel = bot.get_channel(channel_id)
-
-                def format_schedule_for_discord(raw_text: str, week_token: int | None) -> str:
-                    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
-
-                    # Detect playoffs
-                    is_playoffs = week_token in (19, 20, 21, 23)
-
-                    if not is_playoffs:
-                        # ---- ORIGINAL BEHAVIOR FOR REGULAR SEASON ----
-                        formatted_lines = []
-                        for line in lines:
-                            if line.upper().startswith("PRE") or line.upper().startswith("WEEK"):
-                                formatted_lines.append(f"\n🏈  **{line.upper()}**\n────────────────────")
-                            else:
-                                formatted_lines.append(f" {line}")
-                        return "\n".join(formatted_lines)
-
-                    # ---- PLAYOFF BEHAVIOR: SPLIT BY AFC / NFC ----
-                    header = None
-                    games = []
+        # PRE 4 is cut week / no games.
+        # Do not call Wurd24Scheduler because it has no PRE 4 schedule block.
+        if parsed_week == -4:
+            week_schedule = ""
+        elif norm_sched.lower() in playoff_weeks:
+            week_schedule = ""  # playoffs handled by seed_advance
+        else:
+            week_schedule = wrd.wurd_sched_main(norm_sched)
+
+        # IF TEST IS TRUE THEN WE PRINT SCHEDULE WITHOUT POSTING IT
+        if TEST:
+            logger.info("--------TEST PRINT--------------\n%s\n------------TEST PRINT---------", week_schedule)
+            return  # Prevent it from posting to Discord
+        else:
+            # schedule forum ID (for 'all')  vs  advance forum ID (for a single week/pre)
+            channel_id = 1290487933131952138 if 'all' in msg_text else 1149401984466681856
+            channel = bot.get_channel(channel_id)
 
+            def format_schedule_for_discord(raw_text: str, week_token: int | None) -> str:
+                lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
+
+                # Detect playoffs
+                is_playoffs = week_token in (19, 20, 21, 23)
+
+                if not is_playoffs:
+                    # ---- ORIGINAL BEHAVIOR FOR REGULAR SEASON ----
+                    formatted_lines = []
                     for line in lines:
-                        if line.upper().startswith(
-                                ("PRE", "WEEK", "WURD", "WILD", "DIVISIONAL", "CONFERENCE", "SUPER")):
-                            header = line.upper()
-                        else:
-                            games.append(line)
-
-                    afc_games = []
-                    nfc_games = []
-
-                    for g in games:
-                        # Expect: "Broncos(U) vs Raiders(U)" or similar
-                        m = re.match(r"^\s*([A-Za-z0-9 .’'-]+)\s*\([^)]*\)\s*vs\s*([A-Za-z0-9 .’'-]+)", g,
-                                     re.IGNORECASE)
-                        if not m:
-                            continue
-
-                        t1 = canonical_team(m.group(1).upper())
-                        t2 = canonical_team(m.group(2).upper())
-
-                        # Look up conference from nfl_teams mapping
-                        div1 = nfl_teams.get(t1)
-                        div2 = nfl_teams.get(t2)
-
-                        # Default to AFC if unknown (safe fallback)
-                        if div1 and div2 and div1.startswith("NFC") and div2.startswith("NFC"):
-                            nfc_games.append(g)
-                        elif div1 and div2 and div1.startswith("AFC") and div2.startswith("AFC"):
-                            afc_games.append(g)
+                        if line.upper().startswith("PRE") or line.upper().startswith("WEEK"):
+                            formatted_lines.append(f"\n🏈  **{line.upper()}**\n────────────────────")
                         else:
-                            # Fallback (should never happen in playoffs)
-                            afc_games.append(g)
+                            formatted_lines.append(f" {line}")
+                    return "\n".join(formatted_lines)
 
-                    out = []
+                # ---- PLAYOFF BEHAVIOR: SPLIT BY AFC / NFC ----
+                header = None
+                games = []
 
-                    if header:
-                        out.append(f"\n🏈  **{header}**\n────────────────────")
+                for line in lines:
+                    if line.upper().startswith(
+                            ("PRE", "WEEK", "WURD", "WILD", "DIVISIONAL", "CONFERENCE", "SUPER")):
+                        header = line.upper()
+                    else:
+                        games.append(line)
+
+                afc_games = []
+                nfc_games = []
+
+                for g in games:
+                    # Expect: "Broncos(U) vs Raiders(U)" or similar
+                    m = re.match(r"^\s*([A-Za-z0-9 .’'-]+)\s*\([^)]*\)\s*vs\s*([A-Za-z0-9 .’'-]+)", g,
+                                 re.IGNORECASE)
+                    if not m:
+                        continue
 
-                    if afc_games:
-                        out.append("\n**AFC**")
-                        for g in afc_games:
-                            out.append(f" {g}")
+                    t1 = canonical_team(m.group(1).upper())
+                    t2 = canonical_team(m.group(2).upper())
+
+                    # Look up conference from nfl_teams mapping
+                    div1 = nfl_teams.get(t1)
+                    div2 = nfl_teams.get(t2)
+
+                    # Default to AFC if unknown (safe fallback)
+                    if div1 and div2 and div1.startswith("NFC") and div2.startswith("NFC"):
+                        nfc_games.append(g)
+                    elif div1 and div2 and div1.startswith("AFC") and div2.startswith("AFC"):
+                        afc_games.append(g)
+                    else:
+                        # Fallback (should never happen in playoffs)
+                        afc_games.append(g)
 
-                    if nfc_games:
-                        out.append("\n**NFC**")
-                        for g in nfc_games:
-                            out.append(f" {g}")
+                out = []
 
-                    return "\n".join(out)
+                if header:
+                    out.append(f"\n🏈  **{header}**\n────────────────────")
 
-                week_schedule = format_schedule_for_discord(week_schedule, parsed_week)
+                if afc_games:
+                    out.append("\n**AFC**")
+                    for g in afc_games:
+                        out.append(f" {g}")
 
-                # ✅ PRE 4 / CUT WEEK: no games, no new matchup channels
-                if parsed_week == -4:
-                    guild = bot.get_guild(GUILD_ID)
+                if nfc_games:
+                    out.append("\n**NFC**")
+                    for g in nfc_games:
+                        out.append(f" {g}")
 
-                    # Clear old matchup channels
+                return "\n".join(out)
+
+            week_schedule = format_schedule_for_discord(week_schedule, parsed_week)
+
+            # ✅ PRE 4 / CUT WEEK: no games, no new matchup channels
+            if parsed_week == -4:
+                guild = bot.get_guild(GUILD_ID)
+
+                # Clear old matchup channels
+                if MATCHUP_CHANNEL_MODE == "recreate":
                     await delete_category_channels(guild)
-                    channel_activity_tracker.clear()
+                    ACTIVITY.clear()
+                else:
+                    await reconcile_matchup_channels(guild, [])   # archives every leftover channel
+
+                now_az = datetime.now(pytz.timezone("US/Arizona"))
+                target = now_az + timedelta(hours=24)
+                advance = target.replace(hour=17, minute=0, second=0, microsecond=0)
+
+                write_advance_file(advance, parsed_week)
+
+                # Update learned/current state to cut week with no matchups
+                WEEK.set_advance(parsed_week, [], advance_time=datetime.now(pytz.utc).isoformat())
+
+                advance_block = (
+                    "🏈 **PRESEASON WEEK 4 — CUT WEEK**\n"
+                    "There are **no User-vs-User games** this week.\n"
+                    "Game scheduling channels have been cleared.\n\n"
+                    "🌟 **Top Rookie Preseason Stats** are now available on the WURD website.\n"
+                    "https://wurd-madden.com/rookies?league=26969931&season=season_0\n\n"
+                    "⏰ **Advance Time**\n"
+                    "The league is scheduled to advance on\n"
+                    f"**{advance.strftime('%A, %b %d @ ~%I:%M %p')} AZ**\n"
+                    "This is the preseason cut-week 24-hour target time.\n"
+                )
+
+                await channel.send(
+                    f"@everyone\n{advance_block}",
+                    allowed_mentions=EVERYONE_MENTIONS
+                )
+
+                build_week_cache_from_current_state()
+
+                logger.info("Preseason Week 4 cut week complete — scheduling Companion export in 5 minutes")
+                trigger_companion_export(_advance_job_key(parsed_week))
+
+                return
+
+            # Regular season only (weeks 1–18)
+            is_playoffs = parsed_week in (19, 20, 21, 23)
+
+            first = True
+            for chunk in split_message(week_schedule):
+
+                # Prevent Discord empty message crash
+                if not chunk or not chunk.strip():
+                    continue
 
-                    # Update learned/current state to cut week with no matchups
-                    _current_week = parsed_week
-                    _current_pairs = []
-                    _current_matchups = {}
+                if first and ('all' not in msg_text) and not is_playoffs:
 
                     now_az = datetime.now(pytz.timezone("US/Arizona"))
-                    target = now_az + timedelta(hours=24)
-                    advance = target.replace(hour=17, minute=0, second=0, microsecond=0)
 
-                    write_advance_file(advance, parsed_week)
+                    # Preseason weeks are negative: -3, -2, -1
+                    is_preseason = parsed_week is not None and parsed_week < 0
 
-                    _save_week_state(
-                        parsed_week,
-                        [],
-                        pre_sent=False,
-                        advance_time=datetime.now(pytz.utc).isoformat()
-                    )
+                    if is_preseason:
+                        target = now_az + timedelta(hours=24)  # 1 day for preseason
+                        timing_note = "This is the preseason 24-hour target time (around 5 PM Arizona)."
+                    else:
+                        target = now_az + timedelta(hours=48)  # 2 days for season
+                        timing_note = "This is the normal 48-hour target time (around 5 PM Arizona)."
+
+                    advance = target.replace(hour=17, minute=0, second=0, microsecond=0)
+                    write_advance_file(advance, parsed_week)
 
                     advance_block = (
-                        "🏈 **PRESEASON WEEK 4 — CUT WEEK**\n"
-                        "There are **no User-vs-User games** this week.\n"
-                        "Game scheduling channels have been cleared.\n\n"
-                        "🌟 **Top Rookie Preseason Stats** are now available on the WURD website.\n"
-                        "https://wurd-madden.com/rookies?league=26969931&season=season_0\n\n"
-                        "⏰ **Advance Time**\n"
-                        "The league is scheduled to advance on\n"
+                        "\n\n⏰ **Advance Time**\n"
+                        "Next week is scheduled to advance on\n"
                         f"**{advance.strftime('%A, %b %d @ ~%I:%M %p')} AZ**\n"
-                        "This is the preseason cut-week 24-hour target time.\n"
+                        f"{timing_note}\n"
+                        "If all User-vs-User games finish early, the advance may happen sooner.\n"
+                        "If games are still being played, commissioners will notify everyone of any delay.\n.\n"
                     )
 
                     await channel.send(
-                        f"@everyone\n{advance_block}",
+                        f"@everyone\n{chunk}{advance_block}",
                         allowed_mentions=EVERYONE_MENTIONS
                     )
+                    first = False
+                    await safe_async_sleep(1.1)
 
-                    build_week_cache_from_current_state()
+                else:
+                    await channel.send(chunk, allowed_mentions=AllowedMentions.none())
+                    await safe_async_sleep(1.1)
 
-                    logger.info("Preseason Week 4 cut week complete — scheduling Companion export in 5 minutes")
-                    asyncio.create_task(trigger_companion_export())
+            # 🏈 Post Power Rankings after the weekly advance post
+            if ('all' not in msg_text) and parsed_week is not None and 1 <= parsed_week <= 18:
+                try:
+                    await post_power_rankings(channel)
+                    await safe_async_sleep(1.1)
+                except Exception as e:
+                    logger.warning(f"Power rankings post failed: {e}")
 
-                    return
+            # For both 'week N' *and* 'pre N', build the game forums
+            if any(k in msg_text for k in ("week", "pre")):
+                guild = bot.get_guild(GUILD_ID)
+                channels_started = time.monotonic()
 
-                # Regular season only (weeks 1–18)
-                is_playoffs = parsed_week in (19, 20, 21, 23)
+                unmatched = {}
+                if parsed_week in (19, 20, 21, 23):  # playoffs
+                    specs = playoff_channel_specs(guild)
+                else:
+                    specs, unmatched = await user_user_channel_specs(guild)
 
-                first = True
-                for chunk in split_message(week_schedule):
+                if MATCHUP_CHANNEL_MODE == "recreate":
+                    await delete_category_channels(guild)
+                    ACTIVITY.clear()
+                    await provision_matchup_channels(guild, specs)
+                else:
+                    # only the differences against last week's channels
+                    await reconcile_matchup_channels(guild, specs)
 
-                    # Prevent Discord empty message crash
-                    if not chunk or not chunk.strip():
-                        continue
+                if unmatched:
+                    report = "⚠️ No member found for these teams (channel created without them):\n" + "\n".join(
+                        f"- {name}: {', '.join(teams)}" for name, teams in unmatched.items()
+                    )
+                    for chunk in split_message(report):
+                        await msg.channel.send(chunk)
 
-                    if first and ('all' not in msg_text) and not is_playoffs:
+                logger.info(f"[PROVISION] Week {parsed_week} matchup channels done in "
+                            f"{time.monotonic() - channels_started:.1f}s (delete + create + seed)")
 
-                        now_az = datetime.now(pytz.timezone("US/Arizona"))
+                build_week_cache_from_current_state()
 
-                        # Preseason weeks are negative: -3, -2, -1
-                        is_preseason = parsed_week is not None and parsed_week < 0
+                # Durable, once per advance: a restart replays them, a repeated post does not add more
+                advance_key = _advance_job_key(parsed_week)
+                schedule_games_of_the_week(advance_key)
 
-                        if is_preseason:
-                            target = now_az + timedelta(hours=24)  # 1 day for preseason
-                            timing_note = "This is the preseason 24-hour target time (around 5 PM Arizona)."
-                        else:
-                            target = now_az + timedelta(hours=48)  # 2 days for season
-                            timing_note = "This is the normal 48-hour target time (around 5 PM Arizona)."
-
-                        advance = target.replace(hour=17, minute=0, second=0, microsecond=0)
-                        write_advance_file(advance, parsed_week)
-
-                        advance_block = (
-                            "\n\n⏰ **Advance Time**\n"
-                            "Next week is scheduled to advance on\n"
-                            f"**{advance.strftime('%A, %b %d @ ~%I:%M %p')} AZ**\n"
-                            f"{timing_note}\n"
-                            "If all User-vs-User games finish early, the advance may happen sooner.\n"
-                            "If games are still being played, commissioners will notify everyone of any delay.\n.\n"
-                        )
-
-                        await channel.send(
-                            f"@everyone\n{chunk}{advance_block}",
-                            allowed_mentions=EVERYONE_MENTIONS
-                        )
-                        first = False
-                        await safe_async_sleep(1.1)
+                # 🚀 Start 5-minute delayed Companion App export
+                logger.info("Week advance complete — scheduling Companion export in 5 minutes")
+                trigger_companion_export(advance_key)
 
-                    else:
-                        await channel.send(chunk, allowed_mentions=AllowedMentions.none())
-                        await safe_async_sleep(1.1)
+# ===== END MESSAGE ROUTES =====
 
-                # 🏈 Post Power Rankings after the weekly advance post
-                if ('all' not in msg_text) and parsed_week is not None and 1 <= parsed_week <= 18:
-                    try:
-                        await post_power_rankings(channel)
-                        await safe_async_sleep(1.1)
-                    except Exception as e:
-                        logger.warning(f"Power rankings post failed: {e}")
-
-                # For both 'week N' *and* 'pre N', build the game forums
-                if any(k in msg_text for k in ("week", "pre")):
-                    guild = bot.get_guild(GUILD_ID)
-                    await delete_category_channels(guild)
-                    channel_activity_tracker.clear()
 
-                    if parsed_week in (19, 20, 21, 23):  # playoffs
-                        for team1, team2 in _current_pairs:
-                            channel_name = f"{team1.lower()}-{team2.lower()}"
+# Event handler for processing incoming messages
+@bot.event
+async def on_message(msg):
+    global _last_gg_alert_ts
 
-                            members = []
-                            for m in guild.members:
-                                team = extract_team_from_nick(m.display_name or "")
-                                if team in (team1, team2):
-                                    members.append(m.id)
+    # ignore all bot messages except *our own DM*
+    if msg.author == bot.user and msg.guild is None:
+        # this is the bot's own DM going out
+        _last_gg_alert_ts = time.monotonic()
+        logger.info("Cooldown started because bot sent a GG DM.")
+        return
 
-                            logger.info(f"Creating playoff channel: {team1}-{team2}")
+    username = msg.author.display_name
+    userid = msg.author.id
+    user_message = str(msg.content)
+    channel = "Direct Message" if msg.guild is None else str(msg.channel)  # Distinguish DM from server messages
 
-                            await create_channel_helper(
-                                guild,
-                                team_name=channel_name,
-                                member_ids=members,
-                                message_content=f"Welcome to the {team1} vs {team2} playoff matchup!"
-                            )
-                            await asyncio.sleep(0.8)
+    # log the time the message was sent
+    phoenix_time = datetime.now(pytz.timezone('US/Arizona'))
+    logger.info(f"Phoenix Time: {phoenix_time.strftime('%m-%d-%y %I:%M %p')}")
 
-                    else:
-                        await create_user_user_channels(guild)
+    # Log message metadata
+    logger.info(f"Channel: {channel}")
+    logger.info(f"Username: {username} | ID: {userid}")
+    logger.info(f"User Message: {user_message}\n")
 
-                    build_week_cache_from_current_state()
+    # Structured record + indexed copy for !logs
+    log_message(
+        msg.created_at.timestamp(),
+        getattr(msg.channel, "id", None),
+        channel,
+        userid,
+        username,
+        user_message,
+        message_id=msg.id,
+    )
+    _archive_message(msg, channel)
 
-                    asyncio.create_task(schedule_games_of_the_week())
+    # Process command if itâ€™s not from the bot itself
+    if msg.author != bot.user:
+        # Update to track member responses
+        if msg.guild:
+            ACTIVITY.record_response(msg.channel.id, msg.author.id)  # Mark the member as having responded
+        await bot.process_commands(msg)  # Ensure bot commands in on_message are handled
 
-                    # 🚀 Start 5-minute delayed Companion App export
-                    logger.info("Week advance complete — scheduling Companion export in 5 minutes")
-                    asyncio.create_task(trigger_companion_export())
+    # Everything else is routed by channel / category / DM (see MESSAGE ROUTES)
+    await message_router.dispatch(msg)
 
     # Regex search for time patterns in the message
     # player_msg_time = re.search(r'\d{1,2}:\d{2}', msg.content)
@@ -4252,7 +4223,10 @@ async def on_message(msg):
 
 if __name__ == "__main__":
     logger.info("Starting Discord bot...")
-    bot.run(token)
+    try:
+        bot.run(token)
+    finally:
+        stop_queue_logging()  # flush anything still queued before the process exits
 
 
 
@@ -0,0 +1,99 @@
+# week_state.py - the learned week (WEEK N + matchups) held in memory
+#
+# One WeekState object is the source of truth for the current week. Changes go
+# through its setters, which write through to the state store in one transaction
+# and then tell the subscribers (reminder loop, GOTW, week cache); readers only
+# ever look at the in-memory attributes.
+import logging
+
+logger = logging.getLogger("discord_bot")
+
+# change kinds passed to subscribers
+ADVANCE = "advance"              # week / matchups / advance time replaced
+PRE_REMINDER_SENT = "pre_reminder_sent"
+
+
+class WeekState:
+    """
+    Attributes (read-only outside this class):
+        week               int | None   (None until an advance is learned)
+        pairs              [(LEFT, RIGHT), ...] in the order written in the advance post
+        matchups           {TEAM: OPPONENT} for both sides of every pair
+        pre_reminder_sent  bool
+        advance_time       ISO string (UTC) of when the advance was learned, or None
+
+    Subscribers are plain callables fn(week_state, change); they run on the caller's
+    thread right after the change is stored, and a failing subscriber is only logged.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._subscribers = []
+        self.week = None
+        self.pairs = []
+        self.matchups = {}
+        self.pre_reminder_sent = False
+        self.advance_time = None
+        self.reload()
+
+    def reload(self) -> None:
+        """Read the stored week (startup); does not notify subscribers."""
+        st = self._store.week_state()
+        self._apply(st.get("week", 0), st.get("matchups", []),
+                    st.get("pre_reminder_sent", False), st.get("advance_time"))
+
+    def _apply(self, week, pairs, pre_reminder_sent, advance_time) -> None:
+        pairs = [(a, b) for a, b in pairs]
+        mapping = {}
+        for a, b in pairs:
+            mapping[a] = b
+            mapping[b] = a
+        # swap whole values so a reader never sees week N with week N-1's matchups
+        self.week = int(week) if week else None
+        self.pairs = pairs
+        self.matchups = mapping
+        self.pre_reminder_sent = bool(pre_reminder_sent)
+        self.advance_time = advance_time
+
+    # ---------- changes ----------
+
+    def set_advance(self, week, pairs, advance_time=None, pre_reminder_sent: bool = False) -> None:
+        """A new week (and its matchups) was learned or seeded."""
+        pairs = [(a, b) for a, b in pairs]
+        self._store.set_week_state(week, [[a, b] for a, b in pairs], pre_reminder_sent, advance_time)
+        self._apply(week, pairs, pre_reminder_sent, advance_time)
+        self._notify(ADVANCE)
+
+    def mark_pre_reminder_sent(self) -> None:
+        if self.pre_reminder_sent:
+            return
+        self._store.set_week_state(self.week, [[a, b] for a, b in self.pairs], True, self.advance_time)
+        self.pre_reminder_sent = True
+        self._notify(PRE_REMINDER_SENT)
+
+    # ---------- subscribers ----------
+
+    def subscribe(self, fn):
+        """Register fn(week_state, change); usable as a decorator."""
+        self._subscribers.append(fn)
+        return fn
+
+    def _notify(self, change: str) -> None:
+        for fn in self._subscribers:
+            try:
+                fn(self, change)
+            except Exception as e:
+                logger.warning(f"Week state subscriber {getattr(fn, '__name__', fn)} failed: {e}")
+
+    # ---------- lookups ----------
+
+    def opponent(self, team: str) -> str | None:
+        return self.matchups.get(team)
+
+    def ordered_pair(self, a: str, b: str) -> tuple[str, str]:
+        """(L, R) in advance-post order if a/b are a learned pair, else (a, b)."""
+        ab = {a, b}
+        for left, right in self.pairs:
+            if {left, right} == ab:
+                return (left, right)
+        return (a, b)